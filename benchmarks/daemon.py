@@ -0,0 +1,99 @@
+"""
+Compares the latency of short-lived processes that read a value by building a
+registry themselves with processes that ask a running ``cfitall serve``:
+
+    PYTHONPATH=. python benchmarks/daemon.py --keys 10000 --runs 20
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+NAME = "bench"
+KEY = "services.service000001.host"
+
+
+def write_config(home: str, keys: int) -> None:
+    """
+    Writes a json config file with (about) keys leaf keys where the default
+    FilesystemProvider of a registry named NAME will find it.
+    """
+    services = {
+        f"service{index:06d}": {"host": f"host{index}.example.com", "port": 8000}
+        for index in range(keys // 2)
+    }
+    directory = os.path.join(home, ".local", "etc", NAME)
+    os.makedirs(directory)
+    with open(os.path.join(directory, f"{NAME}.json"), "w") as file_:
+        json.dump({"services": services}, file_)
+
+
+def timed(command: list, env: dict, runs: int) -> float:
+    """
+    Returns the mean wall-clock seconds taken to run command.
+    """
+    start = time.perf_counter()
+    for _ in range(runs):
+        output = subprocess.run(command, env=env, check=True, capture_output=True)
+        assert output.stdout.strip(), command
+    return (time.perf_counter() - start) / runs
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--keys", type=int, default=10_000, help="leaf keys")
+    parser.add_argument("--runs", type=int, default=20, help="runs per command")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as home:
+        write_config(home, args.keys)
+        path = os.path.join(home, "cfitall.sock")
+        env = dict(os.environ, HOME=home)
+        server = subprocess.Popen(
+            [sys.executable, "-m", "cfitall", "serve", NAME, "--socket", path],
+            env=env,
+        )
+        try:
+            while not os.path.exists(path):
+                time.sleep(0.01)
+            commands = {
+                "python (baseline)": [sys.executable, "-c", "print(1)"],
+                "registry": [
+                    sys.executable,
+                    "-c",
+                    "from cfitall.registry import ConfigurationRegistry\n"
+                    f"cf = ConfigurationRegistry({NAME!r})\n"
+                    "cf.update()\n"
+                    f"print(cf.get({KEY!r}))",
+                ],
+                "client module": [
+                    sys.executable,
+                    "-c",
+                    "from cfitall.client import ConfigClient\n"
+                    f"print(ConfigClient({path!r}).get({KEY!r}))",
+                ],
+                "cfitall get": [
+                    sys.executable,
+                    "-m",
+                    "cfitall",
+                    "get",
+                    NAME,
+                    KEY,
+                    "--socket",
+                    path,
+                ],
+            }
+            for label, command in commands.items():
+                seconds = timed(command, env, args.runs)
+                print(f"{label:>18}: {seconds * 1000:7.1f} ms")
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
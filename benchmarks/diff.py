@@ -0,0 +1,71 @@
+"""
+Compares the cost of diffing two snapshots of a registry with comparing two
+flattened dicts, after a change to a single key:
+
+    PYTHONPATH=. python benchmarks/diff.py --keys 100000
+"""
+
+import argparse
+import copy
+import time
+
+from cfitall.registry import ConfigurationRegistry
+from cfitall.tests.helpers import DictProvider
+
+
+def flattened_diff(old: dict, new: dict) -> dict:
+    """
+    Diffs two flattened dicts the naive way.
+    """
+    keys = old.keys() | new.keys()
+    return {
+        key: (old.get(key), new.get(key))
+        for key in keys
+        if old.get(key) != new.get(key)
+    }
+
+
+def timed(function) -> float:
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--keys", type=int, default=100_000, help="leaf keys")
+    args = parser.parse_args()
+    sections = {
+        f"section{index:04d}": {f"key{key:04d}": key for key in range(100)}
+        for index in range(args.keys // 100)
+    }
+    provider = DictProvider(sections)
+    cf = ConfigurationRegistry("bench", providers=[provider])
+
+    before, flattened = cf.snapshot(), cf.flattened
+    cf.set("section0001.key0001", -1)
+    after = cf.snapshot()
+    print(f"set() one key, {args.keys} keys:")
+    print(
+        f"  flattened compare: {timed(lambda: flattened_diff(flattened, cf.flattened)) * 1000:8.2f} ms"
+    )
+    print(
+        f"  registry.diff():   {timed(lambda: cf.diff(before, after)) * 1000:8.2f} ms"
+    )
+
+    before, flattened = cf.snapshot(), cf.flattened
+    reloaded = copy.deepcopy(sections)
+    reloaded["section0002"]["key0002"] = -2
+    provider.replace(reloaded)
+    after = cf.snapshot()
+    print(f"provider reload with one changed key, {args.keys} keys:")
+    print(
+        f"  flattened compare: {timed(lambda: flattened_diff(flattened, cf.flattened)) * 1000:8.2f} ms"
+    )
+    print(
+        f"  registry.diff():   {timed(lambda: cf.diff(before, after)) * 1000:8.2f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Measures how long the EnvironmentProvider takes to parse environments with
+thousands of matching variables, compared with the previous pipeline (uncompiled
+separator, two casting passes over lists and expand_flattened_dict()):
+
+    PYTHONPATH=. python benchmarks/environment.py --variables 1000 5000 10000
+"""
+
+import argparse
+import os
+import re
+import time
+
+from cfitall import utils
+from cfitall.providers.environment import EnvironmentProvider
+
+
+def legacy_dict(provider: EnvironmentProvider) -> dict:
+    """
+    Parses the environment the way EnvironmentProvider did before the
+    single-pass pipeline.
+    """
+    output = {}
+    for key, value in os.environ.items():
+        if key.startswith(provider.prefix):
+            key = key.replace(provider.prefix, "", 1).lower()
+            split_value = value
+            if value.startswith("[") and value.endswith("]"):
+                split_value = []
+                for val in re.split(provider.value_separator, value[1:-1]):
+                    if val := val.strip():
+                        split_value.append(val)
+            if type(split_value) == str and split_value.lower() == "true":
+                split_value = True
+            if type(split_value) == str and split_value.lower() == "false":
+                split_value = False
+            if type(split_value) == list:
+                split_value = [
+                    True if type(val) == str and val.lower() == "true" else val
+                    for val in split_value
+                ]
+                split_value = [
+                    False if type(val) == str and val.lower() == "false" else val
+                    for val in split_value
+                ]
+            output[key] = split_value
+    return utils.expand_flattened_dict(output, separator=provider.level_separator)
+
+
+def populate(variables: int) -> dict:
+    """
+    Sets variables BENCH__* environment variables (and as many unrelated ones)
+    with a mix of strings, booleans, numbers and lists, returning matching
+    defaults.
+    """
+    defaults: dict = {}
+    for index in range(variables):
+        section, key = f"section{index // 50:03d}", f"key{index % 50:02d}"
+        kind = index % 4
+        value = ["value", "true", str(index), "[a, b, true, false]"][kind]
+        os.environ[f"BENCH__{section.upper()}__{key.upper()}"] = value
+        os.environ[f"OTHER_{index}"] = value
+        if kind == 2:
+            defaults.setdefault(section, {})[key] = 0
+    return defaults
+
+
+def best_of(function, runs: int = 5) -> float:
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--variables", type=int, nargs="+", default=[1000, 5000, 10000])
+    args = parser.parse_args()
+    print(f"{'variables':>10} {'previous':>12} {'single-pass':>12} {'typed':>12}")
+    for variables in args.variables:
+        for key in [key for key in os.environ if key.startswith(("BENCH__", "OTHER_"))]:
+            del os.environ[key]
+        defaults = populate(variables)
+        provider = EnvironmentProvider("bench")
+        typed = EnvironmentProvider("bench", defaults=defaults)
+        assert legacy_dict(provider) == provider._expand(provider._read_environment())
+        legacy = best_of(lambda: legacy_dict(provider), runs=1)
+        current = best_of(lambda: provider._expand(provider._read_environment()))
+        with_types = best_of(lambda: typed._expand(typed._read_environment()))
+        print(
+            f"{variables:>10} {legacy * 1000:>9.1f} ms {current * 1000:>9.1f} ms"
+            f" {with_types * 1000:>9.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Times cfitall's merge paths against the slow reference implementations in
+cfitall/tests/reference.py over random configurations of increasing size,
+checking that both give the same results:
+
+    PYTHONPATH=. python benchmarks/equivalence.py --sizes 100,1000,10000,1000000
+
+The reference flatten_dict() and both expand_flattened_dict()s grow faster
+than quadratically, so they are skipped ("-") above --reference-max and
+--quadratic-max keys. Registry merges are timed with snapshot(), as
+registry.dict returns a copy.
+"""
+
+import argparse
+import itertools
+import random
+import time
+
+from cfitall import utils
+from cfitall.registry import ConfigurationRegistry
+from cfitall.tests import reference
+from cfitall.tests.helpers import DictProvider
+
+
+def best_of(function, runs: int = 3) -> float:
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def run(size: int, args: argparse.Namespace) -> list:
+    """
+    Checks cfitall against the reference implementations for one random
+    configuration size, raising AssertionError if their results differ, and
+    returns (operation, seconds, reference seconds) rows, with None for the
+    operations that were skipped.
+    """
+    rng = random.Random(size)
+    shape = reference.random_shape(rng, size, args.fanout)
+    defaults = reference.random_layer(rng, shape)
+    layers = [reference.random_layer(rng, shape) for _ in range(args.providers)]
+    providers = [DictProvider(layer, f"p{index}") for index, layer in enumerate(layers)]
+
+    def registry() -> ConfigurationRegistry:
+        return ConfigurationRegistry("bench", defaults=defaults, providers=providers)
+
+    cf = registry()
+    merged = cf.dict
+    assert merged == reference.merge_layers(defaults, layers, {}), "merge"
+    path = ".".join(next(iter(utils.flatten_dict(merged))).split(".")[:-1] + ["new"])
+    super_ = utils.expand_flattened_path(path, 0)
+    cf.set(path, 0)
+    assert cf.dict == reference.merge_layers(defaults, layers, super_), "set()"
+    counter = itertools.count(1)
+    flattened = utils.flatten_dict(merged)
+    mixed = reference.random_mixed(rng, merged)
+    expanded = utils.expand_mixed_dict(mixed)
+    assert expanded == reference.expand_mixed_dict(mixed), "expand_mixed_dict"
+    runs = args.runs
+    rows = [
+        (
+            "merge",
+            best_of(lambda: registry().snapshot(), runs),
+            best_of(lambda: reference.merge_layers(defaults, layers, {}), runs),
+        ),
+        (
+            "set() + merge",
+            best_of(lambda: (cf.set(path, next(counter)), cf.snapshot()), runs),
+            best_of(lambda: reference.merge_layers(defaults, layers, super_), runs),
+        ),
+    ]
+
+    reference_seconds = None
+    if size <= args.reference_max:
+        expected = reference.flatten_dict(merged)
+        assert list(flattened.items()) == list(expected.items()), "flatten_dict"
+        reference_seconds = best_of(lambda: reference.flatten_dict(merged), runs)
+    rows.append(
+        (
+            "flatten_dict",
+            best_of(lambda: utils.flatten_dict(merged), runs),
+            reference_seconds,
+        )
+    )
+    rows.append(
+        (
+            "expand_mixed_dict",
+            best_of(lambda: utils.expand_mixed_dict(mixed), runs),
+            best_of(lambda: reference.expand_mixed_dict(mixed), runs),
+        )
+    )
+    seconds = reference_seconds = None
+    if size <= args.quadratic_max:
+        expanded = utils.expand_flattened_dict(flattened)
+        assert expanded == reference.expand_flattened_dict(flattened), "expand"
+        seconds = best_of(lambda: utils.expand_flattened_dict(flattened), runs)
+        reference_seconds = best_of(
+            lambda: reference.expand_flattened_dict(flattened), runs
+        )
+    rows.append(("expand_flattened_dict", seconds, reference_seconds))
+    rows.append(("freeze()", best_of(lambda: registry().freeze(), runs), None))
+    return rows
+
+
+def milliseconds(seconds) -> str:
+    return "-" if seconds is None else f"{seconds * 1000:.1f} ms"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--sizes",
+        default="100,1000,10000,100000,1000000",
+        help="comma-separated numbers of leaf keys",
+    )
+    parser.add_argument("--fanout", type=int, default=16, help="keys per section")
+    parser.add_argument("--providers", type=int, default=3, help="provider layers")
+    parser.add_argument("--runs", type=int, default=3, help="runs per timing")
+    parser.add_argument(
+        "--reference-max",
+        type=int,
+        default=300,
+        help="largest size to run the reference flatten_dict() for",
+    )
+    parser.add_argument(
+        "--quadratic-max",
+        type=int,
+        default=3000,
+        help="largest size to run expand_flattened_dict() for",
+    )
+    args = parser.parse_args()
+    print(f"{'keys':>8} {'operation':<22} {'cfitall':>12} {'reference':>12}")
+    for size in [int(size) for size in args.sizes.split(",")]:
+        for operation, seconds, reference_seconds in run(size, args):
+            print(
+                f"{size:>8} {operation:<22} {milliseconds(seconds):>12}"
+                f" {milliseconds(reference_seconds):>12}"
+            )
+
+
+if __name__ == "__main__":
+    main()
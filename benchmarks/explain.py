@@ -0,0 +1,70 @@
+"""
+Measures the cost of recording provenance during a merge, by comparing a full
+merge of a registry with a plain chain of merge_dicts() calls, and the latency
+of explain():
+
+    PYTHONPATH=. python benchmarks/explain.py --keys 100000
+"""
+
+import argparse
+import random
+import time
+
+from cfitall import utils
+from cfitall.registry import ConfigurationRegistry
+from cfitall.tests.helpers import DictProvider
+
+
+def make_layer(keys: int, step: int) -> dict:
+    """
+    Returns a nested config setting every step-th of keys leaf keys.
+    """
+    layer: dict = {}
+    for index in range(0, keys, step):
+        section = layer.setdefault(f"section{index // 100:04d}", {})
+        section[f"key{index % 100:02d}"] = index
+    return layer
+
+
+def best_of(function, runs: int = 5) -> float:
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--keys", type=int, default=100_000, help="leaf keys")
+    args = parser.parse_args()
+    defaults = make_layer(args.keys, 1)
+    providers = [
+        DictProvider(make_layer(args.keys, 2), "filesystem"),
+        DictProvider(make_layer(args.keys, 50), "environment"),
+    ]
+    cf = ConfigurationRegistry("bench", defaults=defaults, providers=providers)
+    cf.set_many(make_layer(args.keys, 1000))
+
+    def plain_merge():
+        config = utils.merge_dicts(cf.values["defaults"], {})
+        for provider in providers:
+            config = utils.merge_dicts(provider.dict, config)
+        utils.merge_dicts(cf.values["super"], config)
+
+    def registry_merge():
+        cf._sections = {}  # defeat reuse of unchanged sections
+        cf._merge_configs()
+
+    print(f"full merge of {args.keys} keys from 4 layers:")
+    print(f"  merge_dicts chain:        {best_of(plain_merge) * 1000:8.1f} ms")
+    print(f"  with provenance:          {best_of(registry_merge) * 1000:8.1f} ms")
+
+    keys = random.sample(cf.config_keys, 1000)
+    seconds = best_of(lambda: [cf.explain(key) for key in keys])
+    print(f"  explain():                {seconds * 1e6 / len(keys):8.1f} us/key")
+
+
+if __name__ == "__main__":
+    main()
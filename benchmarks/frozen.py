@@ -0,0 +1,58 @@
+"""
+Compares reads from a live registry (with an environment provider, as created
+by default) with reads from the same registry once it is frozen:
+
+    PYTHONPATH=. python benchmarks/frozen.py --keys 10000 --reads 200000
+"""
+
+import argparse
+import time
+
+from cfitall.providers.environment import EnvironmentProvider
+from cfitall.registry import ConfigurationRegistry
+
+
+def per_call(function, keys: list, reads: int) -> float:
+    """
+    Returns the mean seconds per call of function over reads calls with keys.
+    """
+    rounds = max(1, reads // len(keys))
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for key in keys:
+            function(key)
+    return (time.perf_counter() - start) / (rounds * len(keys))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--keys", type=int, default=10_000, help="leaf keys")
+    parser.add_argument("--reads", type=int, default=200_000, help="reads per test")
+    args = parser.parse_args()
+    defaults: dict = {}
+    for index in range(args.keys):
+        defaults.setdefault(f"section{index // 100}", {})[f"key{index % 100}"] = index
+    cf = ConfigurationRegistry(
+        "bench", defaults=defaults, providers=[EnvironmentProvider("bench")]
+    )
+    keys = cf.config_keys[:1000]
+    sections = sorted({key.split(".")[0] for key in keys})
+    tests = [
+        ("get()", lambda: cf.get, keys),
+        ("get_int()", lambda: cf.get_int, keys),
+        ("get_section()", lambda: cf.get_section, sections),
+    ]
+    live = [per_call(getter(), items, args.reads) for _, getter, items in tests]
+    start = time.perf_counter()
+    cf.freeze()
+    print(
+        f"freeze() of {args.keys} keys: {(time.perf_counter() - start) * 1000:.1f} ms"
+    )
+    print(f"{'':<14} {'live':>10} {'frozen':>10}")
+    for (name, getter, items), seconds in zip(tests, live):
+        frozen = per_call(getter(), items, args.reads)
+        print(f"{name:<14} {seconds * 1e9:>7.0f} ns {frozen * 1e9:>7.0f} ns")
+
+
+if __name__ == "__main__":
+    main()
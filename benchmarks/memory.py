@@ -0,0 +1,66 @@
+"""
+Measures the memory used by a registry's merged configuration, per leaf key,
+with and without compact mode:
+
+    PYTHONPATH=. python benchmarks/memory.py --keys 100000
+"""
+
+import argparse
+import gc
+import json
+import tracemalloc
+
+from cfitall.registry import ConfigurationRegistry
+from cfitall.tests.helpers import DictProvider
+
+
+def make_config(keys: int) -> dict:
+    """
+    Returns a nested config with (about) keys leaf keys, shaped like a fleet of
+    services with a handful of settings each.
+    """
+    services = {}
+    for index in range(keys // 5):
+        services[f"service{index:06d}"] = {
+            "host": f"host{index}.example.com",
+            "port": 8000 + index % 1000,
+            "timeout": 30,
+            "tls": {"enabled": True, "verify": index % 2 == 0},
+        }
+    # round-trip through json so that keys are separate objects, as if parsed
+    return json.loads(json.dumps({"services": services}))
+
+
+def measure(config: dict, compact: bool) -> int:
+    """
+    Returns the bytes allocated by a registry to merge config and look up every
+    key in it.
+    """
+    gc.collect()
+    tracemalloc.start()
+    registry = ConfigurationRegistry(
+        "bench", providers=[DictProvider(config)], compact=compact
+    )
+    keys = registry._get_snapshot().flattened
+    for key in list(keys)[::100]:
+        registry.get(key)
+    del keys
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--keys", type=int, default=100_000, help="leaf keys")
+    args = parser.parse_args()
+    config = make_config(args.keys)
+    for compact in (False, True):
+        used = measure(config, compact)
+        mode = "compact" if compact else "default"
+        print(f"{mode:>8}: {used / 2**20:8.1f} MiB, {used / args.keys:6.1f} B/key")
+
+
+if __name__ == "__main__":
+    main()
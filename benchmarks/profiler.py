@@ -0,0 +1,44 @@
+"""
+Measures the cost of registry.get() with the access profiler off, on, and
+sampling one in 100 reads:
+
+    PYTHONPATH=. python benchmarks/profiler.py --reads 1000000
+"""
+
+import argparse
+import time
+
+from cfitall.profiler import AccessProfiler
+from cfitall.registry import ConfigurationRegistry
+
+
+def time_reads(cf: ConfigurationRegistry, keys: list, reads: int) -> float:
+    """
+    Returns the mean seconds per get() over reads reads of keys.
+    """
+    get = cf.get
+    rounds = reads // len(keys)
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for key in keys:
+            get(key)
+    return (time.perf_counter() - start) / (rounds * len(keys))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--reads", type=int, default=1_000_000, help="get() calls")
+    args = parser.parse_args()
+    defaults = {f"section{i}": {f"key{j}": j for j in range(10)} for i in range(100)}
+    cf = ConfigurationRegistry("bench", defaults=defaults, providers=[])
+    keys = cf.config_keys[:100]
+    cf.get(keys[0])
+    print(f"profiler off:       {time_reads(cf, keys, args.reads) * 1e9:8.0f} ns/get")
+    cf.profiler = AccessProfiler()
+    print(f"profiler on:        {time_reads(cf, keys, args.reads) * 1e9:8.0f} ns/get")
+    cf.profiler = AccessProfiler(sample=100)
+    print(f"sampling 1 in 100:  {time_reads(cf, keys, args.reads) * 1e9:8.0f} ns/get")
+
+
+if __name__ == "__main__":
+    main()
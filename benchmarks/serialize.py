@@ -0,0 +1,62 @@
+"""
+Measures repeated access to registry.json / registry.yaml and the cost of
+registry.dump() with each serializer:
+
+    PYTHONPATH=. python benchmarks/serialize.py --keys 100000
+"""
+
+import argparse
+import json
+import os
+import time
+
+import yaml
+
+from cfitall import serialize
+from cfitall.registry import ConfigurationRegistry
+
+
+def best_of(function, runs: int = 3) -> float:
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--keys", type=int, default=100_000, help="leaf keys")
+    args = parser.parse_args()
+    defaults = {
+        f"section{index:04d}": {f"key{key:02d}": f"value{key}" for key in range(100)}
+        for index in range(args.keys // 100)
+    }
+    cf = ConfigurationRegistry("bench", defaults=defaults, providers=[])
+    config = cf.snapshot().dict
+
+    print(f"{args.keys} keys:")
+    print(
+        f"  json.dumps (before):    {best_of(lambda: json.dumps(config, indent=4, sort_keys=True)) * 1000:8.1f} ms"
+    )
+    print(f"  registry.json (cached): {best_of(lambda: cf.json) * 1000:8.3f} ms")
+    print(
+        f"  yaml.dump (before):     {best_of(lambda: yaml.dump(config), 1) * 1000:8.1f} ms"
+    )
+    print(
+        f"  yaml.dump (CDumper):    {best_of(lambda: yaml.dump(config, Dumper=serialize.Dumper), 1) * 1000:8.1f} ms"
+    )
+    with open(os.devnull, "wb") as devnull:
+        cf.set("section0000.key00", "changed")  # start from an uncached snapshot
+        print(
+            f"  dump, json module:      {best_of(lambda: cf.dump(devnull, indent=4)) * 1000:8.1f} ms"
+        )
+        if serialize.orjson is not None:
+            print(
+                f"  dump, orjson:           {best_of(lambda: cf.dump(devnull, indent=2)) * 1000:8.1f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
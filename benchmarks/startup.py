@@ -0,0 +1,81 @@
+"""
+Measures how long ProviderManager.update_all() takes to parse many yaml files,
+in-process and in a pool of worker processes, to find the number and size of
+files from which the process pool pays off:
+
+    PYTHONPATH=. python benchmarks/startup.py --files 1 2 4 8 16 --keys 100 2000
+"""
+
+import argparse
+import functools
+import os
+import tempfile
+import time
+
+import yaml
+
+from cfitall.manager import ProviderManager
+from cfitall.providers import formats
+from cfitall.providers.filesystem import FilesystemProvider
+
+
+def write_files(directory: str, files: int, keys: int) -> None:
+    """
+    Writes files yaml files of keys leaf keys each to directory.
+    """
+    data = {
+        f"section{index // 20}": {f"key{index % 20}": f"value {index}"}
+        for index in range(keys)
+    }
+    text = yaml.safe_dump(data)
+    for index in range(files):
+        with open(os.path.join(directory, f"config{index}.yml"), "w") as file_:
+            file_.write(text)
+
+
+def time_update(directory: str, files: int, processes) -> float:
+    """
+    Returns the seconds update_all() takes to read files fresh providers.
+    """
+    providers = [
+        FilesystemProvider([directory], f"config{index}", f"config{index}")
+        for index in range(files)
+    ]
+    manager = ProviderManager(providers=providers, processes=processes)
+    start = time.perf_counter()
+    manager.update_all()
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--files", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--keys", type=int, nargs="+", default=[100, 2000, 20000])
+    parser.add_argument(
+        "--processes", type=int, default=os.cpu_count(), help="worker processes"
+    )
+    parser.add_argument(
+        "--pure-yaml", action="store_true", help="parse without libyaml"
+    )
+    args = parser.parse_args()
+    if args.pure_yaml:
+        parse = functools.partial(yaml.load, Loader=yaml.SafeLoader)
+        formats.register_format("yaml", ["yaml", "yml"], parse)
+    print(f"{args.processes} worker processes, libyaml: {not args.pure_yaml}")
+    print(f"{'files':>6} {'keys/file':>10} {'in-process':>12} {'pool':>12}")
+    for keys in args.keys:
+        for files in args.files:
+            with tempfile.TemporaryDirectory() as directory:
+                write_files(directory, files, keys)
+                serial = min(time_update(directory, files, None) for _ in range(3))
+                pool = min(
+                    time_update(directory, files, args.processes) for _ in range(3)
+                )
+            print(
+                f"{files:>6} {keys:>10} {serial * 1000:>9.1f} ms"
+                f" {pool * 1000:>9.1f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+import sys
+
+from cfitall.cli import main
+
+sys.exit(main())
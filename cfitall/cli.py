@@ -0,0 +1,110 @@
+"""
+The cli module implements the ``cfitall`` command, which serves a registry over
+a unix domain socket (``cfitall serve``) and reads values from such a server
+(``cfitall get``, ``cfitall dump``).
+"""
+
+import argparse
+import json
+import signal
+import sys
+from typing import Any, List, Optional
+
+from cfitall.client import ConfigClient, ServerError, socket_path
+
+
+def _print(value: Any) -> None:
+    """
+    Prints strings as-is and other values as json.
+    """
+    if isinstance(value, str):
+        print(value)
+    else:
+        print(json.dumps(value, indent=4, sort_keys=True, default=str))
+
+
+def serve(name: str, path: str, refresh: float) -> None:
+    """
+    Builds a registry for name and serves it on path until interrupted.
+    """
+    # imported here so that the client commands never load any providers
+    from cfitall.registry import ConfigurationRegistry
+    from cfitall.scheduler import RefreshScheduler
+    from cfitall.server import ConfigServer
+
+    registry = ConfigurationRegistry(name)
+    registry.update()
+    scheduler = RefreshScheduler(registry)
+    if refresh > 0:
+        for provider_name in registry.providers.ordering:
+            scheduler.schedule(provider_name, refresh)
+    server = ConfigServer(registry, path)
+    signal.signal(signal.SIGTERM, lambda *args: sys.exit(0))
+    signal.signal(signal.SIGHUP, lambda *args: registry.update())
+    try:
+        with scheduler:
+            server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Runs the ``cfitall`` command and returns its exit status.
+
+    :param argv: command line arguments (sys.argv[1:])
+    """
+    parser = argparse.ArgumentParser(
+        prog="cfitall", description="serve and read cfitall configurations"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    subparsers = {}
+    for command, summary in (
+        ("serve", "serve a registry on a unix domain socket"),
+        ("get", "print a value or section from a server"),
+        ("dump", "print the whole configuration from a server"),
+    ):
+        subparser = commands.add_parser(command, help=summary)
+        subparser.add_argument("name", help="name of the configuration registry")
+        subparser.add_argument(
+            "--socket", help="socket path ($XDG_RUNTIME_DIR/cfitall-NAME-UID.sock)"
+        )
+        subparsers[command] = subparser
+    subparsers["serve"].add_argument(
+        "--refresh",
+        type=float,
+        default=0,
+        metavar="SECONDS",
+        help="refresh providers every SECONDS (never)",
+    )
+    subparsers["get"].add_argument("key", help="dotted path key, e.g. db.host")
+    args = parser.parse_args(argv)
+    path = args.socket or socket_path(args.name)
+
+    if args.command == "serve":
+        try:
+            serve(args.name, path, args.refresh)
+        except OSError as ex:
+            print(f"cfitall: cannot serve on {path}: {ex}", file=sys.stderr)
+            return 2
+        return 0
+    try:
+        with ConfigClient(path) as client:
+            if args.command == "dump":
+                _print(client.dump())
+                return 0
+            value = client.get(args.key)
+            if value is None:
+                value = client.get_section(args.key)
+    except OSError as ex:
+        print(f"cfitall: cannot connect to {path}: {ex}", file=sys.stderr)
+        return 2
+    except (ServerError, ValueError) as ex:
+        print(f"cfitall: {path} answered with an error: {ex}", file=sys.stderr)
+        return 2
+    if value is None:
+        return 1
+    _print(value)
+    return 0
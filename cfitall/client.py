@@ -0,0 +1,126 @@
+"""
+The client module implements a ConfigClient for reading values from a running
+cfitall server (see cfitall.server). It is meant for short-lived processes that
+only need a few values: it uses nothing but the standard library and does not
+import the rest of cfitall, so no providers are loaded or parsed.
+"""
+
+import json
+import os
+import socket
+from typing import Any, Dict, Optional
+
+
+class ServerError(Exception):
+    """
+    Raised when a cfitall server responds to a request with an error.
+    """
+
+
+def socket_path(name: str) -> str:
+    """
+    Returns the default socket path of the server for the named registry, in
+    ``$XDG_RUNTIME_DIR``, or if it is not set in a directory of the current
+    user's in /tmp (which the server creates, accessible only to the user).
+
+    :param name: name of the configuration registry served
+    """
+    uid = os.getuid()
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if not runtime_dir:
+        runtime_dir = os.path.join("/tmp", f"cfitall-{uid}")
+    return os.path.join(runtime_dir, f"cfitall-{name}-{uid}.sock")
+
+
+class ConfigClient:
+    #: path of the server's unix domain socket
+    path: str
+    #: socket timeout in seconds
+    timeout: float
+
+    def __init__(self, path: str, timeout: float = 5.0) -> None:
+        """
+        A ConfigClient reads configuration values from a cfitall server over
+        its unix domain socket. The connection is opened on the first request
+        and reused until close() is called; the client can also be used as a
+        context manager, which closes it on exit. Sockets that are not owned by
+        the current user are refused with PermissionError, so that another
+        user cannot impersonate the server.
+
+        :param path: path of the server's socket (see socket_path())
+        :param timeout: socket timeout in seconds (5.0)
+        """
+        self.path = path
+        self.timeout = timeout
+        self._socket: Optional[socket.socket] = None
+        self._file: Any = None
+
+    def __enter__(self) -> "ConfigClient":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Closes the connection to the server, if any.
+        """
+        if self._socket is not None:
+            self._file.close()
+            self._socket.close()
+            self._socket = self._file = None
+
+    def _request(self, method: str, **params: Any) -> Any:
+        """
+        Sends a request to the server and returns the value of its response,
+        raising ServerError if the server responds with an error.
+        """
+        if self._socket is None:
+            if os.stat(self.path).st_uid != os.getuid():
+                raise PermissionError(f"{self.path} is owned by another user")
+            self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._socket.settimeout(self.timeout)
+            try:
+                self._socket.connect(self.path)
+            except OSError:
+                self._socket.close()
+                self._socket = None
+                raise
+            self._file = self._socket.makefile("rb")
+        request = json.dumps({"method": method, **params}) + "\n"
+        try:
+            self._socket.sendall(request.encode("utf-8"))
+            line = self._file.readline()
+        except OSError:
+            self.close()
+            raise
+        if not line:
+            self.close()
+            raise ConnectionError(f"{self.path} closed the connection")
+        response = json.loads(line)
+        if "error" in response:
+            raise ServerError(response["error"])
+        return response["value"]
+
+    def get(self, config_key: str) -> Any:
+        """
+        Returns the value of a dotted path key, or None if it is not set.
+
+        :param config_key: dotted path key, e.g. "db.host"
+        """
+        return self._request("get", key=config_key)
+
+    def get_section(self, config_key: str) -> Optional[Dict]:
+        """
+        Returns the values below a dotted path key as a nested dict, or None if
+        it is not a section.
+
+        :param config_key: dotted path key, e.g. "db"
+        """
+        return self._request("get_section", key=config_key)
+
+    def dump(self) -> Dict:
+        """
+        Returns the server's whole merged configuration as a nested dict.
+        """
+        return self._request("dump")
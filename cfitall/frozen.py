@@ -0,0 +1,154 @@
+"""
+The frozen module implements FrozenConfig, the precomputed lookup tables a
+ConfigurationRegistry serves its configuration from once it is frozen.
+"""
+
+from collections.abc import Mapping
+from decimal import Decimal
+from typing import Any, Callable, Dict, Hashable, List, Union
+
+from cfitall import ConfigValueType, utils
+from cfitall.snapshot import ConfigSnapshot
+
+
+class FrozenError(RuntimeError):
+    """
+    Raised when a frozen registry is asked to change its configuration.
+    """
+
+
+def _index_sections(section: Mapping, path: str, sections: Dict) -> None:
+    """
+    Adds the subsections of section (recursively) to sections, keyed by their
+    dotted paths.
+    """
+    for key, value in section.items():
+        if isinstance(value, Mapping):
+            subpath = f"{path}.{key}" if path else key
+            sections[subpath] = value
+            _index_sections(value, subpath, sections)
+
+
+def _to_list(value: Any) -> List:
+    if type(value) != list:
+        return [val.strip() for val in value.split(",")]
+    return list(value)
+
+
+class FrozenConfig:
+    #: snapshot the tables were computed from
+    snapshot: ConfigSnapshot
+    #: values by dotted path key
+    values: Dict[Hashable, ConfigValueType]
+    #: sections of the configuration, by dotted path key
+    sections: Dict[str, Mapping]
+
+    def __init__(self, snapshot: ConfigSnapshot) -> None:
+        """
+        FrozenConfig holds lookup tables computed from a snapshot: a flat dict
+        of all values, every section by its dotted path, and tables of the
+        values coerced to bool, int, float, Decimal, list and str. Reading a
+        value is then a single dict lookup. Values that cannot be coerced to a
+        type are left out of its table, and are coerced again on access to
+        raise the error.
+
+        :param snapshot: snapshot of the merged configuration
+        """
+        self.snapshot = snapshot
+        self.values = dict(snapshot.flattened)
+        self.sections = {}
+        _index_sections(snapshot.dict, "", self.sections)
+        self._bools = self._tabulate(bool)
+        self._ints = self._tabulate(int)
+        self._floats = self._tabulate(float)
+        self._decimals = self._tabulate(Decimal)
+        self._lists = self._tabulate(_to_list)
+        self._strings = self._tabulate(str)
+
+    def _tabulate(self, cast: Callable[[Any], Any]) -> Dict[Hashable, Any]:
+        """
+        Returns a table of all values that cast can coerce, by dotted path key.
+        """
+        table = {}
+        for config_key, value in self.values.items():
+            try:
+                table[config_key] = cast(value)
+            except Exception:
+                pass
+        return table
+
+    def _coerce(
+        self, table: Dict, config_key: Hashable, cast: Callable[[Any], Any]
+    ) -> Any:
+        """
+        Returns the value of config_key from table, or None if the key is not
+        set; values missing from table are coerced with cast to raise its error.
+        """
+        try:
+            return table[config_key]
+        except KeyError:
+            if config_key not in self.values:
+                return None
+        return cast(self.values[config_key])
+
+    def get(self, config_key: Hashable) -> Union[ConfigValueType, None]:
+        """
+        Returns the value of config_key, or None if it is not set.
+        """
+        try:
+            return self.values.get(config_key)
+        except TypeError:
+            # unhashable keys are never set
+            return None
+
+    def get_bool(self, config_key: str) -> Union[bool, None]:
+        """
+        Returns the value of config_key as a boolean, or None if it is not set.
+        """
+        return self._coerce(self._bools, config_key, bool)
+
+    def get_decimal(self, config_key: str) -> Union[Decimal, None]:
+        """
+        Returns the value of config_key as a Decimal, or None if it is not set;
+        raises like Decimal() if the value cannot be converted.
+        """
+        return self._coerce(self._decimals, config_key, Decimal)
+
+    def get_float(self, config_key: str) -> Union[float, None]:
+        """
+        Returns the value of config_key as a float, or None if it is not set;
+        raises like float() if the value cannot be converted.
+        """
+        return self._coerce(self._floats, config_key, float)
+
+    def get_int(self, config_key: str) -> Union[int, None]:
+        """
+        Returns the value of config_key as an int, or None if it is not set;
+        raises like int() if the value cannot be converted.
+        """
+        return self._coerce(self._ints, config_key, int)
+
+    def get_list(self, config_key: str, csv: bool = True) -> Union[list, None]:
+        """
+        Returns a copy of the value of config_key as a list, splitting strings
+        on commas unless csv is False, or None if it is not set.
+        """
+        if not csv:
+            value = self.values.get(config_key)
+            return None if value is None else list(value)  # type: ignore
+        value = self._coerce(self._lists, config_key, _to_list)
+        return None if value is None else list(value)
+
+    def get_section(self, config_key: str) -> Union[Dict, None]:
+        """
+        Returns a copy of the section at config_key as a nested dict, or None
+        if config_key is not a section.
+        """
+        section = self.sections.get(config_key)
+        return None if section is None else utils.merge_dicts(section, {})
+
+    def get_string(self, config_key: str) -> Union[str, None]:
+        """
+        Returns the value of config_key as a string, or None if it is not set.
+        """
+        return self._coerce(self._strings, config_key, str)
@@ -0,0 +1,218 @@
+"""
+The interpolation module implements an Interpolator, which resolves references
+to other configuration keys (``${db.host}``) and to environment variables
+(``${ENV:HOME}``) in the string values of a merged configuration.
+"""
+
+from collections.abc import Mapping
+import os
+import re
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
+
+from cfitall.schema import ValidationError
+
+# matches an escaped dollar sign or a reference
+_REFERENCE = re.compile(r"\$\$|\$\{([^}]*)\}")
+_MISSING = object()
+_ENV = "ENV:"
+
+# a parsed template: literal strings and (key or "ENV:" variable) references
+_Parts = List[Tuple[bool, str]]
+
+
+class InterpolationError(ValidationError):
+    """
+    Raised when a reference cannot be resolved: the key it refers to is not
+    set, or references form a cycle.
+    """
+
+
+def has_references(value: Any) -> bool:
+    """
+    Returns whether value is a string containing references (or escapes).
+
+    :param value: configuration value
+    """
+    return (
+        isinstance(value, str) and "$" in value and _REFERENCE.search(value) is not None
+    )
+
+
+def references(value: Any) -> List[str]:
+    """
+    Returns the configuration keys that value refers to, excluding references
+    to environment variables.
+
+    :param value: configuration value
+    """
+    parts = _parse(value) if has_references(value) else None
+    return [
+        name
+        for reference, name in parts or ()
+        if reference and not name.startswith(_ENV)
+    ]
+
+
+def _parse(template: str) -> Optional[_Parts]:
+    """
+    Splits a template into literal and reference parts, or returns None if it
+    does not contain any references or escapes.
+    """
+    parts: _Parts = []
+    position = 0
+    for match in _REFERENCE.finditer(template):
+        if match.start() > position:
+            parts.append((False, template[position : match.start()]))
+        if match.group(1) is None:
+            parts.append((False, "$"))
+        else:
+            parts.append((True, match.group(1).strip()))
+        position = match.end()
+    if not parts:
+        return None
+    if position < len(template):
+        parts.append((False, template[position:]))
+    return parts
+
+
+class Interpolator:
+    def __init__(self) -> None:
+        """
+        An Interpolator resolves references in the string values of successive
+        flattened configurations. ``${other.key}`` is replaced with the value
+        of other.key (keeping its type if the reference is the whole value),
+        ``${ENV:VAR}`` with the environment variable VAR (or an empty string),
+        and ``$$`` with a literal ``$``. References may refer to values that
+        contain references themselves.
+
+        The interpolator keeps the dependency graph between keys, and the
+        values they resolved to, from one configuration to the next, so that
+        only values whose template or dependencies have changed are resolved
+        again.
+        """
+        self._templates: Dict[str, str] = {}
+        self._parsed: Dict[str, _Parts] = {}
+        self._resolved: Dict[str, Any] = {}
+        self._inputs: Dict[str, Any] = {}
+        self._environment: Dict[str, Optional[str]] = {}
+
+    @property
+    def templates(self) -> Dict[str, str]:
+        """
+        Returns the values containing references in the configuration resolved
+        last, by key.
+        """
+        return self._templates
+
+    def resolve(self, flattened: Mapping) -> Dict[str, Any]:
+        """
+        Returns the resolved value of every value of flattened that contains a
+        reference, raising InterpolationError if any cannot be resolved.
+
+        :param flattened: flattened configuration
+        """
+        templates = {}
+        parsed = {}
+        for key, value in flattened.items():
+            if isinstance(value, str) and "$" in value:
+                parts = self._parsed.get(key)
+                if parts is None or self._templates.get(key) != value:
+                    parts = _parse(value)
+                if parts is not None:
+                    templates[key] = value
+                    parsed[key] = parts
+
+        dependents: Dict[str, Set[str]] = {}
+        for key, parts in parsed.items():
+            for reference, name in parts:
+                if reference:
+                    dependents.setdefault(name, set()).add(key)
+
+        dirty = {
+            key
+            for key, template in templates.items()
+            if self._templates.get(key) != template or key not in self._resolved
+        }
+        for name, previous in self._inputs.items():
+            if name in templates or name not in dependents:
+                continue
+            current = flattened.get(name, _MISSING)
+            if current is not previous and current != previous:
+                dirty |= dependents[name]
+        for name, previous in self._environment.items():
+            if os.environ.get(name) != previous and _ENV + name in dependents:
+                dirty |= dependents[_ENV + name]
+        for name in self._templates.keys() - templates.keys():
+            dirty |= dependents.get(name, set())
+        pending = list(dirty)
+        while pending:
+            for dependent in dependents.get(pending.pop(), ()):
+                if dependent not in dirty:
+                    dirty.add(dependent)
+                    pending.append(dependent)
+
+        resolved = {key: self._resolved[key] for key in templates if key not in dirty}
+        inputs: Dict[str, Any] = {}
+        environment: Dict[str, Optional[str]] = {}
+        errors: Dict[str, str] = {}
+        for key in sorted(dirty):
+            if key in resolved:
+                continue
+            try:
+                self._resolve(key, flattened, parsed, resolved, [])
+            except InterpolationError as ex:
+                errors.update(ex.errors)
+        if errors:
+            raise InterpolationError(errors)
+
+        for name in dependents:
+            if name.startswith(_ENV):
+                variable = name[len(_ENV) :]
+                environment.setdefault(variable, os.environ.get(variable))
+            elif name not in templates:
+                inputs.setdefault(name, flattened.get(name, _MISSING))
+        self._templates = templates
+        self._parsed = parsed
+        self._resolved = resolved
+        self._inputs = inputs
+        self._environment = environment
+        return resolved
+
+    def _resolve(
+        self,
+        key: str,
+        flattened: Mapping,
+        parsed: Dict[str, _Parts],
+        resolved: Dict[str, Any],
+        stack: List[str],
+    ) -> Any:
+        """
+        Resolves the template of key (and, first, any templates it refers to),
+        storing the result in resolved.
+        """
+        if key in stack:
+            cycle = " -> ".join(stack[stack.index(key) :] + [key])
+            raise InterpolationError({key: f"circular reference: {cycle}"})
+        stack.append(key)
+        values: List[Any] = []
+        for reference, name in parsed[key]:
+            if not reference:
+                values.append(name)
+            elif name.startswith(_ENV):
+                values.append(os.environ.get(name[len(_ENV) :], ""))
+            elif name in resolved:
+                values.append(resolved[name])
+            elif name in parsed:
+                values.append(self._resolve(name, flattened, parsed, resolved, stack))
+            elif name in flattened:
+                values.append(flattened[name])
+            else:
+                raise InterpolationError({key: f"undefined reference: ${{{name}}}"})
+        stack.pop()
+        value: Union[str, Any]
+        if len(values) == 1 and parsed[key][0][0]:
+            value = values[0]
+        else:
+            value = "".join(str(value) for value in values)
+        resolved[key] = value
+        return value
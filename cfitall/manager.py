@@ -3,34 +3,193 @@ The manager module implements a ProviderManager, which manages configuration
 providers for a ConfigurationRegistry.
 """
 
+import bisect
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import functools
+import itertools
 import logging
-from typing import Union, Optional, List
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
 
 from cfitall.providers.base import ConfigProviderBase
 
 logger = logging.getLogger(__name__)
 
 
+def _reordering(method: Callable) -> Callable:
+    """
+    Wraps a list method of ProviderOrdering so that the manager is reordered
+    to match the list after each change.
+    """
+
+    @functools.wraps(method)
+    def wrapper(self: "ProviderOrdering", *args: Any, **kwargs: Any) -> Any:
+        result = method(self, *args, **kwargs)
+        self._manager._reorder(self)
+        return result
+
+    return wrapper
+
+
+class ProviderOrdering(list):
+    """
+    The names of a manager's providers in merge order, as returned by
+    ProviderManager.ordering. Changing the list in place reorders the
+    providers (by giving them increasing priorities); names that are not
+    registered or listed twice raise ValueError.
+    """
+
+    def __init__(self, manager: "ProviderManager", provider_names: Iterable[str]):
+        super().__init__(provider_names)
+        self._manager = manager
+
+    append = _reordering(list.append)
+    clear = _reordering(list.clear)
+    extend = _reordering(list.extend)
+    insert = _reordering(list.insert)
+    pop = _reordering(list.pop)
+    remove = _reordering(list.remove)
+    reverse = _reordering(list.reverse)
+    sort = _reordering(list.sort)
+    __delitem__ = _reordering(list.__delitem__)
+    __iadd__ = _reordering(list.__iadd__)
+    __imul__ = _reordering(list.__imul__)
+    __setitem__ = _reordering(list.__setitem__)
+
+
 class ProviderManager:
-    #: list determining the order in which providers are merged
-    ordering: List[str]
+    #: number of worker processes update_all() parses files in, if any
+    processes: Optional[int]
 
-    def __init__(self, providers: Optional[List[ConfigProviderBase]] = None) -> None:
+    def __init__(
+        self,
+        providers: Optional[List[ConfigProviderBase]] = None,
+        processes: Optional[int] = None,
+    ) -> None:
         """
         The ProviderManager manages configuration providers, handling registration,
         deregistration and ordering. It is attached to a registry's
         ``providers`` attribute.
 
+        Providers are kept in a dict by name, and merged in order of their
+        priorities (lowest first, so the highest priority wins); providers
+        registered without a priority go after all others. The manager also
+        records which providers' data changed in update(), until the registry
+        consumes the record with consume_dirty().
+
+        If processes is set, update_all() parses the files of providers that
+        support it (see ConfigProviderBase.parse_task()) in a pool of that many
+        worker processes, which pays off when several large files have to be
+        parsed, e.g. at startup. The pool is started on first use and kept
+        until close() is called or processes changes. Providers whose tasks
+        fail in the pool (e.g. because they cannot be pickled) are updated
+        in-process instead.
+
         :param providers: optional list of preconfigured providers to manage
+        :param processes: number of worker processes to parse files in (None)
         """
-        self.ordering: List[str] = []
+        self.processes = processes
+        self._providers: Dict[str, ConfigProviderBase] = {}
+        self._priorities: Dict[str, float] = {}
+        self._ordering: List[str] = []
+        self._sort_keys: List[Tuple[float, int]] = []
+        self._sequence = itertools.count()
+        self._dirty: Set[str] = set()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._executor_size: Optional[int] = None
         if not providers:
             providers = []
         for provider in providers:
             self.register(provider)
 
+    def __getattr__(self, name: str) -> ConfigProviderBase:
+        # registered providers remain accessible as attributes, e.g.
+        # manager.environment, unless their names clash with the manager's own
+        if not name.startswith("_") and name in self.__dict__.get("_providers", {}):
+            return self._providers[name]
+        raise AttributeError(name)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._providers
+
+    def __iter__(self) -> Iterator[ConfigProviderBase]:
+        """
+        Yields the registered providers in merge order.
+        """
+        providers = self._providers
+        return (providers[name] for name in self._ordering)
+
+    def __len__(self) -> int:
+        return len(self._providers)
+
     def __repr__(self) -> str:
-        return str(self.ordering)
+        return str(self._ordering)
+
+    @property
+    def dirty(self) -> Set[str]:
+        """
+        Returns the names of providers that were registered, reprioritized or
+        whose data changed in update() since the record was last consumed.
+        """
+        return set(self._dirty)
+
+    @property
+    def ordering(self) -> List[str]:
+        """
+        Returns the names of the registered providers in merge order. Assign a
+        list of names, or change the returned list in place, to reorder them
+        (by giving them increasing priorities); providers left out of the list
+        in place go after the listed ones.
+        """
+        return ProviderOrdering(self, self._ordering)
+
+    @ordering.setter
+    def ordering(self, provider_names: Iterable[str]) -> None:
+        provider_names = list(provider_names)
+        if sorted(provider_names) != sorted(self._providers):
+            raise ValueError("ordering must list each registered provider once")
+        for priority, provider_name in enumerate(provider_names):
+            self.set_priority(provider_name, priority)
+
+    @property
+    def priorities(self) -> Dict[str, float]:
+        """
+        Returns the priorities of the registered providers, in merge order.
+        """
+        return {name: self._priorities[name] for name in self._ordering}
+
+    def close(self) -> None:
+        """
+        Shuts down the pool of worker processes, if one was started; the next
+        parallel update_all() starts a new one.
+        """
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def consume_dirty(self, provider_names: Optional[Iterable[str]] = None) -> Set[str]:
+        """
+        Returns the names of dirty providers (see dirty) and marks them clean.
+
+        :param provider_names: optional subset of providers to consume
+        """
+        if provider_names is None:
+            dirty, self._dirty = self._dirty, set()
+        else:
+            dirty = self._dirty.intersection(provider_names)
+            self._dirty -= dirty
+        return dirty
 
     def get(self, name: str) -> Union[ConfigProviderBase, None]:
         """
@@ -39,24 +198,25 @@ class ProviderManager:
         :param name: friendly name of a registered provider
         :return: provider instance or None
         """
-        try:
-            return getattr(self, name)
-        except AttributeError:
-            return None
+        return self._providers.get(name)
 
-    def register(self, provider: ConfigProviderBase) -> None:
+    def register(
+        self, provider: ConfigProviderBase, priority: Optional[float] = None
+    ) -> None:
         """
         Registers a provider with the manager.
 
         :param provider: an instance of a configured provider
+        :param priority: merge priority, higher wins (after all others)
         """
-        if not hasattr(self, provider.provider_name):
-            setattr(self, provider.provider_name, provider)
-            self.ordering.append(provider.provider_name)
-        else:
-            logger.error(
-                f"there is already a provider named {provider.provider_name} registered!"
-            )
+        name = provider.provider_name
+        if name in self._providers:
+            logger.error(f"there is already a provider named {name} registered!")
+            return
+        if priority is None:
+            priority = self._sort_keys[-1][0] + 1 if self._sort_keys else 0
+        self._providers[name] = provider
+        self._insert(name, priority)
 
     def deregister(self, provider_name: str) -> None:
         """
@@ -64,19 +224,150 @@ class ProviderManager:
 
         :param provider_name:
         """
-        if hasattr(self, provider_name):
-            delattr(self, provider_name)
-        self.ordering = [prov for prov in self.ordering if prov != provider_name]
+        if self._providers.pop(provider_name, None) is not None:
+            self._remove(provider_name)
+            self._dirty.add(provider_name)
+
+    def set_priority(self, provider_name: str, priority: float) -> None:
+        """
+        Changes the merge priority of a registered provider.
+
+        :param provider_name: friendly name of a registered provider
+        :param priority: merge priority, higher wins
+        """
+        if provider_name not in self._providers:
+            raise KeyError(provider_name)
+        if priority != self._priorities[provider_name]:
+            self._remove(provider_name)
+            self._insert(provider_name, priority)
+
+    def _reorder(self, ordering: ProviderOrdering) -> None:
+        """
+        Reorders the providers to match an ordering changed in place. If the
+        change is invalid, the ordering is reset to the manager's and
+        ValueError raised.
+        """
+        provider_names = list(ordering)
+        if len(set(provider_names)) != len(provider_names) or not all(
+            name in self._providers for name in provider_names
+        ):
+            list.__setitem__(ordering, slice(None), self._ordering)
+            raise ValueError("ordering must list registered providers at most once")
+        provider_names += [name for name in self._ordering if name not in ordering]
+        for priority, provider_name in enumerate(provider_names):
+            self.set_priority(provider_name, priority)
+
+    def _insert(self, provider_name: str, priority: float) -> None:
+        """
+        Inserts a provider name into the ordering, after providers of the same
+        or lower priority.
+        """
+        key = (priority, next(self._sequence))
+        index = bisect.bisect(self._sort_keys, key)
+        self._sort_keys.insert(index, key)
+        self._ordering.insert(index, provider_name)
+        self._priorities[provider_name] = priority
+        self._dirty.add(provider_name)
 
-    def update_all(self) -> None:
+    def _remove(self, provider_name: str) -> None:
+        """
+        Removes a provider name from the ordering.
+        """
+        index = self._ordering.index(provider_name)
+        del self._ordering[index]
+        del self._sort_keys[index]
+        del self._priorities[provider_name]
+
+    def update(self, provider_name: str) -> bool:
+        """
+        Triggers the named provider to run its update() function, returning
+        True if it updated successfully. The provider is marked dirty if its
+        revision changed (or if it does not report revisions).
+
+        :param provider_name: friendly name of a registered provider
+        """
+        provider: Optional[ConfigProviderBase] = self.get(provider_name)
+        if provider is None:
+            logger.error(f"could not find provider {provider_name}")
+            return False
+        revision = provider.revision
+        if not provider.update():
+            logger.error(f"provider {provider} failed to update!")
+            return False
+        if revision is None or provider.revision != revision:
+            self._dirty.add(provider_name)
+        return True
+
+    def update_all(self, provider_names: Optional[Iterable[str]] = None) -> None:
         """
         Triggers each registered provider to run its update() function, updating
         the values it will return.
+
+        :param provider_names: optional subset of providers to update, in order
         """
-        for provider_name in self.ordering:
+        if provider_names is None:
+            provider_names = self._ordering
+        provider_names = list(provider_names)
+        updated = self._update_parallel(provider_names) if self.processes else set()
+        for provider_name in provider_names:
+            if provider_name not in updated:
+                self.update(provider_name)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """
+        Returns the pool of worker processes, starting it (again) if needed.
+        """
+        if self._executor is not None and self._executor_size != self.processes:
+            self.close()
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.processes)
+            self._executor_size = self.processes
+        return self._executor
+
+    def _update_parallel(self, provider_names: List[str]) -> set:
+        """
+        Runs the parse tasks of the named providers in the pool of worker
+        processes and applies their results, returning the names of the
+        providers that were updated this way (successfully or not). Providers
+        whose tasks fail in the pool are left out, so that update_all() updates
+        them in-process. Nothing is run in the pool unless at least two
+        providers have tasks.
+        """
+        tasks = {}
+        for provider_name in provider_names:
+            provider = self.get(provider_name)
+            if provider is not None and (task := provider.parse_task()):
+                tasks[provider_name] = task
+        if len(tasks) < 2:
+            return set()
+        executor = self._get_executor()
+        futures = {
+            name: executor.submit(function, *args)
+            for name, (function, args) in tasks.items()
+        }
+        updated = set()
+        for provider_name, future in futures.items():
+            try:
+                result = future.result()
+            except Exception as ex:
+                logger.warning(
+                    f"could not parse {provider_name} in a worker process: {ex}"
+                )
+                if isinstance(ex, BrokenProcessPool):
+                    # a worker died; start a new pool next time
+                    self.close()
+                continue
+            updated.add(provider_name)
+            provider = self.get(provider_name)
+            if provider is None:
+                # deregistered while its file was being parsed
+                continue
             try:
-                provider: Optional[ConfigProviderBase] = self.get(provider_name)
-                if provider and not provider.update():
+                revision = provider.revision
+                if not provider.apply_parsed(result):
                     logger.error(f"provider {provider} failed to update!")
-            except AttributeError:
-                logger.error(f"could not find provider {provider_name}")
+                elif revision is None or provider.revision != revision:
+                    self._dirty.add(provider_name)
+            except Exception as ex:
+                logger.error(f"provider {provider} failed to update: {ex}")
+        return updated
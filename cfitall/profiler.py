@@ -0,0 +1,183 @@
+"""
+The profiler module implements an AccessProfiler, which records how a
+ConfigurationRegistry is used: which keys are read how often, from where, and
+which reads trigger (and how long they spend in) merging and flattening the
+configuration.
+"""
+
+from collections import Counter
+import marshal
+import sys
+import threading
+from types import FrameType
+from typing import Dict, List, Optional, Tuple, Union
+
+#: a call site, as (filename, line number, function name)
+CallSite = Tuple[str, int, str]
+#: the cost of the merges or flattens of a call site, as [count, seconds]
+Cost = List[Union[int, float]]
+
+
+def _is_internal(frame: FrameType) -> bool:
+    """
+    Returns whether frame belongs to a cfitall module (other than its tests).
+    """
+    module = frame.f_globals.get("__name__", "")
+    if module == "cfitall" or module.startswith("cfitall."):
+        return not module.startswith("cfitall.tests")
+    return False
+
+
+def _call_site(frame: Optional[FrameType]) -> CallSite:
+    """
+    Returns the first frame outside of cfitall, starting at frame.
+    """
+    while frame is not None and _is_internal(frame):
+        frame = frame.f_back
+    if frame is None:
+        return ("~", 0, "<unknown>")
+    return (frame.f_code.co_filename, frame.f_lineno, frame.f_code.co_name)
+
+
+class AccessProfiler:
+    #: one in how many reads is recorded
+    sample: int
+
+    def __init__(self, sample: int = 1) -> None:
+        """
+        An AccessProfiler counts reads of a registry's keys, per key and per
+        call site (the first frame outside of cfitall), and times the merges
+        and flattens of its configuration, per call site that triggered them.
+        Install it as a registry's ``profiler`` (or use the registry's
+        profile() context manager), then print report() or write a pstats file
+        with dump_stats().
+
+        :param sample: record one in this many reads, scaling counts up (1)
+        """
+        if sample < 1:
+            raise ValueError("sample must be at least 1")
+        self.sample = sample
+        self._lock = threading.Lock()
+        self._reads = 0
+        #: estimated number of reads per key
+        self.keys: Counter = Counter()
+        #: estimated number of reads per (call site, key)
+        self.call_sites: Counter = Counter()
+        #: number of merges and total seconds spent merging, per call site
+        self.merges: Dict[CallSite, Cost] = {}
+        #: number of flattens and total seconds spent flattening, per call site
+        self.flattens: Dict[CallSite, Cost] = {}
+
+    def record_read(self, config_key: str, frame: Optional[FrameType] = None) -> None:
+        """
+        Records a read of config_key, if it is sampled.
+
+        :param config_key: dotted path key that was read
+        :param frame: frame of the read (the caller's)
+        """
+        with self._lock:
+            self._reads += 1
+            if self._reads % self.sample:
+                return
+            site = _call_site(frame or sys._getframe(1))
+            self.keys[config_key] += self.sample
+            self.call_sites[site, config_key] += self.sample
+
+    def record_merge(self, seconds: float, frame: Optional[FrameType] = None) -> None:
+        """
+        Records a merge of the configuration that took seconds.
+
+        :param seconds: duration of the merge
+        :param frame: frame that triggered the merge
+        """
+        self._record(self.merges, seconds, frame or sys._getframe(1))
+
+    def record_flatten(self, seconds: float, frame: Optional[FrameType] = None) -> None:
+        """
+        Records a flatten of the configuration that took seconds.
+
+        :param seconds: duration of the flatten
+        :param frame: frame that triggered the flatten
+        """
+        self._record(self.flattens, seconds, frame or sys._getframe(1))
+
+    def _record(
+        self, costs: Dict[CallSite, Cost], seconds: float, frame: FrameType
+    ) -> None:
+        site = _call_site(frame)
+        with self._lock:
+            cost = costs.setdefault(site, [0, 0.0])
+            cost[0] += 1
+            cost[1] += seconds
+
+    def report(self, limit: int = 20) -> str:
+        """
+        Returns a text report of the hottest keys and call sites, and of the
+        call sites that triggered merges and flattens.
+
+        :param limit: maximum number of rows in each table (20)
+        """
+        with self._lock:
+            keys = self.keys.most_common(limit)
+            sites = self.call_sites.most_common(limit)
+            merges = sorted(self.merges.items(), key=lambda item: -item[1][1])
+            flattens = sorted(self.flattens.items(), key=lambda item: -item[1][1])
+            total = sum(self.keys.values())
+        merge_seconds = sum(cost[1] for _, cost in merges)
+        flatten_seconds = sum(cost[1] for _, cost in flattens)
+        lines = [
+            f"{total} reads of {len(self.keys)} keys"
+            f" (sampling 1 in {self.sample}),"
+            f" {sum(cost[0] for _, cost in merges)} merges"
+            f" ({merge_seconds * 1000:.1f} ms),"
+            f" {sum(cost[0] for _, cost in flattens)} flattens"
+            f" ({flatten_seconds * 1000:.1f} ms)",
+            "",
+            f"{'reads':>10}  key",
+        ]
+        lines.extend(f"{count:>10}  {key}" for key, count in keys)
+        lines.extend(["", f"{'reads':>10}  call site: key"])
+        lines.extend(
+            f"{count:>10}  {_format_site(site)}: {key}" for (site, key), count in sites
+        )
+        for title, costs in (("merges", merges), ("flattens", flattens)):
+            lines.extend(["", f"{title:>10}  {'total ms':>10}  call site"])
+            lines.extend(
+                f"{cost[0]:>10}  {cost[1] * 1000:>10.2f}  {_format_site(site)}"
+                for site, cost in costs[:limit]
+            )
+        return "\n".join(lines)
+
+    def dump_stats(self, path: str) -> None:
+        """
+        Writes the recorded data to path in the format of cProfile's
+        dump_stats(), so that it can be loaded with pstats.Stats(path). Each key
+        read appears as a function named ``get <key>``, and merges and
+        flattens as ``merge`` and ``flatten``, called from their call sites.
+
+        :param path: file to write the stats to
+        """
+        stats: Dict = {}
+        with self._lock:
+            for (site, key), count in self.call_sites.items():
+                entry = stats.setdefault(
+                    ("cfitall", 0, f"get {key}"), [0, 0, 0.0, 0.0, {}]
+                )
+                entry[0] += count
+                entry[1] += count
+                entry[4][site] = (count, count, 0.0, 0.0)
+            for name, costs in (("merge", self.merges), ("flatten", self.flattens)):
+                for site, (calls, seconds) in costs.items():
+                    entry = stats.setdefault(("cfitall", 0, name), [0, 0, 0.0, 0.0, {}])
+                    entry[0] += calls
+                    entry[1] += calls
+                    entry[2] += seconds
+                    entry[3] += seconds
+                    entry[4][site] = (calls, calls, seconds, seconds)
+        with open(path, "wb") as file_:
+            marshal.dump({func: tuple(entry) for func, entry in stats.items()}, file_)
+
+
+def _format_site(site: CallSite) -> str:
+    filename, lineno, name = site
+    return f"{filename}:{lineno}({name})"
@@ -3,19 +3,25 @@ describes the ConfigProviderBase class for providers to implement
 """
 
 from abc import ABC, abstractmethod
+from collections.abc import Mapping
+from typing import Any, Callable, FrozenSet, Hashable, Optional, Tuple
 
 
 class ConfigProviderBase(ABC):
     #: each provider must provide a unique provider_name
     provider_name: str = "not_implemented"
+    #: top-level keys served by the provider, or None to serve all keys; providers
+    #: declaring namespaces are only loaded once one of their keys is accessed
+    namespaces: Optional[FrozenSet[str]] = None
 
     @property
     @abstractmethod
-    def dict(self) -> dict:
+    def dict(self) -> Mapping:
         """
-        The dict property should return a dictionary of the configuration values
-        obtained by the provider. This dict is then combined and reconciled with
-        that of the other providers to produce the final configuration.
+        The dict property should return a dictionary (or other mapping) of the
+        configuration values obtained by the provider. This dict is then combined
+        and reconciled with that of the other providers to produce the final
+        configuration.
         """
         raise NotImplementedError
 
@@ -26,3 +32,33 @@ class ConfigProviderBase(ABC):
         and should return True on successful update or False on failure.
         """
         raise NotImplementedError
+
+    @property
+    def revision(self) -> Optional[Hashable]:
+        """
+        The revision property may return a hashable token identifying the current
+        state of the provider's data, which must change whenever the contents of
+        dict change. The registry uses it to decide when it can reuse its merged
+        configuration. Providers returning None (the default) are re-read on
+        every access.
+        """
+        return None
+
+    def parse_task(self) -> Optional[Tuple[Callable, Tuple]]:
+        """
+        Providers whose updates are dominated by CPU-bound parsing may return a
+        picklable ``(function, args)`` pair from parse_task(), which the
+        ProviderManager can call in a worker process, passing the result to
+        apply_parsed() in place of calling update(). Providers returning None
+        (the default) are updated in-process with update().
+        """
+        return None
+
+    def apply_parsed(self, result: Any) -> bool:
+        """
+        Applies the result of the task returned by parse_task(), returning True
+        on success.
+
+        :param result: return value of the parse task's function
+        """
+        raise NotImplementedError
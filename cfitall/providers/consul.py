@@ -0,0 +1,217 @@
+"""
+implements a ConsulProvider for watching configs in a Consul-style KV store
+"""
+
+import base64
+import http.client
+import json
+import logging
+import random
+import threading
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import quote, urlencode, urlsplit
+
+from cfitall import utils
+from cfitall.providers.base import ConfigProviderBase
+
+logger = logging.getLogger(__name__)
+
+
+class ConsulProvider(ConfigProviderBase):
+    #: base url of the KV store's http api
+    url: str
+    #: KV path whose keys are mapped onto the configuration
+    prefix: str
+    #: how long the server may hold a blocking query open, in seconds
+    wait: float
+    #: socket timeout in seconds, on top of wait for blocking queries
+    timeout: float
+
+    def __init__(
+        self,
+        prefix: str,
+        url: str = "http://127.0.0.1:8500",
+        provider_name: str = "consul",
+        token: Optional[str] = None,
+        wait: float = 300.0,
+        timeout: float = 10.0,
+        backoff_base: float = 1.0,
+        backoff_max: float = 60.0,
+    ) -> None:
+        """
+        ConsulProvider reads all keys below prefix from a Consul-style KV http
+        api (``GET /v1/kv/{prefix}?recurse``), mapping each KV path below the
+        prefix onto a dotted configuration key, e.g. ``{prefix}/db/host``
+        becomes ``db.host``. Values are decoded as utf-8 strings.
+
+        The first call to update() reads the keys and starts a background
+        thread that watches them with blocking queries, passing the last
+        ``X-Consul-Index`` seen so that the server only responds once the keys
+        change (or wait expires). Changes are applied as soon as a query
+        returns. Call stop() to end the watch.
+
+        :param prefix: KV path to read keys from, e.g. "config/myapp"
+        :param url: base url of the KV store ("http://127.0.0.1:8500")
+        :param provider_name: friendly name for the provider ("consul")
+        :param token: optional ACL token sent as the X-Consul-Token header
+        :param wait: maximum seconds for the server to hold a query open (300)
+        :param timeout: socket timeout in seconds, on top of wait (10.0)
+        :param backoff_base: delay in seconds after the first watch failure (1.0)
+        :param backoff_max: maximum delay in seconds between watch attempts (60.0)
+        """
+        self.prefix = prefix.strip("/")
+        # keys below the prefix; "config/app" must not match "config/app2/..."
+        self._key_prefix = f"{self.prefix}/" if self.prefix else ""
+        self.url = url
+        self.provider_name = provider_name
+        self.token = token
+        self.wait = wait
+        self.timeout = timeout
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        #: X-Consul-Index of the data currently held by the provider
+        self.index = 0
+        self._data: dict = {}
+        self._revision: int = 0
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _connect(self, timeout: float) -> http.client.HTTPConnection:
+        """
+        Returns a new connection to the KV store.
+        """
+        parts = urlsplit(self.url)
+        if parts.scheme == "https":
+            return http.client.HTTPSConnection(parts.netloc, timeout=timeout)
+        return http.client.HTTPConnection(parts.netloc, timeout=timeout)
+
+    def _query(
+        self, connection: http.client.HTTPConnection, index: int = 0
+    ) -> Tuple[int, List[Dict]]:
+        """
+        Queries the keys below prefix, blocking until the store's index exceeds
+        index (if given), and returns the new index and the list of entries.
+        """
+        params = {"recurse": "true"}
+        if index:
+            params.update(index=str(index), wait=f"{int(self.wait)}s")
+        path = urlsplit(self.url).path.rstrip("/")
+        path = f"{path}/v1/kv/{quote(self._key_prefix)}?{urlencode(params)}"
+        headers = {"X-Consul-Token": self.token} if self.token else {}
+        connection.request("GET", path, headers=headers)
+        response = connection.getresponse()
+        body = response.read()
+        new_index = int(response.getheader("X-Consul-Index") or 0)
+        if response.status == 404:
+            return new_index, []
+        if response.status != 200:
+            raise ValueError(f"unexpected status {response.status}")
+        return new_index, json.loads(body) or []
+
+    def _apply(self, index: int, entries: List[Dict]) -> None:
+        """
+        Maps entries onto a nested dict and replaces the provider's data.
+        """
+        flattened = {}
+        for entry in entries:
+            if not entry["Key"].startswith(self._key_prefix):
+                continue
+            key = entry["Key"][len(self._key_prefix) :].strip("/")
+            if not key or entry.get("Value") is None:
+                continue
+            value = base64.b64decode(entry["Value"]).decode("utf-8")
+            flattened[key.replace("/", ".")] = value
+        with self._lock:
+            self.index = index
+            self._data = utils.expand_mixed_dict(flattened)
+            self._revision += 1
+
+    def _watch(self) -> None:
+        """
+        Runs blocking queries until stop() is called, applying each change.
+        """
+        connection = None
+        failures = 0
+        while not self._stopping.is_set():
+            try:
+                if connection is None:
+                    # servers add up to wait / 16 of jitter to blocking queries
+                    timeout = self.wait + self.wait / 16 + self.timeout
+                    connection = self._connect(timeout)
+                index, entries = self._query(connection, max(self.index, 1))
+                failures = 0
+                if index < self.index:
+                    # the store's index went backwards (e.g. it was restored);
+                    # apply what it returned and start watching from scratch
+                    index = 0
+                if index != self.index and not self._stopping.is_set():
+                    self._apply(index, entries)
+            except Exception as ex:
+                if self._stopping.is_set():
+                    break
+                logger.error(f"error watching {self.url} {self.prefix}: {ex}")
+                if connection is not None:
+                    connection.close()
+                    connection = None
+                failures += 1
+                delay = min(self.backoff_max, self.backoff_base * 2 ** (failures - 1))
+                self._stopping.wait(random.uniform(0, delay))
+        if connection is not None:
+            connection.close()
+
+    def start(self) -> None:
+        """
+        Starts the background watch thread, if it is not already running.
+        """
+        if self._thread is None or not self._thread.is_alive():
+            self._stopping.clear()
+            self._thread = threading.Thread(
+                target=self._watch, name=f"cfitall-{self.provider_name}", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """
+        Stops the background watch thread. A blocking query in progress is
+        abandoned once it returns; the thread is a daemon, so it never keeps the
+        process alive.
+
+        :param timeout: seconds to wait for the thread to exit (don't wait)
+        """
+        self._stopping.set()
+        if self._thread is not None and timeout is not None:
+            self._thread.join(timeout)
+
+    def update(self) -> bool:
+        """
+        Reads the keys below prefix and makes sure the watch thread is running.
+        Once the watch is running, it applies changes as they happen and this is
+        a no-op.
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return True
+        connection = self._connect(self.timeout)
+        try:
+            self._apply(*self._query(connection))
+        except Exception as ex:
+            logger.error(f"error reading {self.url} {self.prefix}: {ex}")
+            return False
+        finally:
+            connection.close()
+        self.start()
+        return True
+
+    @property
+    def dict(self) -> dict:
+        """
+        Returns the configuration dictionary from the latest KV data.
+        """
+        return self._data
+
+    @property
+    def revision(self) -> int:
+        """
+        Returns a counter that is incremented each time new KV data is applied.
+        """
+        return self._revision
@@ -0,0 +1,152 @@
+"""
+implements a DirectoryProvider for reading one-file-per-key config directories,
+such as Kubernetes ConfigMap and Secret volumes
+"""
+
+import logging
+import os
+from typing import Dict, Optional
+
+from cfitall import utils
+from cfitall.providers.base import ConfigProviderBase
+
+logger = logging.getLogger(__name__)
+
+#: name of the symlink Kubernetes swaps atomically when a volume is updated
+DATA_LINK = "..data"
+
+
+class DirectoryProvider(ConfigProviderBase):
+    #: directory to read files from
+    directory: str
+    #: dotted key under which to nest the directory's keys
+    key_prefix: Optional[str]
+    #: whether to strip trailing newlines from file contents
+    strip_newline: bool
+
+    def __init__(
+        self,
+        directory: str,
+        key_prefix: Optional[str] = None,
+        provider_name: str = "directory",
+        strip_newline: bool = True,
+    ) -> None:
+        """
+        DirectoryProvider reads configuration values from a directory containing
+        one file per key, such as a mounted Kubernetes ConfigMap or Secret. Each
+        file's name (and the names of any subdirectories leading to it) is used
+        as its dotted configuration key, e.g. ``db.host`` or ``db/host`` both
+        become ``db.host``, and its (utf-8) contents as the value.
+
+        Kubernetes updates such volumes by atomically swapping the ``..data``
+        symlink to a new directory. If the directory has a ``..data`` link, the
+        provider reads files from its target and only re-reads them when the
+        target changes, so update() costs a single readlink() when nothing has
+        changed. Plain directories are re-read on every update().
+
+        :param directory: directory to read files from
+        :param key_prefix: dotted key to nest values under, e.g. "db" (None)
+        :param provider_name: friendly name for the provider ("directory")
+        :param strip_newline: strip trailing newlines from values (True)
+        """
+        self.directory = directory
+        self.key_prefix = key_prefix
+        self.provider_name = provider_name
+        self.strip_newline = strip_newline
+        self._data: dict = {}
+        self._revision: int = 0
+        self._target: Optional[str] = None
+
+    def _read_link(self) -> Optional[str]:
+        """
+        Returns the target of the directory's ``..data`` link, or None if the
+        directory does not have one.
+        """
+        try:
+            return os.readlink(os.path.join(self.directory, DATA_LINK))
+        except OSError:
+            return None
+
+    def _read_files(self, root: str) -> Dict[str, str]:
+        """
+        Reads all files below root into a flattened dict of dotted keys,
+        skipping hidden entries (including Kubernetes' ``..`` entries), and
+        files whose keys are also sections of other files' keys (e.g. ``db``
+        next to ``db.host``), which cannot be both a value and a section.
+
+        :param root: directory to read
+        """
+        flattened = {}
+        for dirpath, dirnames, filenames in os.walk(root, followlinks=True):
+            dirnames[:] = sorted(name for name in dirnames if not name.startswith("."))
+            relpath = os.path.relpath(dirpath, root)
+            parents = [] if relpath == os.curdir else relpath.split(os.sep)
+            for filename in sorted(filenames):
+                if filename.startswith("."):
+                    continue
+                path = os.path.join(dirpath, filename)
+                try:
+                    with open(path, "r", encoding="utf-8") as file_:
+                        value = file_.read()
+                except UnicodeDecodeError:
+                    logger.warning(f"skipping non-utf-8 file {path}")
+                    continue
+                if self.strip_newline:
+                    value = value.rstrip("\r\n")
+                key = ".".join(parents + [filename])
+                if self.key_prefix:
+                    key = f"{self.key_prefix}.{key}"
+                flattened[key] = value
+        sections = utils.parent_paths(key.lower() for key in flattened)
+        for key in [key for key in flattened if key.lower() in sections]:
+            logger.error(f"skipping {key} in {root}: other files set keys below it")
+            del flattened[key]
+        return flattened
+
+    def update(self) -> bool:
+        """
+        Re-reads the directory's files if its ``..data`` link has changed (or
+        if it has none), returning False if the directory cannot be read.
+        """
+        target = self._read_link()
+        if target is not None and target == self._target:
+            return True
+        if not os.path.isdir(self.directory):
+            logger.warning(f"directory {self.directory} does not exist")
+            return False
+        for _ in range(3):
+            root = self.directory
+            if target is not None:
+                root = os.path.join(self.directory, target)
+            try:
+                flattened = self._read_files(root)
+            except OSError as ex:
+                # the link was probably swapped while reading; retry
+                logger.debug(f"error reading {root}: {ex}")
+                target = self._read_link()
+                continue
+            latest = self._read_link()
+            if latest == target:
+                break
+            target = latest
+        else:
+            logger.error(f"could not read a consistent copy of {self.directory}")
+            return False
+        self._data = utils.expand_mixed_dict(flattened)
+        self._target = target
+        self._revision += 1
+        return True
+
+    @property
+    def dict(self) -> dict:
+        """
+        Returns the configuration dictionary read from the directory.
+        """
+        return self._data
+
+    @property
+    def revision(self) -> int:
+        """
+        Returns a counter that is incremented each time the files are read.
+        """
+        return self._revision
@@ -2,13 +2,31 @@
 implements an EnvironmentProvider for reading values from env vars
 """
 
+from collections.abc import Mapping
+import json
 import os
 import re
-from typing import Union, List
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Hashable,
+    List,
+    Optional,
+    Pattern,
+    Tuple,
+    Union,
+)
 
 from cfitall import utils
 from cfitall.providers.base import ConfigProviderBase
 
+if TYPE_CHECKING:  # pragma: no cover
+    from cfitall.registry import ConfigurationRegistry
+
+_BOOLEANS = {"true": True, "false": False}
+_MISSING = object()
+
 
 class EnvironmentProvider(ConfigProviderBase):
     #: whether to cast "true" and "false" strings to boolean values
@@ -21,6 +39,8 @@ class EnvironmentProvider(ConfigProviderBase):
     value_separator: str
     #: whether to split values on value_separator
     value_split: bool
+    #: configuration defaults (or registry whose defaults) values are cast to
+    defaults: Optional[Union[Mapping, "ConfigurationRegistry"]]
 
     def __init__(
         self,
@@ -30,54 +50,152 @@ class EnvironmentProvider(ConfigProviderBase):
         provider_name: str = "environment",
         value_separator: str = ",",
         value_split: bool = True,
+        defaults: Optional[Union[Mapping, "ConfigurationRegistry"]] = None,
     ):
         """
         EnvironmentProvider attempts to read configuration values from environment
         variables.
 
+        If defaults are given, the value of a variable whose key has an int or
+        float default is cast to int or float, and the value of one whose key
+        has a list or dict default is parsed as json; values that cannot be cast
+        are read as if there were no default. defaults may be a registry, whose
+        current defaults are then used; a registry created with
+        cast_environment=True passes itself to the environment providers it is
+        created with that have no defaults.
+
         :param prefix: namespace prefix for environment variables (e.g. "myapp")
         :param cast_bool: attempt to cast "true" and "false" strings as booleans (True)
         :param level_separator: hierarchical separator in env variable name ("__")
         :param provider_name: friendly name for the provider ("environment")
         :param value_separator: string or regex to split lists on (",")
         :param value_split: whether to split values enclosed in square brackets (True)
+        :param defaults: nested or flattened defaults, or a registry, to cast
+            values by (None)
         """
         self.provider_name = provider_name
         self.level_separator = level_separator
         self.value_separator = value_separator
         self.cast_bool = cast_bool
         self.value_split = value_split
+        self.defaults = defaults
         self.prefix = f"{prefix.upper()}{level_separator}"
+        self._cache_key: Optional[Hashable] = None
+        self._names: Optional[Tuple[str, ...]] = None
+        self._names_key: Optional[Tuple[str, int]] = None
+        self._data: dict = {}
+        self._pattern: Optional[Pattern] = None
+        self._types: Dict[str, type] = {}
+        self._types_key: Optional[Tuple[Any, ...]] = None
+        self._types_version = 0
+
+    def _environment_items(self) -> Tuple[Tuple[str, str], ...]:
+        """
+        Returns the (name, value) pairs of all environment variables beginning
+        with prefix, in the order os.environ yields them. The names of the
+        matching variables are kept, and os.environ is only scanned for them
+        again after update(), or when prefix or the number of variables
+        changes or a matching variable disappears.
+        """
+        environ = os.environ
+        key = (self.prefix, len(environ))
+        names = self._names
+        if names is not None and key == self._names_key:
+            items = []
+            for name in names:
+                value = environ.get(name)
+                if value is None:
+                    break
+                items.append((name, value))
+            else:
+                return tuple(items)
+        names = tuple(name for name in environ if name.startswith(self.prefix))
+        self._names, self._names_key = names, key
+        return tuple((name, environ[name]) for name in names)
+
+    def _default_types(self) -> Dict[str, type]:
+        """
+        Returns the types of int, float, list and dict defaults, keyed by their
+        lowercased keys joined with level_separator, computing them again when
+        defaults is replaced or (for a registry) its generation changes.
+        _types_version is incremented whenever the types change.
+        """
+        source = self.defaults
+        if source is None or isinstance(source, Mapping):
+            defaults, generation = source, None
+        else:
+            defaults, generation = source.defaults, source.generation
+        previous = self._types_key
+        if (
+            previous is None
+            or previous[0] is not source
+            or previous[1:] != (generation, self.level_separator)
+        ):
+            types: Dict[str, type] = {}
+            pending: List[Tuple[str, Mapping]] = [
+                ("", utils.expand_mixed_dict(defaults or {}))
+            ]
+            while pending:
+                path, section = pending.pop()
+                for name, value in section.items():
+                    name = f"{path}{self.level_separator}{name}" if path else name
+                    if isinstance(value, Mapping):
+                        types[name] = dict
+                        pending.append((name, value))
+                    elif type(value) in (int, float, list):
+                        types[name] = type(value)
+            if types != self._types:
+                self._types = types
+                self._types_version += 1
+            self._types_key = (source, generation, self.level_separator)
+        return self._types
 
-    def _read_environment(self) -> dict:
+    def _read_environment(
+        self, items: Optional[Tuple[Tuple[str, str], ...]] = None
+    ) -> Dict[str, Any]:
         """
-        Reads all environment variables beginning with prefix and loads them into
-        a dictionary using level_separator as a hierarchical path separator.
+        Reads all environment variables beginning with prefix into a dictionary
+        keyed by their lowercased names (without the prefix), casting each
+        value in a single pass.
+
+        :param items: matching variables, as returned by _environment_items()
         """
+        types = self._default_types()
+        start = len(self.prefix)
         output = {}
-        for key, value in os.environ.items():
-            if key.startswith(self.prefix):
-                key = key.replace(self.prefix, "", 1).lower()
-                split_value: Union[List, str, bool] = self._split_value(value)
-                if self.cast_bool:
-                    if type(split_value) == str and split_value.lower() == "true":
-                        split_value = True
-                    if type(split_value) == str and split_value.lower() == "false":
-                        split_value = False
-                    if type(split_value) == list:
-                        split_value = [
-                            True if type(val) == str and val.lower() == "true" else val
-                            for val in split_value
-                        ]
-                        split_value = [
-                            False
-                            if type(val) == str and val.lower() == "false"
-                            else val
-                            for val in split_value
-                        ]
-                output[key] = split_value
+        if items is None:
+            items = self._environment_items()
+        for key, value in items:
+            key = key[start:].lower()
+            kind = types.get(key)
+            cast = _MISSING if kind is None else self._cast_typed(value, kind)
+            output[key] = self._cast(value) if cast is _MISSING else cast
         return output
 
+    @staticmethod
+    def _cast_typed(value: str, kind: type) -> Any:
+        """
+        Casts value to kind (int, float, or a list or dict parsed from json),
+        returning _MISSING if it cannot be cast.
+        """
+        try:
+            cast = json.loads(value) if kind in (list, dict) else kind(value)
+        except ValueError:
+            return _MISSING
+        return cast if isinstance(cast, kind) else _MISSING
+
+    def _cast(self, value: str) -> Union[List, str, bool]:
+        """
+        Splits value into a list (see _split_value), and casts "true" and
+        "false" strings (or list items) to booleans if cast_bool is True.
+        """
+        split_value = self._split_value(value)
+        if not self.cast_bool:
+            return split_value
+        if isinstance(split_value, list):
+            return [_BOOLEANS.get(val.lower(), val) for val in split_value]
+        return _BOOLEANS.get(split_value.lower(), split_value)
+
     def _split_value(self, value: str) -> Union[List[str], str]:
         """
         If self.value_split is True, split value by self.value_separator,
@@ -86,25 +204,73 @@ class EnvironmentProvider(ConfigProviderBase):
         """
         if self.value_split:
             if value.startswith("[") and value.endswith("]"):
-                values = []
-                for val in re.split(self.value_separator, value[1:-1]):
-                    if val := val.strip():
-                        values.append(val)
-                return values
+                pattern = self._pattern
+                if pattern is None or pattern.pattern != self.value_separator:
+                    pattern = self._pattern = re.compile(self.value_separator)
+                return [
+                    val for val in map(str.strip, pattern.split(value[1:-1])) if val
+                ]
         return value
 
     @property
-    def dict(self) -> dict:
+    def dict(self) -> Dict:
         """
         Returns the provider's configuration data from environment variables.
+        The parsed data is reused for as long as the matching variables (and
+        the provider's parsing options) are unchanged.
+        """
+        revision = self._revision()
+        if revision != self._cache_key:
+            self._data = self._expand(self._read_environment(revision[1]))
+            self._cache_key = revision
+        return self._data
+
+    def _expand(self, flattened: Dict[str, Any]) -> Dict:
+        """
+        Expands keys joined with level_separator into a nested dict. If keys
+        conflict, the one read first wins.
+        """
+        output: Dict = {}
+        for key, value in flattened.items():
+            *parents, name = key.split(self.level_separator)
+            node = output
+            for parent in parents:
+                node = node.setdefault(parent, {})
+                if not isinstance(node, dict):
+                    break
+            else:
+                node.setdefault(name, value)
+        return output
+
+    @property
+    def revision(self) -> Hashable:
+        """
+        Returns the matching environment variables and parsing options, which
+        change whenever the provider's data would.
+        """
+        return self._revision()
+
+    def _revision(self) -> Tuple[Tuple, Tuple[Tuple[str, str], ...]]:
+        """
+        Returns the parsing options and the matching environment variables.
         """
-        return utils.expand_flattened_dict(
-            self._read_environment(), separator=self.level_separator
+        self._default_types()
+        options = (
+            self.prefix,
+            self.level_separator,
+            self.value_separator,
+            self.cast_bool,
+            self.value_split,
+            self._types_version,
         )
+        return options, self._environment_items()
 
     def update(self) -> bool:
         """
-        This is a no-op for the EnvironmentProvider, which always reads
-        environment variables in realtime as doing so is a non-blocking call.
+        Scans the environment for matching variables again. Changes to the
+        values of matching variables, and variables that are added or removed,
+        are otherwise read in realtime (see _environment_items()), so this is
+        only needed when a variable is added while another is removed.
         """
+        self._names = None
         return True
@@ -2,14 +2,14 @@
 implements a FilesystemProvider for reading configs from disk
 """
 
-import json
+from collections.abc import Mapping
 import logging
 import os
-from typing import Union, List
-
-import yaml
+from typing import Any, Callable, Hashable, Iterable, List, Optional, Tuple, Union
 
+from cfitall.providers import formats
 from cfitall.providers.base import ConfigProviderBase
+from cfitall.providers.lazyjson import LazyJSONObject
 
 logger = logging.getLogger(__name__)
 
@@ -19,67 +19,145 @@ class FilesystemProvider(ConfigProviderBase):
     path: List[str]
     #: namespace for locating files
     prefix: str
+    #: whether to memory-map json files and parse top-level keys on first access
+    large_file: bool
 
     def __init__(
-        self, path: List[str], prefix: str, provider_name: str = "filesystem"
+        self,
+        path: List[str],
+        prefix: str,
+        provider_name: str = "filesystem",
+        namespaces: Optional[Iterable[str]] = None,
+        large_file: bool = False,
     ) -> None:
         """
-        FilesystemProvider attempts to read json or yaml configuration files
-        from disk.
+        FilesystemProvider attempts to read configuration files from disk, in
+        any of the formats registered in cfitall.providers.formats (json, yaml,
+        toml and dotenv by default). A file is only parsed again when its stat
+        signature (inode, size and modification time) changes.
 
         :param path: list of filesystem paths to search for config files
         :param prefix: base name of file to look for (e.g. f"{prefix}.yml")
         :param provider_name: friendly name for the provider ("filesystem")
+        :param namespaces: top-level keys to load lazily from the file (None)
+        :param large_file: parse json files one top-level key at a time (False)
         """
         self.path = path
         self.prefix = prefix
         self.provider_name = provider_name
+        self.large_file = large_file
+        if namespaces is not None:
+            self.namespaces = frozenset(ns.lower() for ns in namespaces)
         self.config_file: Union[str, None] = None
         self.config_file_type: Union[str, None] = None
         self._set_config_file()
-        self._data: dict = {}
+        self._data: Mapping = {}
+        self._revision: int = 0
+        self._signature: Optional[Hashable] = None
+        self._pending_signature: Optional[Hashable] = None
 
     def _read_config_file(self) -> None:
         """
         Attempts to read and parse self.config_file, storing the results
-        in the self._data dictionary.
-        """
-        if self.config_file and os.path.isfile(self.config_file):
-            try:
-                with open(self.config_file, "r") as file_:
-                    data = {}
-                    if self.config_file_type == "yaml":
-                        data = yaml.safe_load(file_.read())
-                    elif self.config_file_type == "json":
-                        data = json.loads(file_.read())
-            except Exception as ex:
-                logger.error(f"error opening file: {self.config_file}: {ex}")
-            self._data = {key.lower(): value for key, value in data.items()}
-        else:
+        in the self._data dictionary, unless the file is unchanged since it
+        was last read.
+        """
+        signature = self._changed_signature()
+        if signature is None:
+            return
+        if self.large_file and self.config_file_type == "json":
+            self._read_large_json_file(self.config_file, signature)  # type: ignore
+            return
+        try:
+            file_format = formats.FORMATS[self.config_file_type]  # type: ignore
+            data = formats.parse_file(self.config_file, file_format.parse)  # type: ignore
+        except Exception as ex:
+            logger.error(f"error opening file: {self.config_file}: {ex}")
+            return
+        self._set_data(data, signature)
+
+    def _changed_signature(self) -> Optional[Hashable]:
+        """
+        Returns the stat signature of self.config_file if it has changed since
+        the file was last read, or None if it is unchanged or does not exist.
+        """
+        config_file = self.config_file
+        if not config_file or not os.path.isfile(config_file):
             logger.warning("config_file not set or file does not exist")
+            return None
+        stat = os.stat(config_file)
+        signature = (config_file, stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        return None if signature == self._signature else signature
+
+    def _set_data(self, data: Optional[Mapping], signature: Hashable) -> None:
+        """
+        Stores parsed file data (with lowercased top-level keys) as the
+        provider's data.
+        """
+        self._data = {key.lower(): value for key, value in (data or {}).items()}
+        self._signature = signature
+        self._revision += 1
+
+    def _read_large_json_file(self, config_file: str, signature: Hashable) -> None:
+        """
+        Memory-maps config_file into a LazyJSONObject, whose sections are
+        parsed when they are first accessed.
+
+        :param config_file: path of the json file to map
+        :param signature: stat signature of the file
+        """
+        try:
+            self._data = LazyJSONObject(config_file)
+        except Exception as ex:
+            logger.error(f"error opening file: {config_file}: {ex}")
+            return
+        self._signature = signature
+        self._revision += 1
 
     def _set_config_file(self) -> bool:
         """
-        Iterates through the directories in self.path, looking for json or yaml
-        configuration files, and configuring the object to use the first found.
-        Returns True if a file is found, else returns False.
+        Iterates through the directories in self.path, looking for a
+        configuration file in any registered format, and configuring the object
+        to use the first found. Within a directory, formats are tried in the
+        order they were registered. Returns True if a file is found, else
+        returns False.
         """
+        candidates = formats.file_names(self.prefix)
         for path in self.path:
             if os.path.isdir(path):
-                for file in sorted(os.listdir(path)):
-                    if file == f"{self.prefix.lower()}.json":
-                        self.config_file = os.path.join(path, file)
-                        self.config_file_type = "json"
-                        return True
-                    elif (
-                        file == f"{self.prefix.lower()}.yaml"
-                        or file == f"{self.prefix.lower()}.yml"
-                    ):
-                        self.config_file = os.path.join(path, file)
-                        self.config_file_type = "yaml"
+                names = set(os.listdir(path))
+                for name, file_format in candidates:
+                    if name in names:
+                        self.config_file = os.path.join(path, name)
+                        self.config_file_type = file_format.name
                         return True
         return False
 
+    def parse_task(self) -> Optional[Tuple[Callable, Tuple]]:
+        """
+        Returns a task parsing self.config_file in a worker process, or None if
+        the file is unchanged, missing, or memory-mapped in large_file mode.
+        """
+        if not self._set_config_file():
+            return None
+        if self.large_file and self.config_file_type == "json":
+            return None
+        signature = self._changed_signature()
+        if signature is None:
+            return None
+        self._pending_signature = signature
+        file_format = formats.FORMATS[self.config_file_type]  # type: ignore
+        return formats.parse_file, (self.config_file, file_format.parse)
+
+    def apply_parsed(self, result: Any) -> bool:
+        """
+        Stores the data parsed by the task returned by parse_task().
+
+        :param result: parsed contents of self.config_file
+        """
+        self._set_data(result, self._pending_signature)
+        return True
+
     def update(self) -> bool:
         """
         Updates self._data from the contents of self.config_file.
@@ -90,8 +168,16 @@ class FilesystemProvider(ConfigProviderBase):
         return False
 
     @property
-    def dict(self) -> dict:
+    def dict(self) -> Mapping:
         """
-        Returns the configuration dictionary from self._data.
+        Returns the configuration dictionary from self._data. In large_file
+        mode, this is a LazyJSONObject that parses each section on first access.
         """
         return self._data
+
+    @property
+    def revision(self) -> int:
+        """
+        Returns a counter that is incremented each time the config file is read.
+        """
+        return self._revision
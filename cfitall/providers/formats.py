@@ -0,0 +1,187 @@
+"""
+The formats module holds the registry of configuration file formats understood
+by the FilesystemProvider: json, yaml, toml and dotenv. Further formats can be
+added with register_format().
+"""
+
+import json
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+import yaml
+
+try:
+    import tomllib
+except ImportError:  # pragma: no cover
+    try:
+        import tomli as tomllib  # type: ignore
+    except ImportError:
+        tomllib = None  # type: ignore
+
+#: safe yaml loader, using libyaml if PyYAML was built with it
+SafeLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# escape sequences recognized in double-quoted dotenv values
+_DOTENV_ESCAPES = {"n": "\n", "r": "\r", "t": "\t", '"': '"', "\\": "\\", "$": "$"}
+
+
+class FileFormat:
+    #: name of the format, e.g. "yaml"
+    name: str
+    #: file extensions of the format, in order of preference, e.g. ("yaml", "yml")
+    extensions: Tuple[str, ...]
+
+    def __init__(
+        self, name: str, extensions: Iterable[str], parse: Callable[[str], Any]
+    ) -> None:
+        """
+        A FileFormat describes how to find and parse configuration files of one
+        format.
+
+        :param name: name of the format, e.g. "yaml"
+        :param extensions: file extensions of the format, e.g. ["yaml", "yml"]
+        :param parse: function parsing the contents of a file into a dict
+        """
+        self.name = name
+        self.extensions = tuple(extensions)
+        self.parse = parse
+
+    def __repr__(self) -> str:
+        return f"<FileFormat {self.name}>"
+
+
+#: registered file formats by name, in order of precedence
+FORMATS: Dict[str, FileFormat] = {}
+
+
+def register_format(
+    name: str, extensions: Iterable[str], parse: Callable[[str], Any]
+) -> FileFormat:
+    """
+    Registers (or replaces) a file format. If a directory contains files of
+    several formats, the format registered first is used.
+
+    :param name: name of the format, e.g. "ini"
+    :param extensions: file extensions of the format, e.g. ["ini", "cfg"]
+    :param parse: function parsing the contents of a file into a dict
+    """
+    file_format = FileFormat(name, extensions, parse)
+    FORMATS[name] = file_format
+    return file_format
+
+
+def file_names(prefix: str) -> List[Tuple[str, FileFormat]]:
+    """
+    Returns the file names of all registered formats for prefix, with their
+    formats, in order of precedence, e.g. [("myapp.json", <FileFormat json>)].
+
+    :param prefix: base name of the configuration file
+    """
+    prefix = prefix.lower()
+    return [
+        (f"{prefix}.{extension}", file_format)
+        for file_format in FORMATS.values()
+        for extension in file_format.extensions
+    ]
+
+
+def parse_file(path: str, parse: Callable[[str], Any]) -> Any:
+    """
+    Reads a (utf-8 encoded) file and parses its contents. This is the task
+    that FilesystemProvider runs in worker processes.
+
+    :param path: path of the file to parse
+    :param parse: function parsing the contents of the file
+    """
+    with open(path, "r", encoding="utf-8") as file_:
+        return parse(file_.read())
+
+
+def parse_yaml(text: str) -> Any:
+    """
+    Parses a yaml document safely, using libyaml if PyYAML was built with it.
+
+    :param text: contents of a yaml file
+    """
+    return yaml.load(text, Loader=SafeLoader)
+
+
+def parse_toml(text: str) -> Dict[str, Any]:
+    """
+    Parses a toml document, using tomllib (or tomli on python < 3.11).
+
+    :param text: contents of a toml file
+    """
+    if tomllib is None:
+        raise ImportError("parsing toml requires tomli on python < 3.11")
+    return tomllib.loads(text)
+
+
+def parse_dotenv(text: str) -> Dict[str, Any]:
+    """
+    Parses a dotenv file into a nested dict, in a single pass over its lines.
+    Each line holds a ``KEY=value`` assignment (optionally preceded by
+    ``export``); blank lines and lines starting with ``#`` are skipped. Values
+    may be single-quoted (literal), double-quoted (with backslash escapes and
+    continuing across lines) or unquoted (up to a `` #`` comment). Keys are
+    lowercased, and ``__`` separates levels as in the EnvironmentProvider, so
+    ``DB__HOST=localhost`` is read as ``{"db": {"host": "localhost"}}``.
+
+    :param text: contents of a dotenv file
+    """
+    data: Dict[str, Any] = {}
+    lines = iter(text.splitlines())
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        if line.startswith("export "):
+            line = line[7:].lstrip()
+        key, equals, value = line.partition("=")
+        key = key.strip()
+        if not equals or not key:
+            raise ValueError(f"line {number}: expected KEY=value")
+        value = value.strip()
+        if value[:1] == "'":
+            end = value.find("'", 1)
+            if end < 0:
+                raise ValueError(f"line {number}: unterminated quote")
+            value = value[1:end]
+        elif value[:1] == '"':
+            chars: List[str] = []
+            position = 1
+            while True:
+                if position >= len(value):
+                    next_line = next(lines, None)
+                    if next_line is None:
+                        raise ValueError(f"line {number}: unterminated quote")
+                    chars.append("\n")
+                    value, position = next_line, 0
+                    continue
+                char = value[position]
+                if char == '"':
+                    break
+                if char == "\\" and position + 1 < len(value):
+                    position += 1
+                    char = _DOTENV_ESCAPES.get(value[position], "\\" + value[position])
+                chars.append(char)
+                position += 1
+            value = "".join(chars)
+        else:
+            comment = value.find(" #")
+            if comment >= 0:
+                value = value[:comment].rstrip()
+        section = data
+        *parents, name = key.lower().split("__")
+        for parent in parents:
+            child = section.get(parent)
+            if not isinstance(child, dict):
+                child = section[parent] = {}
+            section = child
+        section[name] = value
+    return data
+
+
+register_format("json", ["json"], json.loads)
+register_format("yaml", ["yaml", "yml"], parse_yaml)
+register_format("toml", ["toml"], parse_toml)
+register_format("dotenv", ["env"], parse_dotenv)
@@ -0,0 +1,183 @@
+"""
+implements an HttpProvider for reading configs from an http(s) endpoint
+"""
+
+import http.client
+import json
+import logging
+import random
+import time
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import yaml
+
+from cfitall.providers.base import ConfigProviderBase
+
+logger = logging.getLogger(__name__)
+
+
+class HttpProvider(ConfigProviderBase):
+    #: url of the configuration document
+    url: str
+    #: socket timeout in seconds
+    timeout: float
+    #: seconds to wait after the first failure, doubling on each further failure
+    backoff_base: float
+    #: maximum seconds to wait between attempts after failures
+    backoff_max: float
+
+    def __init__(
+        self,
+        url: str,
+        provider_name: str = "http",
+        headers: Optional[Dict[str, str]] = None,
+        timeout: float = 10.0,
+        backoff_base: float = 1.0,
+        backoff_max: float = 300.0,
+    ) -> None:
+        """
+        HttpProvider reads a json or yaml configuration document from an http or
+        https url. It keeps a persistent (keep-alive) connection to the server
+        and makes conditional requests using the ETag and Last-Modified headers
+        of the previous response, so that an unchanged document is neither
+        downloaded nor parsed again.
+
+        After a failed update, further updates are skipped (and return False)
+        for an exponentially increasing, randomly jittered delay.
+
+        :param url: url of the configuration document
+        :param provider_name: friendly name for the provider ("http")
+        :param headers: extra headers to send with each request, e.g. for auth
+        :param timeout: socket timeout in seconds (10.0)
+        :param backoff_base: delay in seconds after the first failure (1.0)
+        :param backoff_max: maximum delay in seconds between attempts (300.0)
+        """
+        self.url = url
+        self.provider_name = provider_name
+        self.headers = headers or {}
+        self.timeout = timeout
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.etag: Optional[str] = None
+        self.last_modified: Optional[str] = None
+        self.failures = 0
+        self._data: dict = {}
+        self._revision: int = 0
+        self._retry_at: float = 0.0
+        self._connection: Optional[http.client.HTTPConnection] = None
+
+    def close(self) -> None:
+        """
+        Closes the provider's connection to the server, if any.
+        """
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def _connect(self) -> http.client.HTTPConnection:
+        """
+        Returns the provider's connection, creating it if necessary.
+        """
+        if self._connection is None:
+            parts = urlsplit(self.url)
+            if parts.scheme == "https":
+                self._connection = http.client.HTTPSConnection(
+                    parts.netloc, timeout=self.timeout
+                )
+            elif parts.scheme == "http":
+                self._connection = http.client.HTTPConnection(
+                    parts.netloc, timeout=self.timeout
+                )
+            else:
+                raise ValueError(f"unsupported url scheme: {self.url}")
+        return self._connection
+
+    def _fetch(self) -> http.client.HTTPResponse:
+        """
+        Sends a conditional GET request for the document and returns the
+        response, reconnecting once if a kept-alive connection was dropped.
+        """
+        parts = urlsplit(self.url)
+        path = parts.path or "/"
+        if parts.query:
+            path = f"{path}?{parts.query}"
+        headers = {"Accept": "application/json, application/yaml", **self.headers}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        try:
+            connection = self._connect()
+            connection.request("GET", path, headers=headers)
+            return connection.getresponse()
+        except (http.client.RemoteDisconnected, ConnectionError):
+            # the server may have closed an idle keep-alive connection
+            self.close()
+        connection = self._connect()
+        connection.request("GET", path, headers=headers)
+        return connection.getresponse()
+
+    def _parse(self, body: bytes, content_type: str) -> dict:
+        """
+        Parses a response body as yaml or json, depending on its content type.
+        """
+        if "yaml" in content_type or "yml" in content_type:
+            data = yaml.safe_load(body)
+        else:
+            data = json.loads(body)
+        if not isinstance(data, dict):
+            raise ValueError(f"{self.url} did not return a mapping")
+        return {key.lower(): value for key, value in data.items()}
+
+    def _backoff(self) -> None:
+        """
+        Records a failure and schedules the next attempt after a jittered
+        exponential delay.
+        """
+        self.failures += 1
+        delay = min(self.backoff_max, self.backoff_base * 2 ** (self.failures - 1))
+        self._retry_at = time.monotonic() + random.uniform(0, delay)
+
+    def update(self) -> bool:
+        """
+        Fetches the configuration document if it has changed since the last
+        successful update. Returns False if the request fails, or if updates
+        are being skipped while backing off from earlier failures.
+        """
+        if time.monotonic() < self._retry_at:
+            return False
+        try:
+            response = self._fetch()
+            body = response.read()
+            if response.status == 200:
+                self._data = self._parse(body, response.getheader("Content-Type", ""))
+                self.etag = response.getheader("ETag")
+                self.last_modified = response.getheader("Last-Modified")
+                self._revision += 1
+            elif response.status != 304:
+                raise ValueError(f"unexpected status {response.status}")
+            if response.will_close:
+                self.close()
+        except Exception as ex:
+            logger.error(f"error fetching {self.url}: {ex}")
+            self.close()
+            self._backoff()
+            return False
+        self.failures = 0
+        self._retry_at = 0.0
+        return True
+
+    @property
+    def dict(self) -> dict:
+        """
+        Returns the configuration dictionary from the last successful update.
+        """
+        return self._data
+
+    @property
+    def revision(self) -> int:
+        """
+        Returns a counter that is incremented each time a new document is parsed.
+        """
+        return self._revision
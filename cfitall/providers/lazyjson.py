@@ -0,0 +1,120 @@
+"""
+implements a LazyJSONObject for reading very large json files section by section
+"""
+
+from collections.abc import Mapping
+import json
+import mmap
+import re
+import threading
+from typing import Any, Dict, Iterator, Tuple, Union
+
+_STRING = rb'"[^"\\]*(?:\\.[^"\\]*)*"'
+_NESTED = rb"[{\[](?:[^\"{}\[\]]|" + _STRING + rb")*[}\]]"
+for _ in range(4):
+    _NESTED = rb"[{\[](?:[^\"{}\[\]]|" + _STRING + rb"|" + _NESTED + rb")*[}\]]"
+
+#: matches the opening brace of the top-level object
+_OPEN = re.compile(rb"\s*\{")
+#: matches an object key and its colon, or the end of the object
+_KEY = re.compile(rb"\s*(?:(" + _STRING + rb")\s*:|(\}))")
+#: matches a value up to the next top-level comma or closing brace, stopping
+#: early at containers nested more than five levels deep
+_VALUE = re.compile(rb"(?:[^\"{}\[\],]|" + _STRING + rb"|" + _NESTED + rb")*")
+#: matches the separator following a value
+_SEPARATOR = re.compile(rb"\s*([,}])")
+#: matches a json string or a bracket, skipping everything in between
+_TOKEN = re.compile(_STRING + rb"|[{}\[\]]")
+
+
+class LazyJSONObject(Mapping):
+    def __init__(self, path: str) -> None:
+        """
+        LazyJSONObject memory-maps a json file whose top-level value is an
+        object, and indexes the byte offsets of each top-level value in a
+        single scan. Each value is only parsed the first time its key is
+        accessed, and then cached. Top-level keys are lowercased.
+
+        The file is mapped read-only; replace it atomically (e.g. by renaming a
+        new file over it) rather than rewriting it in place.
+
+        :param path: path of the json file to map
+        """
+        self.path = path
+        with open(path, "rb") as file_:
+            self._buffer: Union[mmap.mmap, bytes] = b""
+            if file_.seek(0, 2):
+                self._buffer = mmap.mmap(file_.fileno(), 0, access=mmap.ACCESS_READ)
+        self._index: Dict[str, Tuple[int, int]] = self._scan()
+        self._sections: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return self._sections[key]
+        except KeyError:
+            start, end = self._index[key]
+        with self._lock:
+            if key not in self._sections:
+                raw = self._buffer[start:end].strip()
+                if raw.endswith(b","):
+                    raw = raw[:-1]
+                self._sections[key] = json.loads(raw)
+            return self._sections[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._index)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __repr__(self) -> str:
+        return (
+            f"<LazyJSONObject {self.path} ({len(self._sections)}/{len(self)} parsed)>"
+        )
+
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        """
+        Scans the buffer once, returning the (start, end) offsets of each
+        top-level value keyed by its lowercased key.
+        """
+        buffer = self._buffer
+        if not (match := _OPEN.match(buffer)):
+            raise ValueError(f"{self.path} does not contain a json object")
+        index: Dict[str, Tuple[int, int]] = {}
+        pos = match.end()
+        while True:
+            if not (match := _KEY.match(buffer, pos)):
+                raise ValueError(f"{self.path}: expected a key at offset {pos}")
+            if match.group(2):
+                return index
+            key = json.loads(match.group(1)).lower()
+            start = end = match.end()
+            while True:
+                end = _VALUE.match(buffer, end).end()  # type: ignore
+                if buffer[end : end + 1] in (b"{", b"["):
+                    end = self._skip_container(end)
+                else:
+                    break
+            index[key] = (start, end)
+            if not (match := _SEPARATOR.match(buffer, end)):
+                raise ValueError(f"{self.path}: unterminated value at offset {end}")
+            if match.group(1) == b"}":
+                return index
+            pos = match.end()
+
+    def _skip_container(self, pos: int) -> int:
+        """
+        Returns the offset just past the end of the (deeply nested) object or
+        array starting at pos.
+        """
+        depth = 0
+        for match in _TOKEN.finditer(self._buffer, pos):
+            token = match.group()
+            if token in (b"{", b"["):
+                depth += 1
+            elif token in (b"}", b"]"):
+                depth -= 1
+                if depth == 0:
+                    return match.end()
+        raise ValueError(f"{self.path}: unterminated value at offset {pos}")
@@ -0,0 +1,219 @@
+"""
+implements a SQLiteProvider for reading configs from a sqlite database
+"""
+
+import json
+import logging
+import re
+import sqlite3
+import threading
+from typing import Any, Dict, Optional
+
+from cfitall import utils
+from cfitall.providers.base import ConfigProviderBase
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS {table} (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    version INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS {table}_version_idx ON {table} (version);
+CREATE TABLE IF NOT EXISTS {table}_deleted (
+    key TEXT PRIMARY KEY,
+    version INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS {table}_version (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    version INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO {table}_version VALUES (0, 0);
+CREATE TRIGGER IF NOT EXISTS {table}_insert AFTER INSERT ON {table} BEGIN
+    UPDATE {table}_version SET version = version + 1;
+    UPDATE {table} SET version = (SELECT version FROM {table}_version)
+        WHERE key = NEW.key;
+    DELETE FROM {table}_deleted WHERE key = NEW.key;
+END;
+CREATE TRIGGER IF NOT EXISTS {table}_update AFTER UPDATE OF key, value ON {table}
+BEGIN
+    UPDATE {table}_version SET version = version + 1;
+    UPDATE {table} SET version = (SELECT version FROM {table}_version)
+        WHERE key = NEW.key;
+    INSERT OR REPLACE INTO {table}_deleted (key, version)
+        SELECT OLD.key, version FROM {table}_version WHERE OLD.key != NEW.key;
+    DELETE FROM {table}_deleted WHERE key = NEW.key;
+END;
+CREATE TRIGGER IF NOT EXISTS {table}_delete AFTER DELETE ON {table} BEGIN
+    UPDATE {table}_version SET version = version + 1;
+    INSERT OR REPLACE INTO {table}_deleted (key, version)
+        SELECT OLD.key, version FROM {table}_version;
+END;
+"""
+
+
+class SQLiteProvider(ConfigProviderBase):
+    #: path of the sqlite database
+    path: str
+    #: name of the table holding configuration keys and values
+    table: str
+
+    def __init__(
+        self, path: str, table: str = "cfitall", provider_name: str = "sqlite"
+    ) -> None:
+        """
+        SQLiteProvider reads configuration values from a sqlite database, which
+        stores one row per flattened (dotted) configuration key. Values are
+        stored as json, e.g. ``INSERT INTO cfitall (key, value) VALUES
+        ('db.port', '5432')``; values that are not valid json are read as
+        plain strings. The provider creates the table (and the triggers it uses
+        to track changes) if it does not exist.
+
+        update() checks ``PRAGMA data_version`` to find out whether another
+        connection has written to the database, and then only reads the rows
+        that were inserted, updated or deleted since the previous update.
+
+        :param path: path of the sqlite database
+        :param table: name of the configuration table ("cfitall")
+        :param provider_name: friendly name for the provider ("sqlite")
+        """
+        if not re.fullmatch(r"[A-Za-z_][A-Za-z0-9_]*", table):
+            raise ValueError(f"invalid table name: {table}")
+        self.path = path
+        self.table = table
+        self.provider_name = provider_name
+        self._connection: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._data_version: Optional[int] = None
+        self._version = 0
+        self._flattened: Dict[str, Any] = {}
+        self._data: Optional[dict] = {}
+        self._revision: int = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        """
+        Returns the provider's connection, creating it (and the schema) if
+        necessary.
+        """
+        if self._connection is None:
+            connection = sqlite3.connect(self.path, check_same_thread=False)
+            with connection:
+                connection.executescript(_SCHEMA.format(table=self.table))
+            self._connection = connection
+        return self._connection
+
+    @staticmethod
+    def _decode(value: str) -> Any:
+        """
+        Decodes a stored value from json, or returns it as-is if it isn't json.
+        """
+        try:
+            return json.loads(value)
+        except ValueError:
+            return value
+
+    def close(self) -> None:
+        """
+        Closes the provider's database connection, if any.
+        """
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+                self._data_version = None
+
+    def get(self, config_key: str) -> Any:
+        """
+        Looks up a single flattened key in the database (by its primary key),
+        returning None if it is not set.
+
+        :param config_key: dotted configuration key
+        """
+        query = f"SELECT value FROM {self.table} WHERE key = ?"
+        with self._lock:
+            row = self._connect().execute(query, (config_key,)).fetchone()
+        return None if row is None else self._decode(row[0])
+
+    def get_prefix(self, prefix: str) -> Dict[str, Any]:
+        """
+        Looks up all flattened keys below a dotted prefix in the database (as a
+        range scan over its primary key index), returning a flattened dict.
+
+        :param prefix: dotted key prefix, e.g. "db" for "db.host" and "db.port"
+        """
+        # "/" sorts immediately after "." so this range covers f"{prefix}.*"
+        query = f"SELECT key, value FROM {self.table} WHERE key > ? AND key < ?"
+        with self._lock:
+            rows = self._connect().execute(query, (f"{prefix}.", f"{prefix}/"))
+            return {key: self._decode(value) for key, value in rows}
+
+    def update(self) -> bool:
+        """
+        Reads the rows that changed since the last update, if the database has
+        been written to since then. Returns False if it cannot be read.
+        """
+        try:
+            with self._lock:
+                connection = self._connect()
+                data_version = connection.execute("PRAGMA data_version").fetchone()[0]
+                if data_version == self._data_version:
+                    return True
+                self._reload(connection)
+                self._data_version = data_version
+        except sqlite3.Error as ex:
+            logger.error(f"error reading {self.path}: {ex}")
+            return False
+        return True
+
+    def _reload(self, connection: sqlite3.Connection) -> None:
+        """
+        Applies rows changed (or deleted) since self._version to the provider's
+        flattened data, re-reading everything if the version went backwards.
+        """
+        table = self.table
+        connection.execute("BEGIN")  # read everything from a single snapshot
+        try:
+            version = connection.execute(
+                f"SELECT version FROM {table}_version"
+            ).fetchone()[0]
+            if version == self._version:
+                return
+            if version < self._version:
+                self._flattened = {}
+                self._version = 0
+            changed = connection.execute(
+                f"SELECT key, value FROM {table} WHERE version > ?", (self._version,)
+            ).fetchall()
+            deleted = connection.execute(
+                f"SELECT key FROM {table}_deleted WHERE version > ?", (self._version,)
+            ).fetchall()
+        finally:
+            connection.rollback()
+        flattened = dict(self._flattened)
+        for (key,) in deleted:
+            flattened.pop(key, None)
+        for key, value in changed:
+            flattened[key] = self._decode(value)
+        self._flattened = flattened
+        self._version = version
+        self._data = None
+        self._revision += 1
+
+    @property
+    def dict(self) -> dict:
+        """
+        Returns the configuration dictionary, expanding it from the flattened
+        rows the first time it is requested after a change.
+        """
+        data = self._data
+        if data is None:
+            data = self._data = utils.expand_mixed_dict(self._flattened)
+        return data
+
+    @property
+    def revision(self) -> int:
+        """
+        Returns a counter that is incremented each time changed rows are read.
+        """
+        return self._revision
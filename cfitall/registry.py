@@ -3,19 +3,35 @@ The registry module implements the ConfigurationRegistry, the core structure
 and entry point for cfitall.
 """
 
+from collections.abc import Mapping
+from contextlib import contextmanager
+from contextvars import ContextVar
 from decimal import Decimal
 import logging
-import json
-from typing import Union, Dict, List, Optional
+from typing import IO, Any, Union, Dict, Hashable, Iterator, List, Optional, Set, Tuple
 import os
+import sys
+import threading
+import time
 
-import yaml
 
-from cfitall import utils, ConfigValueType
+from cfitall import serialize, utils, ConfigValueType
+from cfitall.frozen import FrozenConfig, FrozenError
+from cfitall.interpolation import Interpolator, has_references, references
 from cfitall.manager import ProviderManager
+from cfitall.profiler import AccessProfiler
 from cfitall.providers.base import ConfigProviderBase
 from cfitall.providers.environment import EnvironmentProvider
 from cfitall.providers.filesystem import FilesystemProvider
+from cfitall.schema import Schema, ValidationError
+from cfitall.snapshot import (
+    CompactSnapshot,
+    ConfigDiff,
+    ConfigSnapshot,
+    OverlayIndex,
+    OverlaySnapshot,
+)
+from cfitall.trie import KeyTrie
 
 logger = logging.getLogger(__name__)
 
@@ -23,29 +39,85 @@ logger = logging.getLogger(__name__)
 class ConfigurationRegistry(object):
     #: The providers attribute holds the ProviderManager instance for the Registry.
     providers: ProviderManager
-    #: Dictionary containing defaults and overrides: ``{"defaults": {}, "super": {}}``
-    values: Dict
+    #: Whether the registry stores its merged configuration compactly.
+    compact: bool
+    #: Schema the merged configuration is validated against, if any.
+    schema: Optional[Schema]
+    #: ValidationError of the latest configuration, if it was rejected.
+    validation_error: Optional[ValidationError]
+    #: Interpolator resolving references in the configuration, if enabled.
+    interpolator: Optional[Interpolator]
+    #: AccessProfiler recording reads and merges, if profiling.
+    profiler: Optional[AccessProfiler]
 
     def __init__(
         self,
         name: str,
         defaults: Optional[Dict] = None,
         providers: Optional[List[ConfigProviderBase]] = None,
+        compact: bool = False,
+        schema: Optional[Schema] = None,
+        interpolate: bool = False,
+        cast_environment: bool = False,
     ) -> None:
         """
         The configuration registry holds configuration data from different sources
         and reconciles it for retrieval. If the defaults dict is provided, it
         will be used to seed the default configuration values for the registry,
         equivalent to calling set_default() for each configuration key in defaults.
+        If cast_environment is True, environment providers without defaults of
+        their own cast variables to the types of the registry's current
+        defaults (see EnvironmentProvider).
+
+        If compact is True, the registry trades some lookup speed for memory,
+        which helps with very large configurations: keys of the merged
+        configuration are interned, and the flattened dict is a view computed
+        from the nested one rather than a copy of it (see CompactSnapshot).
+
+        If a schema is given, each new merged configuration is validated (and
+        its values coerced to their declared types) once, when it is built, and
+        values passed to set() and friends are validated before they are
+        applied. If a configuration fails validation, for instance after a
+        provider reads an invalid file, the registry logs the errors, keeps
+        serving the last valid configuration and sets validation_error; if the
+        very first configuration is invalid, ValidationError is raised.
+
+        If interpolate is True, references in string values, such as
+        ``${db.host}`` or ``${ENV:HOME}``, are resolved once per merged
+        configuration, before it is validated (see Interpolator). Values that
+        cannot be resolved are rejected like invalid ones, with an
+        InterpolationError.
 
         :param name: namespace for configuration registry
         :param defaults: default configuration values
         :param providers: providers to add to the registry
+        :param compact: store the merged configuration compactly (False)
+        :param schema: schema to validate the configuration against (None)
+        :param interpolate: resolve references in configuration values (False)
+        :param cast_environment: cast environment variables to the types of
+            the defaults (False)
         """
         if not defaults:
             defaults = {}
         self.name = name
-        self.values = {"super": {}, "defaults": defaults}
+        self.compact = compact
+        self.schema = schema
+        self.validation_error: Optional[ValidationError] = None
+        self.interpolator = Interpolator() if interpolate else None
+        self.profiler: Optional[AccessProfiler] = None
+        self._frozen: Optional[FrozenConfig] = None
+        self._values = {"super": {}, "defaults": defaults}
+        self._generation = 0
+        self._lock = threading.RLock()
+        self._snapshot: Optional[ConfigSnapshot] = None
+        self._rejected_key: Optional[Hashable] = None
+        self._activated: Dict[ConfigProviderBase, Set[str]] = {}
+        self._sections: Dict[
+            Hashable, Tuple[List[Tuple[str, Any]], Any, List[Hashable]]
+        ] = {}
+        self._overrides: ContextVar[Optional[Dict]] = ContextVar(
+            f"cfitall_overrides_{name}", default=None
+        )
         if providers is not None:
             self.providers = ProviderManager(providers=providers)
         else:
@@ -55,6 +127,28 @@ class ConfigurationRegistry(object):
                 path.insert(0, os.path.join(home, ".local", "etc", name))
             self.providers.register(FilesystemProvider(path, name))
             self.providers.register(EnvironmentProvider(name))
+        if cast_environment:
+            for provider in self.providers:
+                if isinstance(provider, EnvironmentProvider):
+                    if provider.defaults is None:
+                        provider.defaults = self
+
+    @property
+    def defaults(self) -> Dict:
+        """
+        Returns the registry's current defaults as a nested dict, which must not
+        be modified; use set_default() to change them.
+        """
+        return self._values["defaults"]
+
+    @property
+    def values(self) -> Dict:
+        """
+        Returns the dictionary containing defaults and overrides:
+        ``{"defaults": {}, "super": {}}``, which must not be modified; use
+        set(), set_default() and friends to change them.
+        """
+        return self._values
 
     @property
     def all(self) -> Dict:
@@ -62,13 +156,15 @@ class ConfigurationRegistry(object):
         Returns a dictionary of all the configuration data that is considered
         for merging, before it is merged into the final configuration.
         """
-        values = self.values.copy()
-        for provider_name in self.providers.ordering:
+        self._activate()
+        values: Dict[str, Mapping] = dict(self._values)
+        for provider in self.providers:
             try:
-                if provider := self.providers.get(provider_name):
-                    values[provider.provider_name] = provider.dict
+                values[provider.provider_name] = provider.dict
             except (KeyError, ValueError):
-                logger.error(f"error reading values from provider {provider_name}")
+                logger.error(
+                    f"error reading values from provider {provider.provider_name}"
+                )
         return values
 
     @property
@@ -85,7 +181,7 @@ class ConfigurationRegistry(object):
         """
         Returns a dict of merged configuration data
         """
-        return self._merge_configs()
+        return utils.merge_dicts(self._merged(), {})
 
     @property
     def env_vars(self) -> List[str]:
@@ -108,21 +204,137 @@ class ConfigurationRegistry(object):
         condensing hierarchies into dotted paths and returning simple
         key-value pairs.
         """
-        return utils.flatten_dict(self.dict)
+        if self._overrides.get():
+            return utils.flatten_dict(self._merged())
+        self._activate()
+        return dict(self._get_snapshot().flattened)
+
+    @property
+    def frozen(self) -> bool:
+        """
+        Returns whether the registry has been frozen with freeze().
+        """
+        return self._frozen is not None
+
+    @property
+    def generation(self) -> int:
+        """
+        Returns a counter that is incremented each time the registry's values
+        are changed or an update changes its providers' data.
+        """
+        return self._generation
 
     @property
     def json(self) -> str:
         """
         Returns json representation of merged configuration.
         """
-        return json.dumps(self.dict, indent=4, sort_keys=True)
+        if self._overrides.get():
+            return serialize.dumps(self._merged(), "json")
+        return self.snapshot().serialize("json")
 
     @property
     def yaml(self) -> str:
         """
         Returns yaml representation of merged configuration.
         """
-        return yaml.dump(self.dict)
+        if self._overrides.get():
+            return serialize.dumps(self._merged(), "yaml")
+        return self.snapshot().serialize("yaml")
+
+    def diff(
+        self, old: ConfigSnapshot, new: Optional[ConfigSnapshot] = None
+    ) -> ConfigDiff:
+        """
+        Returns the dotted keys added, removed and changed between an older
+        snapshot (from snapshot()) and a newer one, or the current
+        configuration. The cost of a diff follows the size of the sections
+        that changed, not the size of the configuration.
+
+        ::
+
+            before = cf.snapshot()
+            cf.update()
+            for key, (old, new) in cf.diff(before).changed.items():
+                logger.info(f"{key} changed from {old} to {new}")
+        """
+        return (new or self.snapshot()).diff(old)
+
+    def dump(self, fp: IO, format: str = "json", indent: Optional[int] = 4) -> None:
+        """
+        Writes the merged configuration to a text or binary file object (e.g. a
+        file or socket) as json or yaml. If the json or yaml property of the
+        current configuration has already been computed, it is written as-is;
+        otherwise the configuration is serialized straight to fp, piece by
+        piece, without building the whole document in memory first (see
+        cfitall.serialize.dump()).
+
+        :param fp: text or binary file object to write to
+        :param format: "json" or "yaml" ("json")
+        :param indent: json indentation, or None for compact json (4)
+        """
+        if self._overrides.get():
+            serialize.dump(self._merged(), fp, format, indent)
+            return
+        self.snapshot().dump(fp, format, indent)
+
+    def explain(self, config_key: str) -> Union[str, None]:
+        """
+        Returns the name of the layer that supplied the value of config_key (a
+        dotted path key): "defaults", the name of a provider, "super" for values
+        set with set(), or "override" for temporary overrides; returns None if
+        config_key is not set.
+        """
+        if overrides := self._overrides.get():
+            if config_key in overrides:
+                return "override"
+            if utils.is_shadowed(config_key, overrides):
+                return None
+        if isinstance(config_key, str):
+            self._activate(config_key.split(".", 1)[0])
+        return self._get_snapshot().explain(config_key)
+
+    def find(self, pattern: str) -> Dict[str, ConfigValueType]:
+        """
+        Find configuration values whose dotted path keys match pattern, where a
+        ``*`` segment matches any single key and a ``**`` segment matches any
+        number of keys, e.g. ``services.*.url`` or ``queues.**.timeout``.
+        Returns a dict of matching keys and their values, sorted by key.
+        """
+        namespace = pattern.split(".", 1)[0]
+        self._activate(None if namespace in ("*", "**") else namespace)
+        if self._overrides.get():
+            flattened = self.flattened
+            trie = KeyTrie(flattened)
+        else:
+            snapshot = self._get_snapshot()
+            flattened, trie = snapshot.flattened, snapshot.trie
+        return {key: flattened[key] for key in trie.match(pattern)}
+
+    def freeze(self) -> None:
+        """
+        Freezes the registry for services that load their configuration once:
+        loads all lazy providers, merges the configuration one last time and
+        compiles it into lookup tables (see FrozenConfig), so that get() and
+        its typed variants are served by single dict lookups. Afterwards,
+        setting values, updating providers and overriding values raise
+        FrozenError.
+        """
+        with self._lock:
+            if self._frozen is not None:
+                return
+            self._activate()
+            frozen = FrozenConfig(self._get_snapshot())
+            self._frozen = frozen
+            # shadow the accessors with the tables' own, skipping the live path
+            self.get = frozen.get  # type: ignore
+            self.get_bool = frozen.get_bool  # type: ignore
+            self.get_decimal = frozen.get_decimal  # type: ignore
+            self.get_float = frozen.get_float  # type: ignore
+            self.get_int = frozen.get_int  # type: ignore
+            self.get_list = frozen.get_list  # type: ignore
+            self.get_section = frozen.get_section  # type: ignore
+            self.get_string = frozen.get_string  # type: ignore
 
     def get(self, config_key: str) -> Union[ConfigValueType, None]:
         """
@@ -130,7 +342,7 @@ class ConfigurationRegistry(object):
         value as its native type stored in the registry.
         """
         try:
-            return self.flattened[config_key]
+            return self._lookup(config_key)
         except (KeyError, TypeError):
             return None
 
@@ -140,7 +352,7 @@ class ConfigurationRegistry(object):
         the requested value as a boolean or raises TypeError.
         """
         try:
-            return bool(self.flattened[config_key])
+            return bool(self._lookup(config_key))
         except KeyError:
             return None
 
@@ -150,7 +362,8 @@ class ConfigurationRegistry(object):
         the requested value as a Decimal or raises TypeError.
         """
         try:
-            return Decimal(self.flattened[config_key])
+            value: Any = self._lookup(config_key)
+            return Decimal(value)
         except KeyError:
             return None
 
@@ -160,7 +373,8 @@ class ConfigurationRegistry(object):
         the requested value as a float or raises TypeError.
         """
         try:
-            return float(self.flattened[config_key])
+            value: Any = self._lookup(config_key)
+            return float(value)
         except KeyError:
             return None
 
@@ -170,7 +384,8 @@ class ConfigurationRegistry(object):
         the requested value as an int or raises TypeError.
         """
         try:
-            return int(self.flattened[config_key])
+            value: Any = self._lookup(config_key)
+            return int(value)
         except KeyError:
             return None
 
@@ -181,7 +396,7 @@ class ConfigurationRegistry(object):
         (default), split value on commas.
         """
         try:
-            value = self.flattened[config_key]
+            value: Any = self._lookup(config_key)
             if type(value) != list and csv is True:
                 split = value.split(",")
                 return [val.strip() for val in split]
@@ -189,24 +404,97 @@ class ConfigurationRegistry(object):
         except KeyError:
             return None
 
+    def get_section(self, config_key: str) -> Union[Dict, None]:
+        """
+        Get the configuration values below a dotted path key as a nested dict,
+        e.g. ``{"host": ..., "port": ...}`` for ``db``; returns None if
+        config_key is not set or is not a section.
+        """
+        if self.profiler is not None:
+            self.profiler.record_read(config_key)
+        section = self._merged(config_key)
+        for segment in config_key.split("."):
+            if not isinstance(section, Mapping) or segment not in section:
+                return None
+            section = section[segment]
+        if not isinstance(section, Mapping):
+            return None
+        return utils.merge_dicts(section, {})
+
     def get_string(self, config_key: str) -> Union[str, None]:
         """
         Get a configuration value by its dotted path key; attempts to return
         the requested value as a string or raises TypeError.
         """
         try:
-            return str(self.flattened[config_key])
+            return str(self._lookup(config_key))
         except KeyError:
             return None
 
+    def overlay(self, name: str, values: Optional[Mapping] = None) -> "OverlayRegistry":
+        """
+        Returns a new OverlayRegistry that reads through to this registry and
+        holds only its own values (e.g. per-tenant settings) on top of it.
+
+        :param name: namespace for the overlay registry, e.g. a tenant id
+        :param values: initial values of the overlay, as for set_many()
+        """
+        return OverlayRegistry(self, name, values)
+
+    @contextmanager
+    def override(self, values: Mapping) -> Iterator[None]:
+        """
+        Context manager that overrides the given values (dotted key strings,
+        nested dicts or a mix of both) until the block exits. Overrides take
+        precedence over all other configuration sources, but are only visible
+        to the current thread or asyncio task (and tasks it starts), and do
+        not change the registry's shared configuration. Override blocks nest.
+
+        ::
+
+            with cf.override({"feature.x": True}):
+                assert cf.get("feature.x") is True
+        """
+        if self._frozen is not None:
+            raise FrozenError(f"registry {self.name} is frozen")
+        flattened = utils.flatten_dict(utils.expand_mixed_dict(values))
+        current = self._overrides.get() or {}
+        prefixes = utils.parent_paths(flattened)
+        layer = {
+            key: value
+            for key, value in current.items()
+            if key not in prefixes and not utils.is_shadowed(key, flattened)
+        }
+        layer.update(flattened)
+        token = self._overrides.set(layer)
+        try:
+            yield
+        finally:
+            self._overrides.reset(token)
+
+    @contextmanager
+    def profile(self, sample: int = 1) -> Iterator[AccessProfiler]:
+        """
+        Context manager that profiles the registry's use for the duration of a
+        ``with`` block (see AccessProfiler), yielding the profiler. Profiling
+        can also be left running by assigning an AccessProfiler to the
+        registry's profiler attribute.
+
+        :param sample: record one in this many reads (1)
+        """
+        profiler = AccessProfiler(sample)
+        previous, self.profiler = self.profiler, profiler
+        try:
+            yield profiler
+        finally:
+            self.profiler = previous
+
     def set(self, config_key: str, value: ConfigValueType) -> None:
         """
         Explicitly set config_key (a dotted key string) to value. Values set
         via this method take precedence over all other configuration sources.
         """
-        flat_dict = {config_key: value}
-        expanded = utils.expand_flattened_dict(flat_dict)
-        utils.merge_dicts(expanded, self.values["super"])
+        self.set_many({config_key: value})
 
     def set_default(self, config_key: str, value: ConfigValueType) -> None:
         """
@@ -214,23 +502,604 @@ class ConfigurationRegistry(object):
         Values set via this method will be overridden by any configuration
         provider containing a matching config_key.
         """
-        flat_dict = {config_key: value}
-        expanded = utils.expand_flattened_dict(flat_dict)
-        utils.merge_dicts(expanded, self.values["defaults"])
+        self.set_defaults_many({config_key: value})
+
+    def set_many(self, values: Mapping) -> None:
+        """
+        Explicitly set each key in values (dotted key strings, nested dicts or
+        a mix of both) to its value, as if calling set() for each item in turn.
+        All values are applied at once, producing a single new generation.
+        """
+        self._apply_values("super", values)
+
+    def set_defaults_many(self, values: Mapping) -> None:
+        """
+        Set the default value for each key in values (dotted key strings, nested
+        dicts or a mix of both), as if calling set_default() for each item in
+        turn. All values are applied at once, producing a single new generation.
+        """
+        self._apply_values("defaults", values)
+
+    def snapshot(self) -> ConfigSnapshot:
+        """
+        Returns an immutable snapshot of the registry's current configuration
+        (excluding temporary overrides), for comparing with diff().
+        """
+        self._activate()
+        return self._get_snapshot()
 
     def update(self) -> None:
         """
-        Updates configuration values from all providers.
+        Updates configuration values from all providers, except for lazy
+        providers whose namespaces have not been accessed yet. The generation
+        only changes if a provider reports that its data changed.
+        """
+        if self._frozen is not None:
+            raise FrozenError(f"registry {self.name} is frozen")
+        provider_names = [
+            provider.provider_name for provider in self._active_providers()
+        ]
+        self.providers.update_all(provider_names)
+        if self.providers.consume_dirty(provider_names):
+            with self._lock:
+                self._generation += 1
+
+    def update_provider(self, provider_name: str) -> bool:
+        """
+        Updates configuration values from a single provider, returning True on
+        success. Lazy providers whose namespaces have not been accessed yet are
+        left alone (and count as a success).
+        """
+        if self._frozen is not None:
+            raise FrozenError(f"registry {self.name} is frozen")
+        provider = self.providers.get(provider_name)
+        if provider is not None and provider.namespaces is not None:
+            if provider not in self._activated:
+                return True
+        updated = self.providers.update(provider_name)
+        if self.providers.consume_dirty([provider_name]):
+            with self._lock:
+                self._generation += 1
+        return updated
+
+    def _activate(self, namespace: Optional[str] = None) -> None:
+        """
+        Loads lazy providers serving namespace (or all lazy providers if
+        namespace is None) the first time they are needed, by running their
+        update() method and including the namespace in subsequent merges.
+
+        :param namespace: top-level key about to be accessed
+        """
+        if self._frozen is not None:
+            return
+        for provider in self.providers:
+            if provider.namespaces is None:
+                continue
+            if namespace is None:
+                namespaces = set(provider.namespaces)
+            elif namespace in provider.namespaces:
+                namespaces = {namespace}
+            else:
+                continue
+            if namespaces <= self._activated.get(provider, set()):
+                continue
+            with self._lock:
+                if provider not in self._activated:
+                    if not provider.update():
+                        logger.error(f"provider {provider} failed to update!")
+                    self._activated[provider] = set()
+                self._activated[provider] |= namespaces
+                self._generation += 1
+
+    def _active_providers(self) -> Iterator[ConfigProviderBase]:
+        """
+        Yields registered providers in merge order, skipping lazy providers
+        that have not been activated.
+        """
+        for provider in self.providers:
+            if provider.namespaces is None or provider in self._activated:
+                yield provider
+
+    def _unloaded(self) -> Set[str]:
+        """
+        Returns the namespaces of lazy providers that have not been loaded yet.
+        """
+        unloaded: Set[str] = set()
+        for provider in self.providers:
+            if provider.namespaces is not None:
+                unloaded |= provider.namespaces - self._activated.get(provider, set())
+        return unloaded
+
+    def _apply_values(self, layer: str, values: Mapping) -> None:
         """
-        self.providers.update_all()
+        Expands values into a nested dict and merges it into a copy of the named
+        layer of self.values, replacing the layer once all values are applied.
+        Only the top-level sections touched by values are copied. Raises
+        ValidationError if values do not match the registry's schema. If
+        references are involved, the configuration with values applied is
+        resolved and validated before this returns, and values are not applied
+        if it is invalid. Raises FrozenError if the registry is frozen.
+
+        :param layer: name of the layer to update ("defaults" or "super")
+        :param values: flattened and/or nested values to apply
+        """
+        if self._frozen is not None:
+            raise FrozenError(f"registry {self.name} is frozen")
+        expanded = utils.expand_mixed_dict(values)
+        flattened = utils.flatten_dict(expanded)
+        interpolate = self.interpolator is not None and (
+            bool(self.interpolator.templates)
+            or any(has_references(value) for value in flattened.values())
+        )
+        if self.schema is not None:
+            checked = flattened
+            if self.interpolator is not None:
+                checked = {
+                    key: value
+                    for key, value in flattened.items()
+                    if not has_references(value)
+                }
+            coerced = self.schema.validate(checked, partial=True)
+            if coerced:
+                expanded = utils.expand_flattened_dict({**flattened, **coerced})
+        with self._lock:
+            previous = self._values[layer]
+            updated = dict(previous)
+            for key, value in expanded.items():
+                current = updated.get(key)
+                if isinstance(current, Mapping) and isinstance(value, Mapping):
+                    value = utils.merge_dicts(value, utils.merge_dicts(current, {}))
+                updated[key] = value
+            self._values[layer] = updated
+            self._generation += 1
+            if interpolate:
+                # reject values that leave references unresolvable now, rather
+                # than every configuration built after them
+                try:
+                    snapshot = self._build_snapshot(self._snapshot_key())
+                except Exception:
+                    self._values[layer] = previous
+                    self._generation += 1
+                    raise
+                self.validation_error = self._rejected_key = None
+                self._snapshot = snapshot
+
+    def _lookup(self, config_key: str) -> ConfigValueType:
+        """
+        Returns the value of config_key from the current context's overrides,
+        or else from the merged snapshot, raising KeyError if it is not set.
+        """
+        if self.profiler is not None:
+            self.profiler.record_read(config_key)
+        if overrides := self._overrides.get():
+            if config_key in overrides:
+                return overrides[config_key]
+            if utils.is_shadowed(config_key, overrides):
+                raise KeyError(config_key)
+        if isinstance(config_key, str):
+            self._activate(config_key.split(".", 1)[0])
+        return self._get_snapshot().flattened[config_key]
+
+    def _merged(self, config_key: Optional[str] = None) -> Dict:
+        """
+        Returns the merged configuration, including any overrides active in
+        the current context. The result must not be modified.
+
+        :param config_key: key about to be read, to load only the lazy
+            providers of its namespace (load all of them)
+        """
+        self._activate(None if config_key is None else config_key.split(".", 1)[0])
+        config = self._get_snapshot().dict
+        if overrides := self._overrides.get():
+            return utils.overlay_dict(utils.expand_mixed_dict(overrides), config)
+        return config
+
+    def _get_snapshot(self) -> ConfigSnapshot:
+        """
+        Returns a snapshot of the merged configuration, reusing the previous
+        snapshot when neither the registry's values nor any provider's revision
+        have changed since it was built.
+        """
+        if self._frozen is not None:
+            return self._frozen.snapshot
+        key = self._snapshot_key()
+        snapshot = self._snapshot
+        if key is not None and snapshot is not None:
+            if key == snapshot.key or key == self._rejected_key:
+                return snapshot
+        with self._lock:
+            try:
+                snapshot = self._build_snapshot(key)
+            except ValidationError as ex:
+                if self._snapshot is None:
+                    raise
+                logger.error(f"keeping last valid configuration: {ex}")
+                self.validation_error = ex
+                self._rejected_key = self._snapshot_key()
+                return self._snapshot
+            self.validation_error = self._rejected_key = None
+            self._snapshot = snapshot
+        return snapshot
+
+    def _build_snapshot(self, key: Optional[Hashable]) -> ConfigSnapshot:
+        """
+        Merges the configuration into a new snapshot, and resolves and validates
+        it, raising ValidationError if it is invalid. Lazy providers serving
+        keys that values refer to are loaded first. Must be called with the
+        registry's lock held.
+
+        :param key: key identifying the state of the registry (see _snapshot_key)
+        """
+        profiler = self.profiler
+        started = time.perf_counter() if profiler is not None else 0.0
+        config = self._merge_configs()
+        sources = {name: section[0] for name, section in self._sections.items()}
+        snapshot: ConfigSnapshot
+        if self.compact:
+            snapshot = CompactSnapshot(
+                self._generation, config, key, sources, interned=True
+            )
+        else:
+            snapshot = ConfigSnapshot(self._generation, config, key, sources)
+        if profiler is not None:
+            merged = time.perf_counter()
+            profiler.record_merge(merged - started)
+            snapshot.flattened
+            profiler.record_flatten(time.perf_counter() - merged)
+        if self.interpolator is not None and (unloaded := self._unloaded()):
+            # load the lazy providers serving referenced keys before resolving
+            referenced = {
+                name.split(".", 1)[0]
+                for value in snapshot.flattened.values()
+                for name in references(value)
+            }
+            if referenced & unloaded:
+                for namespace in referenced & unloaded:
+                    self._activate(namespace)
+                return self._build_snapshot(self._snapshot_key())
+        if self.schema is not None or self.interpolator is not None:
+            snapshot = self._validate(snapshot)
+        return snapshot
+
+    def _validate(self, snapshot: ConfigSnapshot) -> ConfigSnapshot:
+        """
+        Resolves references in a snapshot (if interpolation is enabled) and
+        validates it against the registry's schema (if any), returning it with
+        its values resolved and coerced to their declared types, or raising
+        ValidationError.
+        """
+        if self.interpolator is not None:
+            resolved = self.interpolator.resolve(snapshot.flattened)
+            if resolved:
+                snapshot = snapshot.replace(resolved)
+        if self.schema is None:
+            return snapshot
+        flattened = snapshot.flattened
+        coerced = self.schema.validate(flattened, unloaded=self._unloaded())
+        changed = {
+            key: value for key, value in coerced.items() if value is not flattened[key]
+        }
+        return snapshot.replace(changed) if changed else snapshot
+
+    def _snapshot_key(self) -> Optional[Hashable]:
+        """
+        Returns a key identifying the current state of the registry, or None if
+        any provider cannot report its revision.
+        """
+        revisions = []
+        for provider in self._active_providers():
+            revision = provider.revision
+            if revision is None:
+                return None
+            revisions.append((provider, revision))
+        return self._generation, tuple(revisions)
 
     def _merge_configs(self) -> Dict:
         """
         Merges configuration from all configured providers into final config.
+        Each top-level section is merged separately, and reused from the
+        previous merge if none of its sources have changed, so that snapshots
+        share unchanged sections. A section is only reused while every one of
+        its sources is the same object at the same (non-None) revision, so
+        sources that are changed in place are merged again. The sources of each
+        section are kept (with the names of their layers) in self._sections,
+        for explain().
         """
-        config = utils.merge_dicts(self.values["defaults"], {})
-        for provider_name in self.providers.ordering:
-            if provider := self.providers.get(provider_name):
-                config = utils.merge_dicts(provider.dict, config)
-        config = utils.merge_dicts(self.values["super"], config)
+        # the registry's own layers are never changed in place; _apply_values
+        # replaces the sections it changes
+        layers: List[Tuple[str, Optional[Hashable], Mapping]] = [
+            ("defaults", 0, self._values["defaults"])
+        ]
+        for provider in self._active_providers():
+            values = provider.dict
+            if provider.namespaces is not None:
+                namespaces = self._activated[provider]
+                values = {
+                    key: values[key] for key in values if str(key).lower() in namespaces
+                }
+            layers.append((provider.provider_name, provider.revision, values))
+        layers.append(("super", 0, self._values["super"]))
+        sources: Dict[Hashable, List] = {}
+        for layer_name, revision, layer in layers:
+            for key, value in layer.items():
+                lowered = key.lower() if isinstance(key, str) else key
+                sources.setdefault(lowered, []).append(
+                    (layer_name, revision, key, value)
+                )
+        config = {}
+        sections = {}
+        for key, items in sources.items():
+            section_sources = [(item[0], item[3]) for item in items]
+            revisions = [item[1] for item in items]
+            cached = self._sections.get(key)
+            if (
+                cached is None
+                or any(revision is None for revision in revisions)
+                or cached[2] != revisions
+                or any(
+                    old[0] != new[0] or old[1] is not new[1]
+                    for old, new in zip(cached[0], section_sources)
+                )
+            ):
+                merged: Dict = {}
+                for _, _, source_key, value in items:
+                    utils.merge_dicts({source_key: value}, merged)
+                section = merged[key]
+                if self.compact and isinstance(section, Mapping):
+                    section = utils.intern_keys(section)
+                cached = (section_sources, section, revisions)
+            if self.compact and isinstance(key, str):
+                key = sys.intern(key)
+            config[key] = cached[1]
+            sections[key] = cached
+        self._sections = sections
         return config
+
+
+class OverlayRegistry(ConfigurationRegistry):
+    #: The registry whose configuration this overlay reads through to.
+    parent: ConfigurationRegistry
+
+    def __init__(
+        self,
+        parent: ConfigurationRegistry,
+        name: str,
+        values: Optional[Mapping] = None,
+    ) -> None:
+        """
+        An overlay registry holds its own values on top of the configuration of
+        a parent registry, sharing the parent's providers and merged snapshot
+        instead of merging its own copy, so that many overlays (e.g. one per
+        tenant) cost memory in proportion to their own values. Values set on
+        the overlay with set() or set_many() take precedence over the parent's
+        configuration; changes to the parent are visible to its overlays as
+        soon as they are read, without re-merging overlays that are not read.
+        Temporary overrides of the parent are not visible to its overlays.
+
+        Overlays have no defaults of their own; set defaults on the parent.
+        They share the parent's schema and are compact if the parent is. If
+        the parent interpolates references, so do its overlays: references in
+        the overlay's values are resolved, and so are references of the
+        parent's values to keys the overlay sets.
+
+        :param parent: registry to read through to
+        :param name: namespace for the overlay registry, e.g. a tenant id
+        :param values: initial values of the overlay, as for set_many()
+        """
+        super().__init__(
+            name,
+            providers=[],
+            compact=parent.compact,
+            interpolate=parent.interpolator is not None,
+        )
+        self.parent = parent
+        self.providers = parent.providers
+        self.schema = parent.schema
+        self._layer: Optional[ConfigSnapshot] = None
+        if values:
+            self.set_many(values)
+
+    @property
+    def all(self) -> Dict:
+        """
+        Returns a dictionary of all the configuration data that is considered
+        for merging, including the parent's, before it is merged into the final
+        configuration.
+        """
+        values = self.parent.all
+        values["overlay"] = self._values["super"]
+        return values
+
+    def find(self, pattern: str) -> Dict[str, ConfigValueType]:
+        """
+        Find configuration values whose dotted path keys match pattern, where a
+        ``*`` segment matches any single key and a ``**`` segment matches any
+        number of keys, e.g. ``services.*.url`` or ``queues.**.timeout``.
+        Returns a dict of matching keys and their values, sorted by key.
+        """
+        if self._overrides.get():
+            return super().find(pattern)
+        namespace = pattern.split(".", 1)[0]
+        self._activate(None if namespace in ("*", "**") else namespace)
+        if self.interpolator is not None:
+            # the resolved values are part of the overlay snapshot's layer
+            snapshot = self._get_snapshot()
+            base, flattened = snapshot.base, snapshot.layer  # type: ignore
+            trie = KeyTrie(flattened)
+        else:
+            base = self.parent._get_snapshot()
+            layer = self._get_layer()
+            flattened, trie = layer.flattened, layer.trie
+        prefixes = utils.parent_paths(flattened)
+        found = {
+            key: base.flattened[key]
+            for key in base.trie.match(pattern)
+            if key not in prefixes and not utils.is_shadowed(key, flattened)
+        }
+        for key in trie.match(pattern):
+            found[key] = flattened[key]
+        return {key: found[key] for key in sorted(found)}
+
+    def set_defaults_many(self, values: Mapping) -> None:
+        """
+        Raises TypeError; overlay registries have no defaults of their own.
+        """
+        raise TypeError("overlay registries have no defaults; set them on the parent")
+
+    def update(self) -> None:
+        """
+        Updates configuration values from the parent registry's providers.
+        """
+        self.parent.update()
+
+    def update_provider(self, provider_name: str) -> bool:
+        """
+        Updates configuration values from a single provider of the parent
+        registry, returning True on success.
+        """
+        return self.parent.update_provider(provider_name)
+
+    def _activate(self, namespace: Optional[str] = None) -> None:
+        """
+        Loads lazy providers of the parent registry serving namespace.
+
+        :param namespace: top-level key about to be accessed
+        """
+        self.parent._activate(namespace)
+
+    def _active_providers(self) -> Iterator[ConfigProviderBase]:
+        """
+        Yields the parent registry's active providers in merge order.
+        """
+        return self.parent._active_providers()
+
+    def _get_layer(self) -> ConfigSnapshot:
+        """
+        Returns a snapshot of the overlay's own values, rebuilding it when they
+        have changed.
+        """
+        layer = self._layer
+        if layer is None or layer.generation != self._generation:
+            with self._lock:
+                layer = ConfigSnapshot(self._generation, self._values["super"])
+                self._layer = layer
+        return layer
+
+    def _build_snapshot(self, key: Optional[Hashable]) -> ConfigSnapshot:
+        """
+        Builds a snapshot of the parent's configuration with the overlay's
+        values on top, resolving references if interpolation is enabled and
+        raising InterpolationError if they cannot be resolved. Must be called
+        with the registry's lock held.
+
+        :param key: key identifying the state of the registry (unused)
+        """
+        layer = self._get_layer().flattened
+        if self.interpolator is not None and (unloaded := self.parent._unloaded()):
+            # load the lazy providers serving referenced keys before resolving
+            referenced = {
+                name.split(".", 1)[0]
+                for value in layer.values()
+                for name in references(value)
+            }
+            for namespace in referenced & unloaded:
+                self._activate(namespace)
+        base = self.parent._get_snapshot()
+        if self.interpolator is not None:
+            layer = self._resolve(base, layer)
+        return OverlaySnapshot(self._generation, base, layer, compact=self.compact)
+
+    def _get_snapshot(self) -> ConfigSnapshot:
+        """
+        Returns a snapshot of the parent's configuration with the overlay's
+        values on top, reusing the previous snapshot as long as neither the
+        parent's snapshot nor the overlay's values have changed. If references
+        cannot be resolved after the parent changed, the last valid snapshot is
+        kept, as by the parent.
+        """
+        if self._frozen is not None:
+            return self._frozen.snapshot
+        base = self.parent._get_snapshot()
+        snapshot = self._snapshot
+        key = (self._generation, base)
+        if (
+            snapshot is None
+            or snapshot.generation != self._generation
+            or snapshot.base is not base  # type: ignore
+        ) and key != self._rejected_key:
+            with self._lock:
+                try:
+                    snapshot = self._build_snapshot(key)
+                except ValidationError as ex:
+                    if self._snapshot is None:
+                        raise
+                    logger.error(f"keeping last valid configuration: {ex}")
+                    self.validation_error = ex
+                    self._rejected_key = key
+                    return self._snapshot
+                self.validation_error = self._rejected_key = None
+                self._snapshot = snapshot
+        return snapshot  # type: ignore
+
+    def _resolve(self, base: ConfigSnapshot, layer: Dict) -> Dict:
+        """
+        Returns layer with the resolved values of the references in the
+        overlay's configuration added: those of the overlay's own values, and
+        those of the parent's values that resolve differently on the overlay.
+        """
+        templates = (
+            self.parent.interpolator.templates
+            if self.parent.interpolator is not None
+            else {}
+        )
+        prefixes = utils.parent_paths(layer)
+        # the parent's snapshot holds its templates resolved; put them back
+        unresolved = {
+            key: template
+            for key, template in templates.items()
+            if key not in layer
+            and key not in prefixes
+            and not utils.is_shadowed(key, layer)
+        }
+        flattened = OverlayIndex(base.flattened, {**layer, **unresolved})
+        resolved = self.interpolator.resolve(flattened)  # type: ignore
+        parent = base.flattened
+        changed = {
+            key: value
+            for key, value in resolved.items()
+            if key in layer
+            or type(parent.get(key)) is not type(value)
+            or parent.get(key) != value
+        }
+        return {**layer, **changed} if changed else layer
+
+    def _lookup(self, config_key: str) -> ConfigValueType:
+        """
+        Returns the value of config_key from the current context's overrides,
+        the overlay's values or the parent's snapshot, raising KeyError if it
+        is not set.
+        """
+        if self.profiler is not None:
+            self.profiler.record_read(config_key)
+        if overrides := self._overrides.get():
+            if config_key in overrides:
+                return overrides[config_key]
+            if utils.is_shadowed(config_key, overrides):
+                raise KeyError(config_key)
+        if self.interpolator is not None:
+            # resolved values of the overlay are only in its snapshot
+            if isinstance(config_key, str):
+                self._activate(config_key.split(".", 1)[0])
+            return self._get_snapshot().flattened[config_key]
+        layer = self._get_layer().flattened
+        if config_key in layer:
+            return layer[config_key]
+        if utils.is_shadowed(config_key, layer):
+            raise KeyError(config_key)
+        if isinstance(config_key, str):
+            self._activate(config_key.split(".", 1)[0])
+        value = self.parent._get_snapshot().flattened[config_key]
+        if any(key.startswith(f"{config_key}.") for key in layer):
+            # the overlay replaced the parent's value with a dict
+            raise KeyError(config_key)
+        return value
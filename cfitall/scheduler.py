@@ -0,0 +1,240 @@
+"""
+The scheduler module implements a RefreshScheduler, which refreshes the
+providers of a ConfigurationRegistry in the background, each on its own
+schedule.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import random
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Dict, Optional, Set
+
+if TYPE_CHECKING:  # pragma: no cover
+    from cfitall.registry import ConfigurationRegistry
+
+logger = logging.getLogger(__name__)
+
+
+class ScheduledRefresh:
+    #: friendly name of the provider to refresh
+    provider_name: str
+    #: seconds between successful refreshes
+    interval: float
+    #: fraction of the interval by which each delay is randomly varied
+    jitter: float
+    #: maximum seconds between refreshes while the provider is failing
+    backoff_max: float
+
+    def __init__(
+        self,
+        provider_name: str,
+        interval: float,
+        jitter: float = 0.1,
+        backoff_max: Optional[float] = None,
+    ) -> None:
+        """
+        A ScheduledRefresh holds the schedule and state of one provider's
+        refreshes within a RefreshScheduler.
+
+        :param provider_name: friendly name of the provider to refresh
+        :param interval: seconds between successful refreshes
+        :param jitter: fraction of the interval to vary each delay by (0.1)
+        :param backoff_max: maximum seconds between failing refreshes
+            (10 times interval)
+        """
+        if interval <= 0:
+            raise ValueError("interval must be greater than 0")
+        self.provider_name = provider_name
+        self.interval = interval
+        self.jitter = jitter
+        self.backoff_max = backoff_max if backoff_max is not None else interval * 10
+        #: number of consecutive failed refreshes
+        self.failures = 0
+        #: time.monotonic() at which the next refresh is due
+        self.next_run = time.monotonic() + self.delay()
+        #: whether a refresh is currently running
+        self.running = False
+        #: whether another refresh was requested while one was running
+        self.pending = False
+
+    def __repr__(self) -> str:
+        return f"<ScheduledRefresh {self.provider_name} every {self.interval}s>"
+
+    def delay(self) -> float:
+        """
+        Returns the randomly jittered number of seconds until the next refresh,
+        backing off exponentially (up to backoff_max) after failures.
+        """
+        delay = self.interval
+        if self.failures:
+            delay = min(self.backoff_max, self.interval * 2**self.failures)
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+
+class RefreshScheduler:
+    def __init__(self, registry: "ConfigurationRegistry", max_workers: int = 4) -> None:
+        """
+        The RefreshScheduler refreshes providers of a registry in the
+        background, so that cheap providers can be refreshed often and
+        expensive ones rarely. Each provider is given its own interval with
+        schedule(); refreshes are randomly jittered so that a fleet of processes
+        does not refresh in lockstep, and back off exponentially while a
+        provider fails. A provider is never refreshed concurrently with itself:
+        refreshes requested while one is running are coalesced into a single
+        follow-up refresh.
+
+        The scheduler can be used as a context manager, which starts it and
+        stops it on exit.
+
+        :param registry: registry whose providers to refresh
+        :param max_workers: maximum number of providers refreshed at once (4)
+        """
+        self.registry = registry
+        self.max_workers = max_workers
+        self._jobs: Dict[str, ScheduledRefresh] = {}
+        # names of providers being refreshed, also by jobs since replaced
+        self._in_flight: Set[str] = set()
+        self._condition = threading.Condition()
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def __enter__(self) -> "RefreshScheduler":
+        self.start()
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.stop()
+
+    @property
+    def jobs(self) -> Dict[str, ScheduledRefresh]:
+        """
+        Returns a copy of the scheduled refreshes, keyed by provider name.
+        """
+        with self._condition:
+            return dict(self._jobs)
+
+    def schedule(
+        self,
+        provider_name: str,
+        interval: float,
+        jitter: float = 0.1,
+        backoff_max: Optional[float] = None,
+    ) -> None:
+        """
+        Schedules the named provider to be refreshed every interval seconds,
+        replacing any existing schedule for it. The first refresh happens after
+        one (jittered) interval; if a refresh of the provider is still running,
+        the new schedule's refreshes wait for it to finish.
+
+        :param provider_name: friendly name of a registered provider
+        :param interval: seconds between successful refreshes
+        :param jitter: fraction of the interval to vary each delay by (0.1)
+        :param backoff_max: maximum seconds between failing refreshes
+            (10 times interval)
+        """
+        job = ScheduledRefresh(provider_name, interval, jitter, backoff_max)
+        with self._condition:
+            self._jobs[provider_name] = job
+            self._condition.notify()
+
+    def unschedule(self, provider_name: str) -> None:
+        """
+        Stops refreshing the named provider. A refresh already running is
+        allowed to finish, and a later schedule() waits for it.
+
+        :param provider_name: friendly name of a scheduled provider
+        """
+        with self._condition:
+            self._jobs.pop(provider_name, None)
+
+    def refresh(self, provider_name: str) -> None:
+        """
+        Requests an immediate refresh of the named (scheduled) provider. If a
+        refresh is already running, one more refresh will follow it, however
+        many times this is called in the meantime.
+
+        :param provider_name: friendly name of a scheduled provider
+        """
+        with self._condition:
+            job = self._jobs[provider_name]
+            if job.running:
+                job.pending = True
+            else:
+                job.next_run = time.monotonic()
+                self._condition.notify()
+
+    def start(self) -> None:
+        """
+        Starts the scheduler's background thread, if it is not already running.
+        """
+        with self._condition:
+            if self._thread is not None:
+                return
+            self._stopping = False
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="cfitall-refresh"
+            )
+            self._thread = threading.Thread(
+                target=self._run, name="cfitall-scheduler", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """
+        Stops the scheduler, waiting for refreshes that are already running to
+        finish.
+
+        :param timeout: seconds to wait for the scheduler thread (no limit)
+        """
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+            thread, executor = self._thread, self._executor
+            self._thread = self._executor = None
+        if thread is not None:
+            thread.join(timeout)
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def _run(self) -> None:
+        """
+        Submits due refreshes to the executor until the scheduler is stopped.
+        """
+        with self._condition:
+            while not self._stopping:
+                now = time.monotonic()
+                next_run = None
+                for job in self._jobs.values():
+                    if job.running or job.provider_name in self._in_flight:
+                        # woken up again when the running refresh finishes
+                        continue
+                    if job.next_run <= now:
+                        job.running = True
+                        self._in_flight.add(job.provider_name)
+                        self._executor.submit(self._refresh, job)  # type: ignore
+                    elif next_run is None or job.next_run < next_run:
+                        next_run = job.next_run
+                self._condition.wait(None if next_run is None else next_run - now)
+
+    def _refresh(self, job: ScheduledRefresh) -> None:
+        """
+        Refreshes one provider and schedules its next refresh.
+        """
+        try:
+            success = self.registry.update_provider(job.provider_name)
+        except Exception as ex:
+            logger.error(f"error refreshing provider {job.provider_name}: {ex}")
+            success = False
+        with self._condition:
+            self._in_flight.discard(job.provider_name)
+            job.running = False
+            job.failures = 0 if success else job.failures + 1
+            job.next_run = time.monotonic()
+            if job.pending:
+                job.pending = False
+            else:
+                job.next_run += job.delay()
+            self._condition.notify()
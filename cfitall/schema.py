@@ -0,0 +1,267 @@
+"""
+The schema module implements a Schema, which declares the types, bounds,
+choices and required keys of a configuration. A registry built with a schema
+validates (and coerces) each new merged configuration once, rather than on
+every access.
+"""
+
+from collections.abc import Mapping
+from decimal import Decimal, InvalidOperation
+from typing import (
+    Any,
+    Callable,
+    Collection,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+    Type,
+)
+
+_TRUE = frozenset(["true", "yes", "on", "1"])
+_FALSE = frozenset(["false", "no", "off", "0"])
+
+
+class ValidationError(ValueError):
+    #: error messages, keyed by dotted path key
+    errors: Dict[str, str]
+
+    def __init__(self, errors: Dict[str, str]) -> None:
+        """
+        Raised when a configuration does not match its schema.
+
+        :param errors: error messages, keyed by dotted path key
+        """
+        self.errors = errors
+        details = "; ".join(f"{key}: {message}" for key, message in errors.items())
+        super().__init__(f"invalid configuration: {details}")
+
+
+def _to_bool(value: Any) -> bool:
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, int) and value in (0, 1):
+        return bool(value)
+    if isinstance(value, str):
+        lowered = value.strip().lower()
+        if lowered in _TRUE:
+            return True
+        if lowered in _FALSE:
+            return False
+    raise ValueError(f"expected a boolean, got {value!r}")
+
+
+def _to_int(value: Any) -> int:
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, str):
+        try:
+            return int(value.strip())
+        except ValueError:
+            pass
+    raise ValueError(f"expected an integer, got {value!r}")
+
+
+def _to_float(value: Any) -> float:
+    if isinstance(value, float):
+        return value
+    if isinstance(value, (int, Decimal, str)) and not isinstance(value, bool):
+        try:
+            return float(value)
+        except ValueError:
+            pass
+    raise ValueError(f"expected a number, got {value!r}")
+
+
+def _to_decimal(value: Any) -> Decimal:
+    if isinstance(value, Decimal):
+        return value
+    if isinstance(value, (int, float, str)) and not isinstance(value, bool):
+        try:
+            return Decimal(str(value).strip())
+        except InvalidOperation:
+            pass
+    raise ValueError(f"expected a decimal, got {value!r}")
+
+
+def _to_str(value: Any) -> str:
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (bool, int, float, Decimal)):
+        return str(value)
+    raise ValueError(f"expected a string, got {value!r}")
+
+
+def _to_list(value: Any) -> list:
+    if isinstance(value, list):
+        return value
+    if isinstance(value, tuple):
+        return list(value)
+    if isinstance(value, str):
+        return [item.strip() for item in value.split(",")]
+    raise ValueError(f"expected a list, got {value!r}")
+
+
+_COERCERS: Dict[type, Callable[[Any], Any]] = {
+    bool: _to_bool,
+    int: _to_int,
+    float: _to_float,
+    Decimal: _to_decimal,
+    str: _to_str,
+    list: _to_list,
+}
+
+
+class Field:
+    #: type values are coerced to: bool, int, float, Decimal, str or list
+    type: Type
+    #: whether the key must be set
+    required: bool
+    #: smallest allowed value (or length, for strings and lists)
+    minimum: Any
+    #: largest allowed value (or length, for strings and lists)
+    maximum: Any
+    #: allowed values
+    choices: Optional[Tuple]
+
+    def __init__(
+        self,
+        type_: Type = str,
+        required: bool = False,
+        minimum: Any = None,
+        maximum: Any = None,
+        choices: Optional[Iterable] = None,
+    ) -> None:
+        """
+        A Field declares the type and constraints of one configuration key in a
+        Schema. Values are coerced to the field's type where this is lossless,
+        e.g. from the strings set by environment variables, so ``"8080"`` is
+        accepted for an int field and ``"a, b"`` for a list field.
+
+        :param type_: bool, int, float, Decimal, str or list (str)
+        :param required: whether the key must be set (False)
+        :param minimum: smallest allowed value, or length for str and list
+        :param maximum: largest allowed value, or length for str and list
+        :param choices: allowed values
+        """
+        if type_ not in _COERCERS:
+            raise TypeError(f"unsupported field type: {type_!r}")
+        self.type = type_
+        self.required = required
+        self.minimum = minimum
+        self.maximum = maximum
+        self.choices = tuple(choices) if choices is not None else None
+
+    def __repr__(self) -> str:
+        return f"<Field {self.type.__name__}>"
+
+    def compile(self) -> Callable[[Any], Any]:
+        """
+        Returns a function that coerces a value to the field's type and checks
+        it against the field's constraints, raising ValueError if it fails.
+        Only the checks the field declares are included.
+        """
+        coerce = _COERCERS[self.type]
+        checks: List[Callable[[Any], Optional[str]]] = []
+        measure: Callable[[Any], Any] = (
+            len if self.type in (str, list) else (lambda value: value)
+        )
+        nouns: Dict[type, str] = {str: " characters", list: " items"}
+        noun = nouns.get(self.type, "")
+        if self.choices is not None:
+            choices = self.choices
+            checks.append(
+                lambda value: None if value in choices else f"must be one of {choices}"
+            )
+        if self.minimum is not None:
+            minimum = self.minimum
+            checks.append(
+                lambda value: (
+                    None
+                    if measure(value) >= minimum
+                    else f"must be at least {minimum}{noun}"
+                )
+            )
+        if self.maximum is not None:
+            maximum = self.maximum
+            checks.append(
+                lambda value: (
+                    None
+                    if measure(value) <= maximum
+                    else f"must be at most {maximum}{noun}"
+                )
+            )
+        if not checks:
+            return coerce
+
+        def validate(value: Any) -> Any:
+            value = coerce(value)
+            for check in checks:
+                if message := check(value):
+                    raise ValueError(message)
+            return value
+
+        return validate
+
+
+class Schema:
+    #: fields, keyed by dotted path key
+    fields: Dict[str, Field]
+
+    def __init__(self, fields: Mapping) -> None:
+        """
+        A Schema declares the fields of a configuration, keyed by dotted path
+        key, and compiles each field into a validator once, when the schema is
+        created:
+
+        ::
+
+            schema = Schema({
+                "db.host": Field(str, required=True),
+                "db.port": Field(int, minimum=1, maximum=65535),
+                "log.level": Field(str, choices=["debug", "info", "error"]),
+            })
+
+        Keys that are not declared are not validated.
+
+        :param fields: Field for each dotted path key
+        """
+        self.fields = {key.lower(): field for key, field in fields.items()}
+        self._validators = [
+            (key, field.required, field.compile()) for key, field in self.fields.items()
+        ]
+
+    def validate(
+        self,
+        flattened: Mapping,
+        partial: bool = False,
+        unloaded: Collection[str] = (),
+    ) -> Dict[str, Any]:
+        """
+        Validates a flattened configuration, returning the coerced value of
+        each declared key that is set, or raising ValidationError listing every
+        key that is invalid (or required but not set).
+
+        :param flattened: flattened configuration to validate
+        :param partial: skip the check for required keys (False)
+        :param unloaded: top-level keys that are not loaded yet (e.g. those of
+            lazy providers); required keys below them are not checked
+        """
+        coerced = {}
+        errors = {}
+        for key, required, validator in self._validators:
+            if key not in flattened:
+                if required and not partial:
+                    if key.split(".", 1)[0] not in unloaded:
+                        errors[key] = "is required"
+                continue
+            try:
+                coerced[key] = validator(flattened[key])
+            except (ValueError, TypeError) as ex:
+                errors[key] = str(ex)
+        if errors:
+            raise ValidationError(errors)
+        return coerced
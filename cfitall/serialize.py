@@ -0,0 +1,98 @@
+"""
+The serialize module converts merged configurations to json or yaml, using
+faster implementations where they are available: orjson (if installed) for
+json, and PyYAML's libyaml-based CDumper for yaml.
+"""
+
+import io
+import json
+from typing import IO, Any, Optional
+
+import yaml
+
+try:
+    import orjson  # type: ignore[import]
+except ImportError:  # pragma: no cover
+    orjson = None  # type: ignore
+
+#: yaml dumper, using libyaml if PyYAML was built with it
+Dumper = getattr(yaml, "CDumper", yaml.Dumper)
+
+#: serialization formats supported by dumps() and dump()
+FORMATS = ("json", "yaml")
+
+# number of json encoder chunks joined into each write by dump()
+_CHUNKS_PER_WRITE = 4096
+
+
+def _check_format(format: str) -> None:
+    if format not in FORMATS:
+        raise ValueError(f"unsupported format {format!r}, expected one of {FORMATS}")
+
+
+def _is_binary(fp: IO) -> bool:
+    return isinstance(fp, (io.RawIOBase, io.BufferedIOBase))
+
+
+def write(fp: IO, text: str) -> None:
+    """
+    Writes text to a text or (utf-8 encoded) binary file object.
+
+    :param fp: text or binary file object to write to
+    :param text: text to write
+    """
+    fp.write(text.encode("utf-8") if _is_binary(fp) else text)
+
+
+def dumps(config: Any, format: str = "json", indent: Optional[int] = 4) -> str:
+    """
+    Returns config serialized as json (with sorted keys) or yaml.
+
+    :param config: configuration to serialize
+    :param format: "json" or "yaml" ("json")
+    :param indent: json indentation, or None for compact json (4)
+    """
+    _check_format(format)
+    if format == "yaml":
+        return yaml.dump(config, Dumper=Dumper)
+    return json.dumps(config, indent=indent, sort_keys=True, default=str)
+
+
+def dump(config: Any, fp: IO, format: str = "json", indent: Optional[int] = 4) -> None:
+    """
+    Serializes config as json (with sorted keys) or yaml, writing it to a text
+    or binary file object piece by piece rather than as one string. If orjson
+    is installed and indent is 2 or None, it is used for json, in which case
+    the whitespace of its output differs slightly from json.dumps().
+
+    :param config: configuration to serialize
+    :param fp: text or binary file object to write to
+    :param format: "json" or "yaml" ("json")
+    :param indent: json indentation, or None for compact json (4)
+    """
+    _check_format(format)
+    if format == "json" and orjson is not None and indent in (None, 2):
+        option = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        data = orjson.dumps(config, default=str, option=option)
+        fp.write(data if _is_binary(fp) else data.decode("utf-8"))
+        return
+    if format == "yaml":
+        binary = _is_binary(fp)
+        stream = io.TextIOWrapper(fp, encoding="utf-8") if binary else fp
+        try:
+            yaml.dump(config, stream, Dumper=Dumper)
+        finally:
+            if binary:
+                stream.flush()
+                stream.detach()  # type: ignore
+        return
+    encoder = json.JSONEncoder(indent=indent, sort_keys=True, default=str)
+    chunks = []
+    for chunk in encoder.iterencode(config):
+        chunks.append(chunk)
+        if len(chunks) == _CHUNKS_PER_WRITE:
+            write(fp, "".join(chunks))
+            chunks = []
+    write(fp, "".join(chunks))
@@ -0,0 +1,113 @@
+"""
+The server module implements a ConfigServer, which answers requests for the
+values of a live ConfigurationRegistry over a unix domain socket, so that many
+short-lived processes can share one registry (see cfitall.client).
+
+Requests and responses are single lines of json: a request such as
+``{"method": "get", "key": "db.host"}`` is answered with ``{"value": ...}`` or
+``{"error": "..."}``. The methods are ``get``, ``get_section`` and ``dump``.
+"""
+
+import errno
+import json
+import logging
+import os
+import socket
+import socketserver
+import stat
+from typing import Any, Dict
+
+from cfitall.registry import ConfigurationRegistry
+
+logger = logging.getLogger(__name__)
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    server: "ConfigServer"
+
+    def handle(self) -> None:
+        for line in self.rfile:
+            response = self.server.respond(line)
+            self.wfile.write(json.dumps(response, default=str).encode("utf-8"))
+            self.wfile.write(b"\n")
+
+
+def _check_directory(directory: str) -> None:
+    """
+    Creates directory, accessible only to the current user, if it does not
+    exist, and raises PermissionError if another user could replace sockets in
+    it: it must be owned by the current user (or root), and may only be
+    writable by others if its sticky bit is set, like /tmp.
+    """
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    info = os.stat(directory)
+    if info.st_uid not in (os.getuid(), 0):
+        raise PermissionError(f"{directory} is owned by another user")
+    if info.st_mode & (stat.S_IWGRP | stat.S_IWOTH) and not (
+        info.st_mode & stat.S_ISVTX
+    ):
+        raise PermissionError(f"{directory} is writable by other users")
+
+
+class ConfigServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, registry: ConfigurationRegistry, path: str) -> None:
+        """
+        A ConfigServer serves the values of registry on a unix domain socket at
+        path, which is only accessible to the current user. The directory of
+        path is created if needed, and PermissionError is raised if other users
+        could replace the socket in it. A stale socket left behind by a
+        previous server is replaced; if another server is still listening on
+        path, OSError (EADDRINUSE) is raised. Call serve_forever()
+        to start answering requests and server_close() to remove the socket.
+
+        :param registry: registry whose values to serve
+        :param path: path of the unix domain socket to listen on
+        """
+        self.registry = registry
+        _check_directory(os.path.dirname(os.path.abspath(path)))
+        if os.path.exists(path):
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(path)
+            except OSError:
+                os.unlink(path)
+            else:
+                raise OSError(errno.EADDRINUSE, f"a server is listening on {path}")
+            finally:
+                probe.close()
+        # create the socket without access for others, rather than changing
+        # its mode after it was bound
+        umask = os.umask(0o177)
+        try:
+            super().__init__(path, _RequestHandler)
+        finally:
+            os.umask(umask)
+
+    def server_close(self) -> None:
+        super().server_close()
+        try:
+            os.unlink(self.server_address)  # type: ignore
+        except OSError:
+            pass
+
+    def respond(self, line: bytes) -> Dict[str, Any]:
+        """
+        Returns the response to a single request line.
+
+        :param line: json-encoded request
+        """
+        try:
+            request = json.loads(line)
+            method = request["method"]
+            if method == "get":
+                return {"value": self.registry.get(request["key"])}
+            if method == "get_section":
+                return {"value": self.registry.get_section(request["key"])}
+            if method == "dump":
+                return {"value": self.registry.dict}
+            return {"error": f"unknown method: {method}"}
+        except (ValueError, KeyError, TypeError) as ex:
+            logger.error(f"invalid request {line!r}: {ex}")
+            return {"error": f"invalid request: {ex}"}
@@ -0,0 +1,516 @@
+"""
+The snapshot module implements the ConfigSnapshot, an immutable view of a
+registry's merged configuration at a single point in time.
+"""
+
+from collections.abc import Mapping
+import sys
+from typing import IO, Any, Dict, Hashable, Iterator, List, Optional, Set, Tuple
+
+from cfitall import serialize, utils
+from cfitall.trie import KeyTrie
+
+
+class ConfigSnapshot:
+    #: generation of the registry values this snapshot was built from
+    generation: int
+    #: merged configuration dictionary
+    dict: Dict
+    #: (layer name, value) pairs merged into each top-level key, in merge order
+    sources: Dict[Hashable, List[Tuple[str, Any]]]
+
+    def __init__(
+        self,
+        generation: int,
+        config: Dict,
+        key: Hashable = None,
+        sources: Optional[Dict[Hashable, List[Tuple[str, Any]]]] = None,
+    ) -> None:
+        """
+        A ConfigSnapshot holds the merged configuration of a registry, along
+        with any derived structures (e.g. the flattened dict), which are computed
+        lazily and then cached for the lifetime of the snapshot. Snapshots must
+        be treated as read-only; the registry builds a new one whenever its
+        configuration changes.
+
+        :param generation: generation of the registry values merged in config
+        :param config: merged configuration dictionary
+        :param key: cache key used by the registry to decide whether it is stale
+        :param sources: layers merged into each top-level key, for explain()
+        """
+        self.generation = generation
+        self.dict = config
+        self.key = key
+        self.sources = sources or {}
+        self._flattened: Optional[Dict] = None
+        self._trie: Optional[KeyTrie] = None
+        self._serialized: Dict[str, str] = {}
+
+    def __repr__(self) -> str:
+        return f"<ConfigSnapshot generation={self.generation}>"
+
+    @property
+    def flattened(self) -> Dict:
+        """
+        Returns the merged configuration as a flattened dictionary of dotted
+        path keys, computing it on first access.
+        """
+        if self._flattened is None:
+            self._flattened = utils.flatten_dict(self.dict)
+        return self._flattened
+
+    @property
+    def trie(self) -> KeyTrie:
+        """
+        Returns a KeyTrie of the snapshot's dotted keys, building it on first
+        access.
+        """
+        if self._trie is None:
+            self._trie = KeyTrie(self.flattened)
+        return self._trie
+
+    def serialize(self, format: str = "json") -> str:
+        """
+        Returns the merged configuration serialized as json or yaml (see
+        cfitall.serialize.dumps()), serializing it on first access.
+
+        :param format: "json" or "yaml" ("json")
+        """
+        serialized = self._serialized.get(format)
+        if serialized is None:
+            serialized = self._serialized[format] = serialize.dumps(self.dict, format)
+        return serialized
+
+    def dump(self, fp: IO, format: str = "json", indent: Optional[int] = 4) -> None:
+        """
+        Writes the merged configuration to a text or binary file object as json
+        or yaml, reusing the output of serialize() if it has been computed, or
+        else serializing it piece by piece (see cfitall.serialize.dump()).
+
+        :param fp: text or binary file object to write to
+        :param format: "json" or "yaml" ("json")
+        :param indent: json indentation, or None for compact json (4)
+        """
+        serialized = self._serialized.get(format)
+        if serialized is not None and (format == "yaml" or indent == 4):
+            serialize.write(fp, serialized)
+        else:
+            serialize.dump(self.dict, fp, format, indent)
+
+    def replace(self, values: Dict) -> "ConfigSnapshot":
+        """
+        Returns a copy of the snapshot with the given flattened values replaced.
+        Only the sections containing values are copied.
+
+        :param values: values to replace, keyed by dotted path key
+        """
+        config = utils.overlay_dict(utils.expand_flattened_dict(values), self.dict)
+        snapshot = type(self)(self.generation, config, self.key, self.sources)
+        if self._flattened is not None:
+            snapshot._flattened = {**self._flattened, **values}
+        return snapshot
+
+    def explain(self, config_key: str) -> Optional[str]:
+        """
+        Returns the name of the last layer in merge order that set config_key,
+        which is the one whose value the snapshot holds, or None if config_key
+        is not set or the snapshot does not know its sources.
+
+        :param config_key: dotted path key
+        """
+        if config_key not in self.flattened:
+            return None
+        segments = (
+            config_key.split(".") if isinstance(config_key, str) else [config_key]
+        )
+        for layer_name, value in reversed(self.sources.get(segments[0], [])):
+            for segment in segments[1:]:
+                if not isinstance(value, Mapping):
+                    break
+                value = _get_lowered(value, segment)
+            else:
+                if not isinstance(value, Mapping) and value is not _MISSING:
+                    return layer_name
+        return None
+
+    def diff(self, old: "ConfigSnapshot") -> "ConfigDiff":
+        """
+        Returns the dotted keys added, removed and changed between an older
+        snapshot and this one. Sections that both snapshots share (as
+        consecutive snapshots of a registry do for sections whose sources have
+        not changed) are skipped without being compared.
+
+        :param old: snapshot to compare this snapshot to
+        """
+        diff = ConfigDiff()
+        _diff_dicts(old.dict, self.dict, "", diff)
+        return diff
+
+
+_MISSING = object()
+
+
+def _get_lowered(mapping: Mapping, key: str) -> Any:
+    """
+    Returns the value of key in a mapping whose keys may not have been
+    lowercased yet, or _MISSING.
+    """
+    if key in mapping:
+        return mapping[key]
+    for candidate, value in mapping.items():
+        if isinstance(candidate, str) and candidate.lower() == key:
+            return value
+    return _MISSING
+
+
+class ConfigDiff:
+    #: keys added, with their new values
+    added: Dict[str, Any]
+    #: keys removed, with their old values
+    removed: Dict[str, Any]
+    #: keys changed, with their old and new values
+    changed: Dict[str, Tuple[Any, Any]]
+
+    def __init__(self) -> None:
+        """
+        A ConfigDiff holds the dotted keys that were added, removed or changed
+        between two snapshots (see ConfigSnapshot.diff()). It is falsy if the
+        snapshots are equal.
+        """
+        self.added = {}
+        self.removed = {}
+        self.changed = {}
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.changed)
+
+    def __repr__(self) -> str:
+        return (
+            f"<ConfigDiff added={sorted(self.added)} removed={sorted(self.removed)}"
+            f" changed={sorted(self.changed)}>"
+        )
+
+
+def _diff_dicts(old: Mapping, new: Mapping, prefix: str, diff: ConfigDiff) -> None:
+    """
+    Records the differences between two nested dicts in diff, recursing into
+    all sub-dicts that are not identical, rather than comparing them first, so
+    that each value is compared once.
+    """
+    for key, value in new.items():
+        path = f"{prefix}.{key}" if prefix else key
+        if key not in old:
+            diff.added.update(utils.flatten_dict({path: value}))
+            continue
+        previous = old[key]
+        if previous is value:
+            continue
+        if isinstance(previous, Mapping) and isinstance(value, Mapping):
+            _diff_dicts(previous, value, path, diff)
+        elif isinstance(previous, Mapping) or isinstance(value, Mapping):
+            diff.removed.update(utils.flatten_dict({path: previous}))
+            diff.added.update(utils.flatten_dict({path: value}))
+        elif type(previous) is not type(value) or previous != value:
+            diff.changed[path] = (previous, value)
+    for key, value in old.items():
+        if key not in new:
+            path = f"{prefix}.{key}" if prefix else key
+            diff.removed.update(utils.flatten_dict({path: value}))
+
+
+def _intern_paths(tree: Dict, source: Mapping) -> Dict:
+    """
+    Returns a copy of tree with the string keys interned in the dicts along the
+    paths of source, which must be the dicts that utils.overlay_dict() copied
+    to overlay source onto tree; all other sub-dicts are shared.
+    """
+    interned = {
+        sys.intern(key) if isinstance(key, str) else key: value
+        for key, value in tree.items()
+    }
+    for key, value in source.items():
+        if isinstance(value, Mapping):
+            key = key.lower() if isinstance(key, str) else key
+            interned[key] = _intern_paths(interned[key], value)
+    return interned
+
+
+class OverlayIndex(Mapping):
+    __slots__ = ("base", "layer", "_prefixes", "_length")
+
+    def __init__(self, base: Mapping, layer: Mapping) -> None:
+        """
+        An OverlayIndex is a read-only, flattened view of a flattened layer on
+        top of a flattened base, like a ChainMap of the two, except that keys
+        of base are hidden where layer replaces them or their parents, e.g.
+        ``db.host`` where layer sets ``db``, or ``db`` where it sets
+        ``db.host``.
+
+        :param base: flattened dict (or view) underneath
+        :param layer: flattened dict on top
+        """
+        self.base = base
+        self.layer = layer
+        self._prefixes = utils.parent_paths(layer)
+        self._length: Optional[int] = None
+
+    def _hidden(self, key: Any) -> bool:
+        return key in self._prefixes or (
+            isinstance(key, str) and utils.is_shadowed(key, self.layer)
+        )
+
+    def __getitem__(self, key: Any) -> Any:
+        if key in self.layer:
+            return self.layer[key]
+        if self._hidden(key):
+            raise KeyError(key)
+        return self.base[key]
+
+    def __iter__(self) -> Iterator:
+        layer = self.layer
+        for key in self.base:
+            if key in layer or not self._hidden(key):
+                yield key
+        base = self.base
+        for key in layer:
+            if key not in base:
+                yield key
+
+    def __len__(self) -> int:
+        if self._length is None:
+            self._length = sum(1 for _ in self)
+        return self._length
+
+
+class OverlaySnapshot(ConfigSnapshot):
+    #: snapshot of the parent registry this snapshot overlays
+    base: ConfigSnapshot
+    #: flattened values of the overlay layer
+    layer: Dict
+
+    def __init__(
+        self,
+        generation: int,
+        base: ConfigSnapshot,
+        layer: Dict,
+        key: Hashable = None,
+        compact: bool = False,
+    ) -> None:
+        """
+        An OverlaySnapshot holds the configuration of an overlay registry: the
+        snapshot of its parent registry with the overlay's own values on top.
+        Only the dicts along the overlay's keys are copied; everything else is
+        shared with the base snapshot, and the flattened dict is a view of the
+        base snapshot's with the layer on top (see OverlayIndex). Like a
+        CompactSnapshot, a compact overlay snapshot interns the keys it copies
+        and serves its flattened dict and trie from a CompactIndex.
+
+        :param generation: generation of the overlay's values merged in layer
+        :param base: snapshot of the parent registry
+        :param layer: flattened values of the overlay
+        :param key: cache key used by the registry to decide whether it is stale
+        :param compact: whether the parent registry is compact (False)
+        """
+        expanded = utils.expand_flattened_dict(layer)
+        config = utils.overlay_dict(expanded, base.dict)
+        if compact:
+            config = _intern_paths(config, expanded)
+        super().__init__(generation, config, key)
+        self.base = base
+        self.layer = layer
+        self._index = CompactIndex(config) if compact else None
+        self._view: Optional[OverlayIndex] = None
+
+    def explain(self, config_key: str) -> Optional[str]:
+        """
+        Returns "overlay" if config_key was set on the overlay, or else the
+        name of the layer of the base snapshot that set it (or None).
+
+        :param config_key: dotted path key
+        """
+        layer = self.layer
+        if config_key in layer:
+            return "overlay"
+        if utils.is_shadowed(config_key, layer) or any(
+            key.startswith(f"{config_key}.") for key in layer
+        ):
+            return None
+        return self.base.explain(config_key)
+
+    @property
+    def flattened(self) -> Mapping:  # type: ignore
+        """
+        Returns a flattened, read-only view of the merged configuration: the
+        overlay's values on top of the base snapshot's flattened dict.
+        """
+        if self._index is not None:
+            return self._index
+        if self._view is None:
+            self._view = OverlayIndex(self.base.flattened, self.layer)
+        return self._view
+
+    @property
+    def trie(self) -> Any:
+        """
+        Returns a KeyTrie of the snapshot's dotted keys (or, if compact, a
+        CompactIndex), building it on first access.
+        """
+        if self._index is not None:
+            return self._index
+        return super().trie
+
+
+class CompactIndex(Mapping):
+    __slots__ = ("tree", "separator", "_length")
+
+    def __init__(self, tree: Mapping, separator: str = ".") -> None:
+        """
+        A CompactIndex is a read-only, flattened view of a nested dict: it maps
+        dotted keys to values (like utils.flatten_dict) and matches wildcard
+        patterns (like KeyTrie) by walking the nested dict, without storing
+        any dotted keys of its own.
+
+        :param tree: nested dict to index
+        :param separator: separator between segments in keys and patterns
+        """
+        self.tree = tree
+        self.separator = separator
+        self._length: Optional[int] = None
+
+    def __getitem__(self, key: Any) -> Any:
+        if key in self.tree:
+            value = self.tree[key]
+        elif isinstance(key, str):
+            value = self.tree
+            for segment in key.split(self.separator):
+                if not isinstance(value, Mapping) or segment not in value:
+                    raise KeyError(key)
+                value = value[segment]
+        else:
+            raise KeyError(key)
+        if isinstance(value, Mapping):
+            raise KeyError(key)
+        return value
+
+    def __iter__(self) -> Iterator:
+        separator = self.separator
+        stack: List[Tuple[str, Iterator]] = [("", iter(self.tree.items()))]
+        while stack:
+            prefix, items = stack[-1]
+            for key, value in items:
+                if prefix:
+                    key = f"{prefix}{separator}{key}"
+                if isinstance(value, Mapping):
+                    stack.append((key, iter(value.items())))
+                    break
+                yield key
+            else:
+                stack.pop()
+
+    def __len__(self) -> int:
+        if self._length is None:
+            length = 0
+            stack = [self.tree]
+            while stack:
+                for value in stack.pop().values():
+                    if isinstance(value, Mapping):
+                        stack.append(value)
+                    else:
+                        length += 1
+            self._length = length
+        return self._length
+
+    def match(self, pattern: str) -> List[str]:
+        """
+        Returns a sorted list of the dotted keys matching pattern.
+
+        :param pattern: dotted key, optionally containing ``*`` or ``**`` segments
+        """
+        separator = self.separator
+        segments = pattern.split(separator)
+        matches: Set[str] = set()
+        seen: Set[Tuple[int, int]] = set()
+        stack: List[Tuple[Any, str, int]] = [(self.tree, "", 0)]
+        while stack:
+            value, key, index = stack.pop()
+            tree = isinstance(value, Mapping)
+            if tree:
+                if (id(value), index) in seen:
+                    continue
+                seen.add((id(value), index))
+            if index == len(segments):
+                if not tree:
+                    matches.add(key)
+                continue
+            segment = segments[index]
+            if segment == "**":
+                stack.append((value, key, index + 1))
+            if not tree:
+                continue
+            if segment in ("*", "**"):
+                following = index + 1 if segment == "*" else index
+                for child_key, child in value.items():
+                    child_key = f"{key}{separator}{child_key}" if key else child_key
+                    stack.append((child, child_key, following))
+            elif segment in value:
+                child_key = f"{key}{separator}{segment}" if key else segment
+                stack.append((value[segment], child_key, index + 1))
+        return sorted(matches)
+
+
+class CompactSnapshot(ConfigSnapshot):
+    def __init__(
+        self,
+        generation: int,
+        config: Dict,
+        key: Hashable = None,
+        sources: Optional[Dict[Hashable, List[Tuple[str, Any]]]] = None,
+        interned: bool = False,
+    ) -> None:
+        """
+        A CompactSnapshot is a ConfigSnapshot for very large configurations:
+        the keys of its merged dict are interned, so that segments repeated
+        throughout the tree (e.g. ``host`` under each service) are stored once,
+        and its flattened dict and trie are CompactIndex views of the merged
+        dict rather than copies of all of its keys.
+
+        :param generation: generation of the registry values merged in config
+        :param config: merged configuration dictionary
+        :param key: cache key used by the registry to decide whether it is stale
+        :param sources: layers merged into each top-level key, for explain()
+        :param interned: whether the keys of config are already interned, so
+            that config can be used without copying it (False)
+        """
+        if not interned:
+            config = utils.intern_keys(config)
+        super().__init__(generation, config, key, sources)
+        self._index = CompactIndex(self.dict)
+
+    @property
+    def flattened(self) -> CompactIndex:  # type: ignore
+        """
+        Returns a flattened, read-only view of the merged configuration.
+        """
+        return self._index
+
+    def replace(self, values: Dict) -> "CompactSnapshot":
+        """
+        Returns a copy of the snapshot with the given flattened values replaced.
+        Only the sections containing values are copied, and only their keys
+        are interned again.
+
+        :param values: values to replace, keyed by dotted path key
+        """
+        expanded = utils.expand_flattened_dict(values)
+        config = _intern_paths(utils.overlay_dict(expanded, self.dict), expanded)
+        return type(self)(
+            self.generation, config, self.key, self.sources, interned=True
+        )
+
+    @property
+    def trie(self) -> CompactIndex:  # type: ignore
+        """
+        Returns a view of the merged configuration that matches patterns like
+        KeyTrie.match().
+        """
+        return self._index
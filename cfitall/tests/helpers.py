@@ -0,0 +1,60 @@
+"""
+Helpers shared by the tests and benchmarks/.
+"""
+
+from typing import Dict, Iterable, Optional
+
+from cfitall.providers.base import ConfigProviderBase
+
+
+class DictProvider(ConfigProviderBase):
+    """
+    A provider serving a dict as it is. Pass revision=None for a provider
+    that reports no revision, so the registry re-reads it on every access,
+    and namespaces for a lazy provider, which counts its updates.
+
+    :param dict data: the configuration to serve
+    :param str provider_name: name of the provider
+    :param revision: initial revision, or None
+    :param namespaces: top-level keys to serve lazily (None)
+    """
+
+    def __init__(
+        self,
+        data: Dict,
+        provider_name: str = "dict",
+        revision: Optional[int] = 0,
+        namespaces: Optional[Iterable[str]] = None,
+    ) -> None:
+        self.provider_name = provider_name
+        self.data = data
+        self.updates = 0
+        self._revision = revision
+        if namespaces is not None:
+            self.namespaces = frozenset(namespaces)
+
+    @property
+    def dict(self) -> Dict:
+        return self.data
+
+    @property
+    def revision(self) -> Optional[int]:
+        return self._revision
+
+    def update(self) -> bool:
+        self.updates += 1
+        return True
+
+    def bump(self) -> None:
+        """
+        Bumps the revision (if any), as after changing data in place.
+        """
+        if self._revision is not None:
+            self._revision += 1
+
+    def replace(self, data: Dict) -> None:
+        """
+        Replaces data and bumps the revision.
+        """
+        self.data = data
+        self.bump()
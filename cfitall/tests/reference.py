@@ -0,0 +1,194 @@
+"""
+Slow reference implementations of cfitall's merge semantics, kept as they were
+written before any of them were optimized, for checking optimized code paths
+against (see test_equivalence.py and benchmarks/equivalence.py). Do not
+optimize these; their quirks are the specification:
+
+- merge_dicts() lowercases the keys it copies from source, but not the keys
+  already in destination, and raises AttributeError when merging a mapping
+  onto a non-mapping value.
+- Empty mappings are merged as empty dicts, but vanish when flattened.
+- Later layers win: defaults, then providers in order, then values set with
+  set() ("super").
+
+The random_* functions generate nested configurations for comparing these
+with the optimized implementations.
+"""
+
+from collections.abc import Mapping
+import random
+from typing import Any, Iterable, Optional
+
+_WORDS = ["app", "cache", "db", "host", "log", "port", "queue", "tls", "user"]
+
+
+def merge_dicts(source: Mapping, destination: dict) -> dict:
+    for key, value in source.items():
+        key = key.lower() if isinstance(key, str) else key
+        if isinstance(value, Mapping):
+            node = destination.setdefault(key, {})
+            merge_dicts(value, node)
+        else:
+            destination[key] = value
+    return destination
+
+
+def add_keys(destdict: dict, srclist: list, value=None) -> dict:
+    if len(srclist) > 1:
+        destdict[srclist[0]] = {}
+        destdict[srclist[0]] = destdict.get(srclist[0], {})
+        add_keys(destdict[srclist[0]], srclist[1:], value)
+    else:
+        destdict[srclist[0]] = value
+    return destdict
+
+
+def expand_flattened_path(
+    flattened_path: str, value=None, separator: str = "."
+) -> dict:
+    return add_keys({}, flattened_path.split(separator), value)
+
+
+def flatten_dict(nested: dict) -> dict:
+    flattened = {}
+    for key, value in nested.items():
+        if isinstance(value, Mapping):
+            for subkey, subval in value.items():
+                newkey = ".".join([key, subkey])
+                flattened[newkey] = subval
+            flatten_dict(flattened)
+        else:
+            flattened[key] = value
+    mappings = [isinstance(value, Mapping) for key, value in flattened.items()]
+    if len(set(mappings)) == 1 and set(mappings).pop() is False:
+        return flattened
+    elif len(set(mappings)) > 0:
+        return flatten_dict(flattened)
+    return {}
+
+
+def expand_flattened_dict(flattened: dict, separator: str = ".") -> dict:
+    merged: dict = {}
+    for key, value in flattened.items():
+        expanded = expand_flattened_path(key, value=value, separator=separator)
+        merged = merge_dicts(merged, expanded)
+    return merged
+
+
+def expand_mixed_dict(mixed: Mapping, separator: str = ".") -> dict:
+    expanded: dict = {}
+    for key, value in mixed.items():
+        merge_dicts(expand_flattened_path(key, value, separator=separator), expanded)
+    return expanded
+
+
+def merge_layers(defaults: Mapping, providers: Iterable[Mapping], super_: Mapping):
+    """
+    Merges the layers of a registry the way ConfigurationRegistry originally
+    did: a chain of merge_dicts() calls from defaults to super.
+    """
+    config = merge_dicts(defaults, {})
+    for provider in providers:
+        config = merge_dicts(provider, config)
+    return merge_dicts(super_, config)
+
+
+def random_shape(rng: random.Random, leaves: int, fanout: int = 8) -> dict:
+    """
+    Returns the shape of a random nested configuration with the given number
+    of leaf keys: a nested dict whose leaves are None, and which may contain
+    empty dicts (empty sections). Keys are lowercase and unique per level.
+
+    :param rng: random number generator
+    :param leaves: number of leaf keys
+    :param fanout: maximum number of keys per section before nesting deeper
+    """
+    shape: dict = {}
+    while leaves > 0:
+        key = f"{rng.choice(_WORDS)}{len(shape)}"
+        if leaves <= fanout or rng.random() < 0.2:
+            if rng.random() < 0.05:
+                shape[f"{key}x"] = {}
+            shape[key] = None
+            leaves -= 1
+        else:
+            size = rng.randint(1, max(1, 2 * leaves // fanout))
+            shape[key] = random_shape(rng, size, fanout)
+            leaves -= size
+    return shape
+
+
+def random_value(rng: random.Random) -> Any:
+    """
+    Returns a random leaf value.
+    """
+    kind = rng.randrange(6)
+    if kind == 0:
+        return rng.randrange(100_000)
+    if kind == 1:
+        return rng.random()
+    if kind == 2:
+        return rng.choice([True, False, None])
+    if kind == 3:
+        return [rng.randrange(10) for _ in range(rng.randrange(3))]
+    return rng.choice(_WORDS) * rng.randint(1, 3)
+
+
+def random_layer(rng: random.Random, shape: dict, density: float = 0.5) -> dict:
+    """
+    Returns a random configuration layer following shape: each key of shape is
+    included with probability density, in random case (sometimes twice, in
+    different cases), with a random value or nested layer.
+
+    :param rng: random number generator
+    :param shape: shape returned by random_shape()
+    :param density: probability of including each key
+    """
+    layer = {}
+    for key, subshape in shape.items():
+        if rng.random() >= density:
+            continue
+        variants = [key, key.upper(), key.capitalize()]
+        for variant in rng.sample(variants, 2 if rng.random() < 0.05 else 1):
+            if subshape is None:
+                layer[variant] = random_value(rng)
+            else:
+                layer[variant] = random_layer(rng, subshape, density)
+    return layer
+
+
+def random_mixed(rng: random.Random, nested: Mapping, dotted: float = 0.5) -> dict:
+    """
+    Returns nested with some of its sections flattened into dotted keys, as
+    accepted by set_many() and expand_mixed_dict().
+
+    :param rng: random number generator
+    :param nested: nested configuration to partially flatten
+    :param dotted: probability of flattening each section
+    """
+    mixed: dict = {}
+    for key, value in nested.items():
+        if isinstance(value, Mapping) and value and rng.random() < dotted:
+            for subkey, subvalue in random_mixed(rng, value, dotted).items():
+                mixed[f"{key}.{subkey}"] = subvalue
+        elif isinstance(value, Mapping):
+            mixed[key] = random_mixed(rng, value, dotted)
+        else:
+            mixed[key] = value
+    return mixed
+
+
+def random_path(rng: random.Random, shape: dict) -> Optional[str]:
+    """
+    Returns a random dotted path of a leaf or section in shape, in random case,
+    or None if shape is empty.
+    """
+    path = []
+    node: Optional[dict] = shape
+    while node:
+        key = rng.choice(list(node))
+        path.append(rng.choice([key, key.upper()]))
+        node = node[key]
+        if rng.random() < 0.3:
+            break
+    return ".".join(path) or None
@@ -1,12 +1,56 @@
+import asyncio
 import decimal
+import json
 import os
+import sys
+import tempfile
+import threading
 import unittest
 
+from cfitall.providers.base import ConfigProviderBase
 from cfitall.registry import ConfigurationRegistry
 from cfitall.providers.environment import EnvironmentProvider
 from cfitall.providers.filesystem import FilesystemProvider
 
 
+class LazyProvider(ConfigProviderBase):
+    def __init__(self, provider_name, data, namespaces):
+        self.provider_name = provider_name
+        self.namespaces = frozenset(namespaces)
+        self.updates = 0
+        self._data = data
+
+    @property
+    def dict(self):
+        return self._data if self.updates else {}
+
+    @property
+    def revision(self):
+        return self.updates
+
+    def update(self):
+        self.updates += 1
+        return True
+
+
+class InPlaceProvider(ConfigProviderBase):
+    def __init__(self, data, revision=None):
+        self.provider_name = "in_place"
+        self.data = data
+        self._revision = revision
+
+    @property
+    def dict(self):
+        return self.data
+
+    @property
+    def revision(self):
+        return self._revision
+
+    def update(self):
+        return True
+
+
 class TestConfigRegistry(unittest.TestCase):
     def setUp(self):
         super().setUp()
@@ -171,6 +215,18 @@ class TestConfigRegistry(unittest.TestCase):
             cf.get_list("global.path"), ["/Users/wryfi", "/Users/wryfi/tmp"]
         )
 
+    def test_get_section(self):
+        cf = ConfigurationRegistry("test", providers=[])
+        cf.set_defaults_many({"db.host": "localhost", "db.tls.verify": True})
+        self.assertEqual(
+            cf.get_section("db"), {"host": "localhost", "tls": {"verify": True}}
+        )
+        self.assertEqual(cf.get_section("db.tls"), {"verify": True})
+        self.assertIsNone(cf.get_section("db.host"))
+        self.assertIsNone(cf.get_section("nope"))
+        cf.get_section("db")["host"] = "changed"
+        self.assertEqual(cf.get("db.host"), "localhost")
+
     def test_get_string(self):
         cf = ConfigurationRegistry("cfitall")
         cf.set_default("string.bool", True)
@@ -199,6 +255,395 @@ class TestConfigRegistry(unittest.TestCase):
         self.assertEqual(cf.values["defaults"]["foo"]["bar"], 42)
         self.assertEqual(cf.get("foo.bar"), 42)
 
+    def test_set_many(self):
+        cf = ConfigurationRegistry("test", providers=[])
+        cf.set_default("foo.bar", 420)
+        generation = cf.generation
+        cf.set_many({"foo.bar": 42, "foo": {"baz": "bat"}, "Hello.World": True})
+        self.assertEqual(cf.generation, generation + 1)
+        self.assertEqual(cf.get("foo.bar"), 42)
+        self.assertEqual(cf.get("foo.baz"), "bat")
+        self.assertTrue(cf.get("hello.world"))
+        self.assertEqual(
+            cf.values["super"],
+            {"foo": {"bar": 42, "baz": "bat"}, "hello": {"world": True}},
+        )
+
+    def test_set_many_later_keys_win(self):
+        cf = ConfigurationRegistry("test", providers=[])
+        cf.set_many({"foo": {"bar": 1, "baz": 2}, "foo.bar": 3})
+        self.assertEqual(cf.dict, {"foo": {"bar": 3, "baz": 2}})
+
+    def test_set_defaults_many(self):
+        defaults = {"foo": {"bar": 1}}
+        cf = ConfigurationRegistry("test", defaults=defaults, providers=[])
+        cf.set_defaults_many({"foo.baz": 2, "bat": [1, 2]})
+        self.assertEqual(cf.dict, {"foo": {"bar": 1, "baz": 2}, "bat": [1, 2]})
+        self.assertEqual(defaults, {"foo": {"bar": 1}})
+
+    def test_snapshot_reused(self):
+        cf = ConfigurationRegistry("cfitall")
+        cf.set_default("foo.bar", 42)
+        snapshot = cf._get_snapshot()
+        self.assertIs(cf._get_snapshot(), snapshot)
+        os.environ["CFITALL__FOO__BAR"] = "43"
+        self.assertIsNot(cf._get_snapshot(), snapshot)
+        self.assertEqual(cf.get("foo.bar"), "43")
+        cf.set("foo.bar", 44)
+        self.assertEqual(cf.get("foo.bar"), 44)
+
+    def test_update_unchanged(self):
+        cf = ConfigurationRegistry("cfitall_update", providers=[])
+        cf.providers.register(EnvironmentProvider("cfitall_update"))
+        cf.update()
+        snapshot, generation = cf._get_snapshot(), cf.generation
+        cf.update()
+        self.assertEqual(cf.generation, generation)
+        self.assertIs(cf._get_snapshot(), snapshot)
+
+    def test_environment_default_types(self):
+        os.environ["CFITALL__DB__PORT"] = "5432"
+        self.addCleanup(os.environ.pop, "CFITALL__DB__PORT", None)
+        cf = ConfigurationRegistry("cfitall", defaults={"db": {"port": 1}})
+        self.assertEqual(cf.get("db.port"), "5432")
+        cf = ConfigurationRegistry(
+            "cfitall", defaults={"db": {"host": "localhost"}}, cast_environment=True
+        )
+        self.assertEqual(cf.get("db.port"), "5432")
+        cf.set_default("db.port", 1)
+        self.assertEqual(cf.get("db.port"), 5432)
+        cf.set("other", True)
+        environment = cf.providers.get("environment")
+        revision = environment.revision
+        cf.set("other", False)
+        self.assertEqual(environment.revision, revision)
+        explicit = EnvironmentProvider("cfitall", defaults={})
+        cf = ConfigurationRegistry(
+            "cfitall",
+            defaults={"db": {"port": 1}},
+            providers=[explicit],
+            cast_environment=True,
+        )
+        self.assertEqual(cf.get("db.port"), "5432")
+
+    def test_dict_is_copy(self):
+        cf = ConfigurationRegistry("test", providers=[])
+        cf.set_default("foo.bar", 42)
+        cf.dict["foo"]["bar"] = 43
+        self.assertEqual(cf.get("foo.bar"), 42)
+
+    def test_find(self):
+        cf = ConfigurationRegistry("test", providers=[])
+        cf.set_defaults_many(
+            {
+                "services.web.url": "http://web",
+                "services.api.url": "http://api",
+                "services.api.port": 8080,
+            }
+        )
+        self.assertEqual(
+            cf.find("services.*.url"),
+            {"services.api.url": "http://api", "services.web.url": "http://web"},
+        )
+        cf.set("services.db.url", "postgres://db")
+        self.assertEqual(len(cf.find("services.**.url")), 3)
+
+    def test_override(self):
+        cf = ConfigurationRegistry("test", providers=[])
+        cf.set_default("feature.x", False)
+        cf.set_default("feature.y", "why")
+        generation = cf.generation
+        with cf.override({"feature.x": True}):
+            self.assertTrue(cf.get("feature.x"))
+            self.assertTrue(cf.dict["feature"]["x"])
+            self.assertEqual(cf.flattened, {"feature.x": True, "feature.y": "why"})
+            with cf.override({"feature": {"y": "nested"}, "extra": 1}):
+                self.assertTrue(cf.get_bool("feature.x"))
+                self.assertEqual(cf.get("feature.y"), "nested")
+                self.assertEqual(cf.get_int("extra"), 1)
+            self.assertEqual(cf.get("feature.y"), "why")
+            self.assertIsNone(cf.get("extra"))
+        self.assertFalse(cf.get("feature.x"))
+        self.assertEqual(cf.generation, generation)
+
+    def test_override_shadows_subtree(self):
+        cf = ConfigurationRegistry("test", providers=[])
+        cf.set_default("feature.x", False)
+        with cf.override({"feature": "off"}):
+            self.assertEqual(cf.get("feature"), "off")
+            self.assertIsNone(cf.get("feature.x"))
+            self.assertEqual(cf.find("**"), {"feature": "off"})
+            with cf.override({"feature.x": True}):
+                self.assertIsNone(cf.get("feature"))
+                self.assertTrue(cf.get("feature.x"))
+
+    def test_override_thread_local(self):
+        cf = ConfigurationRegistry("test", providers=[])
+        cf.set_default("feature.x", False)
+        seen = []
+        with cf.override({"feature.x": True}):
+            thread = threading.Thread(target=lambda: seen.append(cf.get("feature.x")))
+            thread.start()
+            thread.join()
+        self.assertEqual(seen, [False])
+
+    def test_override_task_local(self):
+        cf = ConfigurationRegistry("test", providers=[])
+        cf.set_default("feature.x", 0)
+
+        async def read(value):
+            with cf.override({"feature.x": value}):
+                await asyncio.sleep(0)
+                return cf.get("feature.x")
+
+        async def main():
+            return await asyncio.gather(read(1), read(2), read(3))
+
+        self.assertEqual(asyncio.run(main()), [1, 2, 3])
+        self.assertEqual(cf.get("feature.x"), 0)
+
+    def test_lazy_provider(self):
+        catalog = LazyProvider("catalog", {"catalog": {"size": 3}}, ["catalog"])
+        cf = ConfigurationRegistry("test", providers=[catalog])
+        cf.update()
+        self.assertEqual(catalog.updates, 0)
+        cf.set_default("catalog.size", 1)
+        self.assertIsNone(cf.get("other.key"))
+        self.assertEqual(catalog.updates, 0)
+        self.assertEqual(cf.get("catalog.size"), 3)
+        self.assertEqual(catalog.updates, 1)
+        cf.update()
+        self.assertEqual(catalog.updates, 2)
+
+    def test_lazy_provider_export(self):
+        catalog = LazyProvider(
+            "catalog", {"catalog": {"size": 3}, "stray": True}, ["catalog"]
+        )
+        cf = ConfigurationRegistry("test", providers=[catalog])
+        self.assertEqual(cf.dict, {"catalog": {"size": 3}})
+        self.assertEqual(catalog.updates, 1)
+        self.assertIsNone(cf.get("stray"))
+
+    def test_lazy_provider_get_section(self):
+        catalog = LazyProvider("catalog", {"catalog": {"size": 3}}, ["catalog"])
+        cf = ConfigurationRegistry("test", providers=[catalog])
+        cf.set_default("db.host", "localhost")
+        self.assertEqual(cf.get_section("db"), {"host": "localhost"})
+        self.assertEqual(catalog.updates, 0)
+        self.assertEqual(cf.get_section("catalog"), {"size": 3})
+        self.assertEqual(catalog.updates, 1)
+
+    def test_lazy_provider_find(self):
+        catalog = LazyProvider("catalog", {"catalog": {"size": 3}}, ["catalog"])
+        cf = ConfigurationRegistry("test", providers=[catalog])
+        self.assertEqual(cf.find("other.*"), {})
+        self.assertEqual(catalog.updates, 0)
+        self.assertEqual(cf.find("*.size"), {"catalog.size": 3})
+
+    def test_lazy_provider_large_file(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with open(os.path.join(tmpdir, "catalog.json"), "w") as file_:
+                json.dump({"catalog": {"size": 3}, "features": {"x": True}}, file_)
+            catalog = FilesystemProvider(
+                [tmpdir],
+                "catalog",
+                provider_name="catalog",
+                namespaces=["catalog", "features"],
+                large_file=True,
+            )
+            cf = ConfigurationRegistry("test", providers=[catalog])
+            cf.update()
+            self.assertEqual(cf.get("catalog.size"), 3)
+            self.assertEqual(list(catalog.dict._sections), ["catalog"])
+            self.assertTrue(cf.get("features.x"))
+            self.assertEqual(list(catalog.dict._sections), ["catalog", "features"])
+
+    def test_compact(self):
+        defaults = {"services": {"web": {"url": "http://web", "port": 80}}, "x": 1}
+        cf = ConfigurationRegistry("test", defaults=defaults, providers=[])
+        compact = ConfigurationRegistry(
+            "test", defaults=defaults, providers=[], compact=True
+        )
+        compact.set("services.api.url", "http://api")
+        cf.set("services.api.url", "http://api")
+        self.assertEqual(compact.dict, cf.dict)
+        self.assertEqual(compact.flattened, cf.flattened)
+        self.assertEqual(compact.config_keys, cf.config_keys)
+        self.assertEqual(compact.find("services.*.url"), cf.find("services.*.url"))
+        self.assertEqual(compact.get("services.web.port"), 80)
+        self.assertIsNone(compact.get("services.web"))
+        self.assertEqual(compact.json, cf.json)
+
+    def test_compact_shares_sections(self):
+        cf = ConfigurationRegistry("test", providers=[], compact=True)
+        cf.set_defaults_many({"db.host": "localhost", "cache.size": 1})
+        before = cf.snapshot()
+        cf.set("db.host", "db.example.com")
+        after = cf.snapshot()
+        self.assertIs(after.dict["cache"], before.dict["cache"])
+        # the snapshot holds the merged sections themselves, not interned copies
+        for key, section in after.dict.items():
+            self.assertIs(section, cf._sections[key][1])
+        self.assertIs(list(after.dict["db"])[0], sys.intern("host"))
+        self.assertEqual(
+            cf.diff(before).changed, {"db.host": ("localhost", "db.example.com")}
+        )
+
+    def test_diff(self):
+        cf = ConfigurationRegistry(
+            "cfitall", providers=[EnvironmentProvider("cfitall")]
+        )
+        cf.set_defaults_many({"db.host": "localhost", "db.port": 5432, "cache.size": 1})
+        before = cf.snapshot()
+        self.assertFalse(cf.diff(before))
+        cf.set_many({"db.host": "db.example.com", "db.user": "app"})
+        os.environ["CFITALL__CACHE__SIZE"] = "2"
+        after = cf.snapshot()
+        diff = cf.diff(before, after)
+        self.assertEqual(diff.added, {"db.user": "app"})
+        self.assertEqual(diff.removed, {})
+        self.assertEqual(
+            diff.changed,
+            {"db.host": ("localhost", "db.example.com"), "cache.size": (1, "2")},
+        )
+        self.assertEqual(cf.diff(after, before).removed, {"db.user": "app"})
+        del os.environ["CFITALL__CACHE__SIZE"]
+        self.assertEqual(cf.diff(after).changed, {"cache.size": ("2", 1)})
+
+    def test_snapshot_shares_sections(self):
+        cf = ConfigurationRegistry("test", providers=[])
+        cf.set_defaults_many({"db.host": "localhost", "cache.size": 1})
+        before = cf.snapshot()
+        cf.set("db.host", "db.example.com")
+        after = cf.snapshot()
+        self.assertIsNot(after, before)
+        self.assertIs(after.dict["cache"], before.dict["cache"])
+        self.assertIsNot(after.dict["db"], before.dict["db"])
+        self.assertEqual(before.dict["db"], {"host": "localhost"})
+
+    def test_sections_changed_in_place(self):
+        provider = InPlaceProvider({"db": {"host": "a"}})
+        cf = ConfigurationRegistry("test", providers=[provider])
+        self.assertEqual(cf.get("db.host"), "a")
+        provider.data["db"]["host"] = "b"
+        self.assertEqual(cf.get("db.host"), "b")
+        provider._revision = 1
+        self.assertEqual(cf.get("db.host"), "b")
+        provider.data["db"]["host"] = "c"
+        provider._revision = 2
+        self.assertEqual(cf.get("db.host"), "c")
+        snapshot = cf.snapshot()
+        self.assertEqual(cf.all["in_place"], {"db": {"host": "c"}})
+        self.assertEqual(cf.values["super"], {})
+        self.assertIs(cf.snapshot(), snapshot)
+
+    def test_explain(self):
+        os.environ["CFITALL__DB__PORT"] = "5433"
+        self.addCleanup(os.environ.pop, "CFITALL__DB__PORT", None)
+        cf = ConfigurationRegistry(
+            "cfitall", providers=[EnvironmentProvider("cfitall")]
+        )
+        cf.set_defaults_many(
+            {"db.host": "localhost", "db.port": 5432, "db.user": "app"}
+        )
+        cf.set("db.user", "admin")
+        self.assertEqual(cf.explain("db.host"), "defaults")
+        self.assertEqual(cf.explain("db.port"), "environment")
+        self.assertEqual(cf.explain("db.user"), "super")
+        self.assertIsNone(cf.explain("db"))
+        self.assertIsNone(cf.explain("nope"))
+        with cf.override({"db.host": "test"}):
+            self.assertEqual(cf.explain("db.host"), "override")
+            self.assertEqual(cf.explain("db.port"), "environment")
+        tenant = cf.overlay("tenant", {"db.host": "tenant-db"})
+        self.assertEqual(tenant.explain("db.host"), "overlay")
+        self.assertEqual(tenant.explain("db.port"), "environment")
+
+    def test_explain_mixed_case(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with open(os.path.join(tmpdir, "test.json"), "w") as file_:
+                json.dump({"DB": {"Host": "file-db"}, "x": {"y": 1}}, file_)
+            cf = ConfigurationRegistry(
+                "test", providers=[FilesystemProvider([tmpdir], "test")]
+            )
+            cf.update()
+            cf.set_default("db.host", "localhost")
+            cf.set("x", 2)
+            self.assertEqual(cf.explain("db.host"), "filesystem")
+            self.assertEqual(cf.explain("x"), "super")
+            self.assertIsNone(cf.explain("x.y"))
+
+    def test_overlay(self):
+        cf = ConfigurationRegistry("test", providers=[])
+        cf.set_defaults_many({"db.host": "localhost", "db.port": 5432, "x": 1})
+        tenant = cf.overlay("tenant", {"db.host": "tenant-db"})
+        self.assertEqual(tenant.get("db.host"), "tenant-db")
+        self.assertEqual(tenant.get("db.port"), 5432)
+        self.assertEqual(cf.get("db.host"), "localhost")
+        self.assertEqual(
+            tenant.dict, {"db": {"host": "tenant-db", "port": 5432}, "x": 1}
+        )
+        self.assertEqual(
+            tenant.flattened, {"db.host": "tenant-db", "db.port": 5432, "x": 1}
+        )
+        self.assertEqual(tenant.find("db.*"), {"db.host": "tenant-db", "db.port": 5432})
+        with self.assertRaises(TypeError):
+            tenant.set_default("y", 2)
+
+    def test_overlay_shares_base(self):
+        cf = ConfigurationRegistry("test", providers=[])
+        cf.set_defaults_many({"db.host": "localhost", "cache": {"size": 10}})
+        tenant = cf.overlay("tenant", {"db.host": "tenant-db"})
+        snapshot = tenant._get_snapshot()
+        self.assertIs(snapshot.dict["cache"], cf._get_snapshot().dict["cache"])
+        self.assertIs(tenant._get_snapshot(), snapshot)
+        cf.set("cache.size", 20)
+        self.assertEqual(tenant.get("cache.size"), 20)
+        self.assertEqual(tenant.dict["cache"], {"size": 20})
+        self.assertIsNot(tenant._get_snapshot(), snapshot)
+        tenant.set("cache.size", 30)
+        self.assertEqual(tenant.get("cache.size"), 30)
+        self.assertEqual(cf.get("cache.size"), 20)
+
+    def test_overlay_replaces_subtree(self):
+        cf = ConfigurationRegistry("test", providers=[])
+        cf.set_defaults_many({"db": {"host": "localhost", "port": 5432}, "x": 1})
+        tenant = cf.overlay("tenant", {"db": "sqlite", "x.y": 2})
+        self.assertEqual(tenant.get("db"), "sqlite")
+        self.assertIsNone(tenant.get("db.host"))
+        self.assertIsNone(tenant.get("x"))
+        self.assertEqual(tenant.get("x.y"), 2)
+        self.assertEqual(tenant.flattened, {"db": "sqlite", "x.y": 2})
+        self.assertEqual(tenant.dict, {"db": "sqlite", "x": {"y": 2}})
+        self.assertEqual(tenant.find("**"), {"db": "sqlite", "x.y": 2})
+
+    def test_overlay_compact(self):
+        cf = ConfigurationRegistry("test", providers=[], compact=True)
+        cf.set_defaults_many({"services": {"web": {"host": "web"}}})
+        tenant = cf.overlay("tenant", {"services.api.host": "api"})
+        self.assertTrue(tenant.compact)
+        snapshot = tenant._get_snapshot()
+        self.assertIs(snapshot.flattened, snapshot.trie)
+        self.assertIs(list(snapshot.dict["services"]["api"])[0], sys.intern("host"))
+        self.assertEqual(
+            tenant.find("services.*.host"),
+            {"services.api.host": "api", "services.web.host": "web"},
+        )
+        self.assertEqual(
+            tenant.flattened, {"services.api.host": "api", "services.web.host": "web"}
+        )
+
+    def test_overlay_override(self):
+        cf = ConfigurationRegistry("test", providers=[])
+        cf.set_default("foo", 1)
+        tenant = cf.overlay("tenant", {"bar": 2})
+        with tenant.override({"foo": 3}):
+            self.assertEqual(tenant.get("foo"), 3)
+            self.assertEqual(tenant.dict, {"foo": 3, "bar": 2})
+            self.assertEqual(cf.get("foo"), 1)
+        with cf.override({"foo": 4}):
+            self.assertEqual(tenant.get("foo"), 1)
+
     def test_providers_empty_list(self):
         cf = ConfigurationRegistry("cfitall", providers=[])
         with self.assertRaises(KeyError):
@@ -0,0 +1,188 @@
+import copy
+import random
+import unittest
+
+from cfitall import utils
+from cfitall.registry import ConfigurationRegistry
+from cfitall.tests import reference
+from cfitall.tests.helpers import DictProvider
+
+TRIALS = 100
+
+
+def outcome(function, *args):
+    """
+    Returns the result of function, or the type of the exception it raised.
+    """
+    try:
+        return function(*args)
+    except Exception as ex:
+        return type(ex)
+
+
+def subshape(shape, path):
+    """
+    Returns the shape of a dotted path in shape (None for a leaf).
+    """
+    for segment in path.lower().split("."):
+        shape = shape[segment]
+    return shape
+
+
+def conflicting(rng, shape, rate=0.3):
+    """
+    Returns a copy of shape with some leaves replaced by sections and some
+    sections by leaves, so that layers following either shape conflict.
+    """
+    swapped = {}
+    for key, value in shape.items():
+        if rng.random() < rate:
+            value = {"user0": None} if value is None else None
+        elif value is not None:
+            value = conflicting(rng, value, rate)
+        swapped[key] = value
+    return swapped
+
+
+class UtilsEquivalenceTests(unittest.TestCase):
+    def test_flatten_dict(self):
+        rng = random.Random(1)
+        for _ in range(TRIALS):
+            nested = reference.random_layer(rng, reference.random_shape(rng, 40), 0.8)
+            mixed = reference.random_mixed(rng, nested)
+            for config in (nested, mixed):
+                expected = reference.flatten_dict(copy.deepcopy(config))
+                self.assertEqual(
+                    list(utils.flatten_dict(config).items()), list(expected.items())
+                )
+
+    def test_merge_dicts(self):
+        rng = random.Random(2)
+        for _ in range(TRIALS):
+            shape = reference.random_shape(rng, 20, 4)
+            source = reference.random_layer(rng, shape, 0.8)
+            destination = reference.random_layer(rng, conflicting(rng, shape), 0.8)
+            expected = outcome(
+                reference.merge_dicts, source, copy.deepcopy(destination)
+            )
+            merged = outcome(utils.merge_dicts, source, copy.deepcopy(destination))
+            self.assertEqual(merged, expected)
+
+    def test_overlay_dict(self):
+        rng = random.Random(3)
+        for _ in range(TRIALS):
+            shape = reference.random_shape(rng, 40)
+            source = reference.random_layer(rng, shape)
+            destination = reference.merge_dicts(reference.random_layer(rng, shape), {})
+            original = copy.deepcopy(destination)
+            expected = reference.merge_dicts(source, copy.deepcopy(destination))
+            self.assertEqual(utils.overlay_dict(source, destination), expected)
+            self.assertEqual(destination, original)
+
+    def test_expand(self):
+        rng = random.Random(4)
+        for _ in range(TRIALS):
+            nested = reference.random_layer(rng, reference.random_shape(rng, 40), 0.8)
+            flattened = reference.flatten_dict(copy.deepcopy(nested))
+            self.assertEqual(
+                utils.expand_flattened_dict(flattened),
+                reference.expand_flattened_dict(flattened),
+            )
+            mixed = reference.random_mixed(rng, nested)
+            self.assertEqual(
+                utils.expand_mixed_dict(mixed), reference.expand_mixed_dict(mixed)
+            )
+
+
+class RegistryEquivalenceTests(unittest.TestCase):
+    def assertMatches(self, cf, defaults, providers, super_, compact=False):
+        layers = [cf.providers.get(name).dict for name in cf.providers.ordering]
+        expected = reference.merge_layers(defaults, layers, super_)
+        flattened = reference.flatten_dict(copy.deepcopy(expected))
+        self.assertEqual(cf.dict, expected)
+        if compact:
+            self.assertEqual(dict(cf.flattened), flattened)
+        else:
+            self.assertEqual(list(cf.flattened.items()), list(flattened.items()))
+        self.assertEqual(cf.config_keys, sorted(flattened))
+        for key, value in flattened.items():
+            self.assertEqual(cf.get(key), value)
+        for key, value in expected.items():
+            if isinstance(value, dict):
+                self.assertEqual(cf.get_section(key), value)
+
+    def check_mutations(self, seed, compact):
+        rng = random.Random(seed)
+        for _ in range(TRIALS // 4):
+            shape = reference.random_shape(rng, 30, 4)
+            defaults = reference.random_layer(rng, shape)
+            super_: dict = {}
+            # p2 reports no revision, so in-place changes to it are not bumped
+            providers = [
+                DictProvider(
+                    reference.random_layer(rng, shape),
+                    f"p{index}",
+                    None if index == 2 else 0,
+                )
+                for index in range(3)
+            ]
+            cf = ConfigurationRegistry(
+                "equivalence",
+                defaults=copy.deepcopy(defaults),
+                providers=providers,
+                compact=compact,
+            )
+            self.assertMatches(cf, defaults, providers, super_, compact)
+            for _ in range(10):
+                action = rng.randrange(5)
+                if action < 2 or action == 4:
+                    path = reference.random_path(rng, shape)
+                    sub = subshape(shape, path)
+                    value = (
+                        reference.random_value(rng)
+                        if sub is None
+                        else reference.random_layer(rng, sub)
+                    )
+                    if action == 4:
+                        provider = rng.choice(providers)
+                        layer = provider.data
+                    else:
+                        layer = super_ if action == 0 else defaults
+                    reference.merge_dicts(
+                        reference.expand_flattened_dict({path: value}), layer
+                    )
+                    if action == 0:
+                        cf.set(path, value)
+                    elif action == 1:
+                        cf.set_default(path, value)
+                    else:
+                        provider.bump()
+                elif action == 2:
+                    rng.choice(providers).replace(reference.random_layer(rng, shape))
+                else:
+                    cf.providers.set_priority(
+                        rng.choice(providers).provider_name, rng.random()
+                    )
+                self.assertMatches(cf, defaults, providers, super_, compact)
+            cf.freeze()
+            self.assertMatches(cf, defaults, providers, super_, compact)
+
+    def test_mutations(self):
+        self.check_mutations(5, compact=False)
+
+    def test_mutations_compact(self):
+        self.check_mutations(6, compact=True)
+
+    def test_conflicts(self):
+        rng = random.Random(7)
+        for _ in range(TRIALS):
+            shape = reference.random_shape(rng, 10, 3)
+            defaults = reference.random_layer(rng, shape, 0.8)
+            data = reference.random_layer(rng, conflicting(rng, shape), 0.8)
+            expected = outcome(reference.merge_layers, defaults, [data], {})
+            cf = ConfigurationRegistry(
+                "equivalence",
+                defaults=defaults,
+                providers=[DictProvider(data, "conflicts")],
+            )
+            self.assertEqual(outcome(lambda: cf.dict), expected)
@@ -0,0 +1,100 @@
+import decimal
+import os
+import unittest
+
+from cfitall.frozen import FrozenError
+from cfitall.providers.environment import EnvironmentProvider
+from cfitall.registry import ConfigurationRegistry
+
+
+class FrozenRegistryTests(unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        os.environ["CFITALL_FROZEN__DB__PORT"] = "5432"
+        self.cf = ConfigurationRegistry(
+            "cfitall_frozen",
+            defaults={
+                "db": {"host": "localhost", "port": 1, "ratio": "0.5", "tls": "yes"},
+                "hosts": "a, b",
+                "list": [1, 2],
+            },
+            providers=[EnvironmentProvider("cfitall_frozen")],
+        )
+
+    def tearDown(self):
+        os.environ.pop("CFITALL_FROZEN__DB__PORT", None)
+        super().tearDown()
+
+    def test_accessors(self):
+        live = {
+            "get": self.cf.get("db.port"),
+            "int": self.cf.get_int("db.port"),
+            "float": self.cf.get_float("db.port"),
+            "decimal": self.cf.get_decimal("db.ratio"),
+            "bool": self.cf.get_bool("db.tls"),
+            "csv": self.cf.get_list("hosts"),
+            "list": self.cf.get_list("list", csv=False),
+            "section": self.cf.get_section("db"),
+            "string": self.cf.get_string("db.port"),
+            "dict": self.cf.dict,
+        }
+        self.cf.freeze()
+        self.assertTrue(self.cf.frozen)
+        for _ in range(2):
+            self.assertEqual(self.cf.get("db.port"), live["get"])
+            self.assertEqual(self.cf.get_int("db.port"), live["int"])
+            self.assertEqual(self.cf.get_float("db.port"), live["float"])
+            self.assertEqual(self.cf.get_decimal("db.ratio"), decimal.Decimal("0.5"))
+            self.assertEqual(self.cf.get_bool("db.tls"), live["bool"])
+            self.assertEqual(self.cf.get_list("hosts"), live["csv"])
+            self.assertEqual(self.cf.get_list("list", csv=False), live["list"])
+            self.assertEqual(self.cf.get_section("db"), live["section"])
+            self.assertIs(type(self.cf.get_section("db")), dict)
+            self.assertEqual(self.cf.get_string("db.port"), live["string"])
+            self.assertEqual(self.cf.dict, live["dict"])
+        for getter in ("get", "get_int", "get_bool", "get_list", "get_section"):
+            self.assertIsNone(getattr(self.cf, getter)("missing"))
+        self.assertIsNone(self.cf.get_string("missing"))
+        self.assertIsNone(self.cf.get_section("db.host"))
+        self.assertIsNone(self.cf.get(["db", "host"]))
+        with self.assertRaises(ValueError):
+            self.cf.get_int("db.host")
+        self.cf.get_list("hosts").append("c")
+        self.assertEqual(self.cf.get_list("hosts"), ["a", "b"])
+        self.cf.get_section("db")["host"] = "changed"
+        self.assertEqual(self.cf.get("db.host"), "localhost")
+        self.assertEqual(self.cf.get_section("db")["host"], "localhost")
+
+    def test_precomputed(self):
+        self.cf.freeze()
+        frozen = self.cf._frozen
+        self.assertEqual(frozen._ints["db.port"], 5432)
+        self.assertEqual(frozen._lists["hosts"], ["a", "b"])
+        self.assertNotIn("db.host", frozen._ints)
+        self.assertEqual(frozen.sections["db"]["host"], "localhost")
+
+    def test_mutation(self):
+        self.cf.freeze()
+        os.environ["CFITALL_FROZEN__DB__HOST"] = "changed"
+        try:
+            self.assertEqual(self.cf.get("db.host"), "localhost")
+            self.assertEqual(self.cf.dict["db"]["host"], "localhost")
+        finally:
+            del os.environ["CFITALL_FROZEN__DB__HOST"]
+        with self.assertRaises(FrozenError):
+            self.cf.set("db.host", "changed")
+        with self.assertRaises(FrozenError):
+            self.cf.set_defaults_many({"db.host": "changed"})
+        with self.assertRaises(FrozenError):
+            self.cf.update()
+        with self.assertRaises(FrozenError):
+            self.cf.update_provider("environment")
+        with self.assertRaises(FrozenError):
+            with self.cf.override({"db.host": "changed"}):
+                pass
+        self.cf.freeze()
+        self.assertEqual(self.cf.get("db.host"), "localhost")
+
+
+if __name__ == "__main__":
+    unittest.main()
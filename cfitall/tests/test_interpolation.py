@@ -0,0 +1,176 @@
+import os
+import unittest
+
+from cfitall.interpolation import InterpolationError, Interpolator
+from cfitall.providers.environment import EnvironmentProvider
+from cfitall.registry import ConfigurationRegistry
+from cfitall.schema import Field, Schema
+from cfitall.tests.helpers import DictProvider
+
+
+class CountingInterpolator(Interpolator):
+    def __init__(self):
+        super().__init__()
+        self.resolved_keys = []
+
+    def _resolve(self, key, *args):
+        self.resolved_keys.append(key)
+        return super()._resolve(key, *args)
+
+
+class InterpolatorTests(unittest.TestCase):
+    def test_resolve(self):
+        os.environ["CFITALL_TEST_HOME"] = "/home/test"
+        try:
+            resolved = Interpolator().resolve(
+                {
+                    "db.host": "localhost",
+                    "db.port": 5432,
+                    "db.url": "pg://${db.host}:${db.port}/${app.name}",
+                    "db.port_copy": "${db.port}",
+                    "app.name": "${app.id}-app",
+                    "app.id": "x",
+                    "app.home": "${ENV:CFITALL_TEST_HOME}/$${escaped}",
+                    "app.price": "$5",
+                }
+            )
+        finally:
+            del os.environ["CFITALL_TEST_HOME"]
+        self.assertEqual(
+            resolved,
+            {
+                "db.url": "pg://localhost:5432/x-app",
+                "db.port_copy": 5432,
+                "app.name": "x-app",
+                "app.home": "/home/test/${escaped}",
+            },
+        )
+
+    def test_errors(self):
+        with self.assertRaises(InterpolationError) as context:
+            Interpolator().resolve({"a": "${b}", "b": "${c}", "c": "${a}", "d": "${e}"})
+        errors = context.exception.errors
+        self.assertEqual(errors["a"], "circular reference: a -> b -> c -> a")
+        self.assertEqual(errors["d"], "undefined reference: ${e}")
+
+    def test_incremental(self):
+        interpolator = CountingInterpolator()
+        flattened = {
+            "db.host": "localhost",
+            "db.url": "pg://${db.host}",
+            "db.dsn": "${db.url}?tls=1",
+            "log.file": "${log.dir}/app.log",
+            "log.dir": "/var/log",
+        }
+        interpolator.resolve(flattened)
+        self.assertEqual(len(interpolator.resolved_keys), 3)
+
+        interpolator.resolved_keys = []
+        flattened["log.dir"] = "/tmp"
+        resolved = interpolator.resolve(flattened)
+        self.assertEqual(interpolator.resolved_keys, ["log.file"])
+        self.assertEqual(resolved["log.file"], "/tmp/app.log")
+        self.assertEqual(resolved["db.dsn"], "pg://localhost?tls=1")
+
+        interpolator.resolved_keys = []
+        flattened["db.host"] = "db"
+        resolved = interpolator.resolve(flattened)
+        self.assertEqual(sorted(interpolator.resolved_keys), ["db.dsn", "db.url"])
+        self.assertEqual(resolved["db.dsn"], "pg://db?tls=1")
+
+        interpolator.resolved_keys = []
+        interpolator.resolve({**flattened, "extra": 1})
+        self.assertEqual(interpolator.resolved_keys, [])
+
+
+class RegistryInterpolationTests(unittest.TestCase):
+    def test_lazy_reference(self):
+        db = DictProvider({"db": {"host": "h"}}, "db", namespaces=["db"])
+        cache = DictProvider({"cache": {"size": 1}}, "cache", namespaces=["cache"])
+        cf = ConfigurationRegistry(
+            "test",
+            defaults={"app": {"name": "a"}, "url": "${db.host}:1"},
+            providers=[db, cache],
+            interpolate=True,
+        )
+        self.assertEqual(cf.get("app.name"), "a")
+        self.assertEqual(cf.get("url"), "h:1")
+        self.assertEqual((db.updates, cache.updates), (1, 0))
+
+    def test_registry(self):
+        schema = Schema({"db.port": Field(int), "db.backup_port": Field(int)})
+        cf = ConfigurationRegistry(
+            "test",
+            defaults={"db": {"host": "localhost", "url": "pg://${db.host}"}},
+            providers=[],
+            schema=schema,
+            interpolate=True,
+        )
+        self.assertEqual(cf.get("db.url"), "pg://localhost")
+        cf.set_many({"db.port": "5432", "db.backup_port": "${db.port}"})
+        self.assertEqual(cf.get("db.backup_port"), 5432)
+        cf.set("db.host", "db")
+        self.assertEqual(cf.get("db.url"), "pg://db")
+        self.assertEqual(cf.dict["db"]["url"], "pg://db")
+
+    def test_rejected(self):
+        os.environ["CFITALL_INTERPOLATION__B"] = "${a}"
+        self.addCleanup(os.environ.pop, "CFITALL_INTERPOLATION__B", None)
+        cf = ConfigurationRegistry(
+            "test",
+            defaults={"a": "${b}", "b": 1},
+            providers=[EnvironmentProvider("cfitall_interpolation")],
+            interpolate=True,
+        )
+        with self.assertRaises(InterpolationError):
+            cf.get("a")
+        del os.environ["CFITALL_INTERPOLATION__B"]
+        self.assertEqual(cf.get("a"), 1)
+        os.environ["CFITALL_INTERPOLATION__B"] = "${a}"
+        self.assertEqual(cf.get("a"), 1)
+        self.assertIsInstance(cf.validation_error, InterpolationError)
+
+    def test_set_rejected(self):
+        cf = ConfigurationRegistry(
+            "test",
+            defaults={"a": "${b}", "b": 1, "db": {"host": "h1"}, "url": "${db.host}"},
+            providers=[],
+            interpolate=True,
+        )
+        self.assertEqual(cf.get("a"), 1)
+        for values in ({"c": "${typo}"}, {"b": "${a}"}, {"db": "x"}):
+            with self.assertRaises(InterpolationError):
+                cf.set_many(values)
+        self.assertEqual(cf.values["super"], {})
+        self.assertIsNone(cf.get("c"))
+        cf.set("db.host", "h3")
+        self.assertEqual(cf.get("db.host"), "h3")
+        self.assertIsNone(cf.validation_error)
+
+    def test_overlay(self):
+        cf = ConfigurationRegistry(
+            "test",
+            defaults={"db": {"host": "localhost", "url": "pg://${db.host}"}, "x": 1},
+            providers=[],
+            interpolate=True,
+        )
+        tenant = cf.overlay("tenant", {"db.host": "db", "name": "${db.host}-${x}"})
+        self.assertEqual(tenant.get("db.url"), "pg://db")
+        self.assertEqual(tenant.get("name"), "db-1")
+        self.assertEqual(tenant.dict["db"]["url"], "pg://db")
+        self.assertEqual(tenant.find("db.*")["db.url"], "pg://db")
+        self.assertEqual(cf.get("db.url"), "pg://localhost")
+        cf.set("x", 2)
+        self.assertEqual(tenant.get("name"), "db-2")
+        with self.assertRaises(InterpolationError):
+            tenant.set("bad", "${typo}")
+        self.assertIsNone(tenant.get("bad"))
+        self.assertEqual(tenant.get("name"), "db-2")
+
+    def test_disabled(self):
+        cf = ConfigurationRegistry("test", defaults={"a": "${b}", "b": 1}, providers=[])
+        self.assertEqual(cf.get("a"), "${b}")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,10 +1,44 @@
+import os
+import tempfile
 import unittest
 
 from cfitall.manager import ProviderManager
+from cfitall.providers.base import ConfigProviderBase
 from cfitall.providers.environment import EnvironmentProvider
 from cfitall.providers.filesystem import FilesystemProvider
 
 
+class ParsedProvider(ConfigProviderBase):
+    def __init__(self, provider_name, text):
+        self.provider_name = provider_name
+        self.text = text
+        self.value = None
+
+    @property
+    def dict(self):
+        return {"value": self.value}
+
+    @property
+    def revision(self):
+        return self.value
+
+    def update(self):
+        return self.apply_parsed(int(self.text))
+
+    def parse_task(self):
+        return int, (self.text,)
+
+    def apply_parsed(self, result):
+        self.value = result
+        return True
+
+
+class LambdaProvider(ParsedProvider):
+    def parse_task(self):
+        # lambdas cannot be pickled for the worker processes
+        return (lambda text: int(text) + 1), (self.text,)
+
+
 class ProviderManagerTests(unittest.TestCase):
     def test_init_empty(self):
         manager = ProviderManager()
@@ -64,3 +98,114 @@ class ProviderManagerTests(unittest.TestCase):
         self.assertTrue(hasattr(manager, "filesystem"))
         self.assertNotIn("environment", manager.ordering)
         self.assertNotEqual(len(manager.ordering), 2)
+
+    def test_update_all_processes(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for name, contents in [
+                ("one.yml", "name: one\nlist: [1, 2]"),
+                ("two.json", '{"Name": "two"}'),
+                ("three.toml", "name = "),
+            ]:
+                with open(os.path.join(tmpdir, name), "w") as file_:
+                    file_.write(contents)
+            providers = [
+                FilesystemProvider([tmpdir], prefix, provider_name=prefix)
+                for prefix in ["one", "two", "three"]
+            ]
+            manager = ProviderManager(providers=providers, processes=2)
+            with self.assertLogs(level="ERROR"):
+                manager.update_all()
+            self.assertEqual(manager.one.dict, {"name": "one", "list": [1, 2]})
+            self.assertEqual(manager.two.dict, {"name": "two"})
+            self.assertEqual(manager.three.dict, {})
+            revision = manager.one.revision
+            self.assertIsNone(manager.one.parse_task())
+            manager.update_all()
+            self.assertEqual(manager.one.revision, revision)
+
+    def test_update_all_processes_dirty(self):
+        providers = [ParsedProvider(name, "1") for name in ["one", "two"]]
+        manager = ProviderManager(providers=providers, processes=2)
+        self.addCleanup(manager.close)
+        manager.update_all()
+        self.assertEqual(manager.consume_dirty(), {"one", "two"})
+        executor = manager._executor
+        self.assertIsNotNone(executor)
+        manager.update_all()
+        self.assertIs(manager._executor, executor)
+        self.assertEqual(manager.consume_dirty(), set())
+        manager.two.text = "2"
+        manager.update_all()
+        self.assertEqual(manager.consume_dirty(), {"two"})
+        self.assertEqual(manager.two.dict, {"value": 2})
+
+    def test_update_all_processes_fallback(self):
+        providers = [LambdaProvider(name, "1") for name in ["one", "two"]]
+        manager = ProviderManager(providers=providers, processes=2)
+        self.addCleanup(manager.close)
+        with self.assertLogs("cfitall.manager", level="WARNING"):
+            manager.update_all()
+        # updated in-process, without the worker's task
+        self.assertEqual(manager.one.dict, {"value": 1})
+        self.assertEqual(manager.consume_dirty(), {"one", "two"})
+        manager.close()
+        self.assertIsNone(manager._executor)
+
+    def test_priorities(self):
+        manager = ProviderManager()
+        manager.register(EnvironmentProvider("foo", provider_name="low"), priority=-1)
+        manager.register(EnvironmentProvider("foo", provider_name="high"))
+        manager.register(EnvironmentProvider("foo", provider_name="mid"), priority=0)
+        self.assertEqual(manager.ordering, ["low", "high", "mid"])
+        self.assertEqual(manager.priorities, {"low": -1, "high": 0, "mid": 0})
+        manager.set_priority("low", 10)
+        self.assertEqual(manager.ordering, ["high", "mid", "low"])
+        self.assertEqual(
+            [provider.provider_name for provider in manager], manager.ordering
+        )
+        manager.ordering = ["high", "low", "mid"]
+        self.assertEqual(manager.ordering, ["high", "low", "mid"])
+        with self.assertRaises(ValueError):
+            manager.ordering = ["high", "low"]
+        with self.assertRaises(KeyError):
+            manager.set_priority("missing", 1)
+
+    def test_ordering_in_place(self):
+        manager = ProviderManager()
+        for name in ["low", "mid", "high"]:
+            manager.register(EnvironmentProvider("foo", provider_name=name))
+        manager.ordering.reverse()
+        self.assertEqual(manager.ordering, ["high", "mid", "low"])
+        ordering = manager.ordering
+        ordering.remove("high")
+        self.assertEqual(manager.ordering, ["mid", "low", "high"])
+        ordering.insert(0, "high")
+        self.assertEqual(manager.ordering, ["high", "mid", "low"])
+        ordering[1:] = ["low", "mid"]
+        self.assertEqual(manager.ordering, ["high", "low", "mid"])
+        with self.assertRaises(ValueError):
+            ordering.append("missing")
+        self.assertEqual(ordering, ["high", "low", "mid"])
+
+    def test_name_collision(self):
+        manager = ProviderManager()
+        provider = EnvironmentProvider("foo", provider_name="get")
+        manager.register(provider)
+        self.assertIs(manager.get("get"), provider)
+        self.assertIn("get", manager)
+        self.assertEqual(len(manager), 1)
+
+    def test_dirty(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            config_file = os.path.join(tmpdir, "foo.json")
+            with open(config_file, "w") as file_:
+                file_.write('{"foo": 1}')
+            manager = ProviderManager()
+            manager.register(FilesystemProvider([tmpdir], "foo"))
+            self.assertEqual(manager.consume_dirty(), {"filesystem"})
+            self.assertTrue(manager.update("filesystem"))
+            self.assertEqual(manager.dirty, {"filesystem"})
+            self.assertEqual(manager.consume_dirty(["other"]), set())
+            self.assertEqual(manager.consume_dirty(["filesystem"]), {"filesystem"})
+            self.assertTrue(manager.update("filesystem"))
+            self.assertEqual(manager.dirty, set())
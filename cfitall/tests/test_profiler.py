@@ -0,0 +1,64 @@
+import os
+import pstats
+import tempfile
+import unittest
+
+from cfitall.profiler import AccessProfiler
+from cfitall.registry import ConfigurationRegistry
+
+
+def read_host(cf):
+    return cf.get("db.host")
+
+
+class AccessProfilerTests(unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.cf = ConfigurationRegistry(
+            "test", defaults={"db": {"host": "localhost", "port": 5432}}, providers=[]
+        )
+
+    def test_profile(self):
+        with self.cf.profile() as profiler:
+            for _ in range(3):
+                read_host(self.cf)
+            self.cf.get_int("db.port")
+            self.cf.get_section("db")
+        self.assertIsNone(self.cf.profiler)
+        self.cf.get("db.host")
+        self.assertEqual(profiler.keys, {"db.host": 3, "db.port": 1, "db": 1})
+        sites = {
+            (site[2], key): count for (site, key), count in profiler.call_sites.items()
+        }
+        self.assertEqual(sites[("read_host", "db.host")], 3)
+        self.assertEqual(sites[("test_profile", "db.port")], 1)
+        self.assertEqual([site[2] for site in profiler.merges], ["read_host"])
+        self.assertEqual(list(profiler.merges.values())[0][0], 1)
+        self.assertEqual(len(profiler.flattens), 1)
+        report = profiler.report()
+        self.assertIn("5 reads of 3 keys", report)
+        self.assertIn("(read_host): db.host", report)
+
+    def test_sample(self):
+        self.cf.profiler = AccessProfiler(sample=10)
+        for _ in range(25):
+            self.cf.get("db.host")
+        self.assertEqual(self.cf.profiler.keys, {"db.host": 20})
+        with self.assertRaises(ValueError):
+            AccessProfiler(sample=0)
+
+    def test_dump_stats(self):
+        with self.cf.profile() as profiler:
+            read_host(self.cf)
+            read_host(self.cf)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "cfitall.pstats")
+            profiler.dump_stats(path)
+            stats = pstats.Stats(path).stats
+        self.assertEqual(stats[("cfitall", 0, "get db.host")][:2], (2, 2))
+        callers = stats[("cfitall", 0, "merge")][4]
+        self.assertEqual([site[2] for site in callers], ["read_host"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,145 @@
+import base64
+import json
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from cfitall.providers.consul import ConsulProvider
+
+
+class KVHandler(BaseHTTPRequestHandler):
+    """
+    Implements the parts of Consul's KV api used by ConsulProvider, including
+    blocking queries: a request with ?index=N waits (up to ?wait) until the
+    store's index exceeds N.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        parts = urlsplit(self.path)
+        query = parse_qs(parts.query)
+        prefix = parts.path[len("/v1/kv/") :]
+        server.paths.append(self.path)
+        server.queries.append(query)
+        with server.changed:
+            if "index" in query:
+                index = int(query["index"][0])
+                wait = float(query["wait"][0].rstrip("s"))
+                server.changed.wait_for(lambda: server.index > index, timeout=wait)
+            entries = [
+                {
+                    "Key": key,
+                    "Value": base64.b64encode(value.encode()).decode(),
+                    "ModifyIndex": server.index,
+                }
+                for key, value in sorted(server.kv.items())
+                if key.startswith(prefix)
+            ]
+            current = server.index
+        body = json.dumps(entries).encode()
+        self.send_response(200 if entries else 404)
+        self.send_header("X-Consul-Index", str(current))
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class ConsulProviderTests(unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), KVHandler)
+        self.server.daemon_threads = True
+        self.server.changed = threading.Condition()
+        self.server.index = 10
+        self.server.queries = []
+        self.server.paths = []
+        self.server.kv = {
+            "config/app/db/host": "localhost",
+            "config/app/db/port": "5432",
+            "config/other/key": "ignored",
+            "config/app2/db/host": "sibling",
+            "config/application": "sibling",
+        }
+        threading.Thread(
+            target=self.server.serve_forever, args=(0.01,), daemon=True
+        ).start()
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        self.provider = ConsulProvider("config/app", url=self.url, wait=5)
+
+    def tearDown(self):
+        self.provider.stop()
+        with self.server.changed:
+            self.server.index += 1
+            self.server.changed.notify_all()
+        self.provider.stop(timeout=5)
+        self.server.shutdown()
+        self.server.server_close()
+        super().tearDown()
+
+    def put(self, key, value):
+        with self.server.changed:
+            self.server.kv[key] = value
+            self.server.index += 1
+            self.server.changed.notify_all()
+
+    def wait_for(self, predicate, timeout=5):
+        deadline = time.monotonic() + timeout
+        while not predicate():
+            if time.monotonic() > deadline:
+                self.fail("timed out waiting for the watch")
+            time.sleep(0.01)
+
+    def test_update(self):
+        self.assertTrue(self.provider.update())
+        self.assertEqual(
+            self.provider.dict, {"db": {"host": "localhost", "port": "5432"}}
+        )
+        self.assertEqual(self.provider.index, 10)
+
+    def test_sibling_prefix(self):
+        self.provider.update()
+        self.assertNotIn("2", self.provider.dict)
+        self.assertNotIn("lication", self.provider.dict)
+        query = self.server.paths[0]
+        self.assertTrue(query.startswith("/v1/kv/config/app/?"), query)
+
+    def test_watch_applies_changes(self):
+        self.provider.update()
+        revision = self.provider.revision
+        self.wait_for(lambda: any("index" in query for query in self.server.queries))
+        self.put("config/app/db/host", "db.example.com")
+        self.wait_for(lambda: self.provider.revision > revision)
+        self.assertEqual(self.provider.dict["db"]["host"], "db.example.com")
+        self.assertEqual(self.provider.index, 11)
+        self.assertIn(["10"], [query.get("index") for query in self.server.queries])
+
+    def test_watch_timeout_keeps_data(self):
+        self.provider.wait = 0
+        self.provider.update()
+        data, revision = self.provider.dict, self.provider.revision
+        self.wait_for(lambda: len(self.server.queries) > 3)
+        self.assertIs(self.provider.dict, data)
+        self.assertEqual(self.provider.revision, revision)
+
+    def test_empty_prefix(self):
+        provider = ConsulProvider("config/missing", url=self.url, wait=5)
+        self.assertTrue(provider.update())
+        self.assertEqual(provider.dict, {})
+        provider.stop()
+
+    def test_update_failure(self):
+        provider = ConsulProvider("config/app", url="http://127.0.0.1:1")
+        with self.assertLogs(level="ERROR"):
+            self.assertFalse(provider.update())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from cfitall.providers.directory import DirectoryProvider
+
+
+class DirectoryProviderTests(unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.directory = self.tmpdir.name
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+        super().tearDown()
+
+    def mount(self, version, files):
+        """
+        Lays out files the way the kubelet does: in a timestamped directory,
+        published by atomically swapping the ..data symlink.
+        """
+        data_dir = os.path.join(self.directory, f"..{version}")
+        for key, value in files.items():
+            path = os.path.join(data_dir, key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w") as file_:
+                file_.write(value)
+            top = key.split("/")[0]
+            link = os.path.join(self.directory, top)
+            if not os.path.lexists(link):
+                os.symlink(os.path.join("..data", top), link)
+        tmp_link = os.path.join(self.directory, "..data_tmp")
+        os.symlink(f"..{version}", tmp_link)
+        os.replace(tmp_link, os.path.join(self.directory, "..data"))
+
+    def test_read_mounted_volume(self):
+        self.mount("v1", {"db.host": "localhost\n", "db.port": "5432", "tls/key": "k"})
+        provider = DirectoryProvider(self.directory)
+        self.assertTrue(provider.update())
+        self.assertEqual(
+            provider.dict,
+            {"db": {"host": "localhost", "port": "5432"}, "tls": {"key": "k"}},
+        )
+
+    def test_conflicting_files(self):
+        for name, value in (("db", "x"), ("DB.host", "h"), ("tls", "y")):
+            with open(os.path.join(self.directory, name), "w") as file_:
+                file_.write(value)
+        os.makedirs(os.path.join(self.directory, "cache"))
+        with open(os.path.join(self.directory, "cache", "size"), "w") as file_:
+            file_.write("1")
+        with open(os.path.join(self.directory, "cache.size.max"), "w") as file_:
+            file_.write("2")
+        provider = DirectoryProvider(self.directory)
+        with self.assertLogs("cfitall.providers.directory", level="ERROR") as logs:
+            self.assertTrue(provider.update())
+        self.assertEqual(len(logs.output), 2)
+        self.assertEqual(
+            provider.dict,
+            {"db": {"host": "h"}, "tls": "y", "cache": {"size": {"max": "2"}}},
+        )
+
+    def test_key_prefix(self):
+        self.mount("v1", {"password": "hunter2"})
+        provider = DirectoryProvider(self.directory, key_prefix="secrets.db")
+        provider.update()
+        self.assertEqual(provider.dict, {"secrets": {"db": {"password": "hunter2"}}})
+
+    def test_update_only_on_swap(self):
+        self.mount("v1", {"db.host": "one"})
+        provider = DirectoryProvider(self.directory)
+        provider.update()
+        revision = provider.revision
+        with mock.patch("os.walk") as walk:
+            self.assertTrue(provider.update())
+            walk.assert_not_called()
+        self.assertEqual(provider.revision, revision)
+        self.mount("v2", {"db.host": "two"})
+        self.assertTrue(provider.update())
+        self.assertEqual(provider.revision, revision + 1)
+        self.assertEqual(provider.dict, {"db": {"host": "two"}})
+
+    def test_plain_directory(self):
+        with open(os.path.join(self.directory, "name"), "w") as file_:
+            file_.write("plain")
+        provider = DirectoryProvider(self.directory, strip_newline=False)
+        self.assertTrue(provider.update())
+        self.assertEqual(provider.dict, {"name": "plain"})
+
+    def test_missing_directory(self):
+        provider = DirectoryProvider(os.path.join(self.directory, "nope"))
+        with self.assertLogs(level="WARNING"):
+            self.assertFalse(provider.update())
+        self.assertEqual(provider.dict, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -81,3 +81,58 @@ class EnvironmentProviderTests(unittest.TestCase):
     def test_update(self):
         provider = EnvironmentProvider("cfitall")
         self.assertTrue(provider.update())
+
+    def test_realtime(self):
+        provider = EnvironmentProvider("cfitall")
+        self.assertEqual(provider.dict["foo"]["bang"], "WHAMMY!")
+        os.environ["CFITALL__FOO__BANG"] = "changed"
+        self.assertEqual(provider.dict["foo"]["bang"], "changed")
+        os.environ["CFITALL__FOO__NEW"] = "new"
+        self.assertEqual(provider.dict["foo"]["new"], "new")
+        del os.environ["CFITALL__FOO__BANG"]
+        self.assertNotIn("bang", provider.dict["foo"])
+        # swapping a variable for another is only picked up by update()
+        os.environ["CFITALL_OTHER"] = "other"
+        self.addCleanup(os.environ.pop, "CFITALL_OTHER", None)
+        revision = provider.revision
+        del os.environ["CFITALL_OTHER"]
+        os.environ["CFITALL__FOO__BANG"] = "again"
+        self.assertEqual(provider.revision, revision)
+        provider.update()
+        self.assertEqual(provider.dict["foo"]["bang"], "again")
+
+    def test_cast_defaults(self):
+        os.environ["CFITALL__DB__PORT"] = "5432"
+        os.environ["CFITALL__DB__TIMEOUT"] = "1.5"
+        os.environ["CFITALL__DB__HOSTS"] = '["a", "b"]'
+        os.environ["CFITALL__DB__OPTIONS"] = '{"tls": true}'
+        os.environ["CFITALL__DB__RETRIES"] = "many"
+        defaults = {
+            "db": {"port": 1, "timeout": 1.0, "options": {}, "retries": 3},
+            "db.hosts": [],
+            "global": {"name": "default"},
+        }
+        provider = EnvironmentProvider("cfitall", defaults=defaults)
+        self.assertEqual(
+            provider.dict["db"],
+            {
+                "port": 5432,
+                "timeout": 1.5,
+                "hosts": ["a", "b"],
+                "options": {"tls": True},
+                "retries": "many",
+            },
+        )
+        self.assertEqual(provider.dict["global"]["name"], "cfitall")
+        self.assertEqual(
+            provider.dict["global"]["path"], ["/Users/wryfi", "/Users/wryfi/tmp"]
+        )
+
+    def test_cast_defaults_fallback(self):
+        provider = EnvironmentProvider(
+            "cfitall", defaults={"global": {"path": []}, "bool_list": []}
+        )
+        self.assertEqual(
+            provider.dict["global"]["path"], ["/Users/wryfi", "/Users/wryfi/tmp"]
+        )
+        self.assertEqual(provider.dict["bool_list"], [True, False, False, True])
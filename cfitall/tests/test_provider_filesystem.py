@@ -1,7 +1,11 @@
+import json
 import os
+import tempfile
 import unittest
 
+from cfitall.providers import formats
 from cfitall.providers.filesystem import FilesystemProvider
+from cfitall.providers.lazyjson import LazyJSONObject
 
 
 class FilesystemProviderTests(unittest.TestCase):
@@ -68,3 +72,161 @@ class FilesystemProviderTests(unittest.TestCase):
         )
         self.assertEqual(provider.dict["global"]["name"], "cfityaml")
         self.assertEqual(provider.dict["foo"]["bar"], "baz")
+
+
+class LargeFileTests(unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.config_file = os.path.join(self.tmpdir.name, "cfitall.json")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+        super().tearDown()
+
+    def write(self, data):
+        tmp_file = f"{self.config_file}.tmp"
+        with open(tmp_file, "w") as file_:
+            file_.write(data if isinstance(data, str) else json.dumps(data, indent=2))
+        os.replace(tmp_file, self.config_file)
+
+    def test_lazy_object(self):
+        data = {
+            "Global": {"name": 'cfit "json"', "braces": "}{][", "list": [1, [2, {}]]},
+            "number": -1.5e3,
+            "flag": True,
+            "nothing": None,
+            'escaped\\"key': "value\\",
+            "empty": {},
+        }
+        self.write(data)
+        lazy = LazyJSONObject(self.config_file)
+        expected = {key.lower(): value for key, value in data.items()}
+        self.assertEqual(list(lazy), list(expected))
+        self.assertEqual(lazy._sections, {})
+        self.assertEqual(lazy["global"], expected["global"])
+        self.assertEqual(list(lazy._sections), ["global"])
+        self.assertEqual(dict(lazy), expected)
+
+    def test_lazy_object_compact(self):
+        self.write('{"a":1,"b":"x","c":[1,2]}')
+        self.assertEqual(
+            dict(LazyJSONObject(self.config_file)), {"a": 1, "b": "x", "c": [1, 2]}
+        )
+
+    def test_lazy_object_invalid(self):
+        self.write("[1, 2, 3]")
+        with self.assertRaises(ValueError):
+            LazyJSONObject(self.config_file)
+        self.write('{"a": {"b": 1}')
+        with self.assertRaises(ValueError):
+            LazyJSONObject(self.config_file)
+        self.write("")
+        with self.assertRaises(ValueError):
+            LazyJSONObject(self.config_file)
+
+    def test_update_large_file(self):
+        self.write({"foo": {"bar": "baz"}, "bat": [1, 2]})
+        provider = FilesystemProvider([self.tmpdir.name], "cfitall", large_file=True)
+        self.assertTrue(provider.update())
+        self.assertIsInstance(provider.dict, LazyJSONObject)
+        self.assertEqual(provider.dict["foo"], {"bar": "baz"})
+        data, revision = provider.dict, provider.revision
+        self.assertTrue(provider.update())
+        self.assertIs(provider.dict, data)
+        self.assertEqual(provider.revision, revision)
+        self.write({"foo": {"bar": "changed"}})
+        self.assertTrue(provider.update())
+        self.assertIsNot(provider.dict, data)
+        self.assertEqual(provider.revision, revision + 1)
+        self.assertEqual(dict(provider.dict), {"foo": {"bar": "changed"}})
+
+
+class FileFormatTests(unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+        super().tearDown()
+
+    def write(self, name, data):
+        with open(os.path.join(self.tmpdir.name, name), "w") as file_:
+            file_.write(data)
+
+    def test_toml(self):
+        self.write("cfitall.toml", '[Global]\nname = "cfittoml"\nport = 8080\n')
+        provider = FilesystemProvider([self.tmpdir.name], "cfitall")
+        self.assertTrue(provider.update())
+        self.assertEqual(provider.config_file_type, "toml")
+        self.assertEqual(provider.dict, {"global": {"name": "cfittoml", "port": 8080}})
+
+    def test_dotenv(self):
+        self.write(
+            "cfitall.env",
+            "\n".join(
+                [
+                    "# comment",
+                    "NAME=cfitenv  # trailing comment",
+                    "export DB__HOST=localhost",
+                    "DB__PASSWORD='p#ss \\n'",
+                    'DB__DSN="host=\\"x\\"\\tport=1 # not a comment',
+                    'second line"',
+                    "EMPTY=",
+                ]
+            ),
+        )
+        provider = FilesystemProvider([self.tmpdir.name], "cfitall")
+        self.assertTrue(provider.update())
+        self.assertEqual(provider.config_file_type, "dotenv")
+        self.assertEqual(
+            provider.dict,
+            {
+                "name": "cfitenv",
+                "db": {
+                    "host": "localhost",
+                    "password": "p#ss \\n",
+                    "dsn": 'host="x"\tport=1 # not a comment\nsecond line',
+                },
+                "empty": "",
+            },
+        )
+
+    def test_dotenv_invalid(self):
+        with self.assertRaises(ValueError):
+            formats.parse_dotenv("FOO")
+        with self.assertRaises(ValueError):
+            formats.parse_dotenv('FOO="bar')
+
+    def test_precedence(self):
+        self.write("cfitall.env", "NAME=env")
+        self.write("cfitall.yml", "name: yaml")
+        provider = FilesystemProvider([self.tmpdir.name], "cfitall")
+        self.assertEqual(provider.config_file_type, "yaml")
+
+    def test_register_format(self):
+        def parse(text):
+            return dict(line.split(":", 1) for line in text.splitlines())
+
+        formats.register_format("colon", ["colon"], parse)
+        try:
+            self.write("cfitall.colon", "name:colon")
+            provider = FilesystemProvider([self.tmpdir.name], "cfitall")
+            self.assertTrue(provider.update())
+            self.assertEqual(provider.dict, {"name": "colon"})
+        finally:
+            del formats.FORMATS["colon"]
+
+    def test_parse_cache(self):
+        self.write("cfitall.json", '{"name": "first"}')
+        provider = FilesystemProvider([self.tmpdir.name], "cfitall")
+        self.assertTrue(provider.update())
+        data, revision = provider.dict, provider.revision
+        self.assertTrue(provider.update())
+        self.assertIs(provider.dict, data)
+        self.assertEqual(provider.revision, revision)
+        self.write("cfitall.json", '{"name": "second file"}')
+        self.assertTrue(provider.update())
+        self.assertEqual(provider.dict, {"name": "second file"})
+        self.assertEqual(provider.revision, revision + 1)
@@ -0,0 +1,135 @@
+import email.utils
+import json
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+from cfitall.providers.http import HttpProvider
+
+
+class ConfigHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        server.requests.append(self)
+        server.clients.add(self.client_address)
+        if server.fail:
+            self.send_response(500)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        etag = f'"{server.version}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        body = server.body.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", server.content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", email.utils.formatdate(usegmt=True))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class HttpProviderTests(unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), ConfigHandler)
+        self.server.requests = []
+        self.server.clients = set()
+        self.server.fail = False
+        self.server.version = 1
+        self.server.content_type = "application/json"
+        self.server.body = json.dumps({"Global": {"name": "cfithttp"}})
+        self.thread = threading.Thread(
+            target=self.server.serve_forever, args=(0.01,), daemon=True
+        )
+        self.thread.start()
+        self.url = f"http://127.0.0.1:{self.server.server_port}/config?env=test"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        super().tearDown()
+
+    def test_update(self):
+        provider = HttpProvider(self.url)
+        self.assertTrue(provider.update())
+        self.assertEqual(provider.dict, {"global": {"name": "cfithttp"}})
+        self.assertEqual(self.server.requests[0].path, "/config?env=test")
+        provider.close()
+
+    def test_conditional_request(self):
+        provider = HttpProvider(self.url)
+        self.assertTrue(provider.update())
+        data, revision = provider.dict, provider.revision
+        with mock.patch.object(provider, "_parse") as parse:
+            self.assertTrue(provider.update())
+            parse.assert_not_called()
+        self.assertEqual(self.server.requests[1].headers["If-None-Match"], '"1"')
+        self.assertIsNotNone(self.server.requests[1].headers["If-Modified-Since"])
+        self.assertIs(provider.dict, data)
+        self.assertEqual(provider.revision, revision)
+        self.server.version = 2
+        self.server.body = json.dumps({"global": {"name": "changed"}})
+        self.assertTrue(provider.update())
+        self.assertEqual(provider.dict, {"global": {"name": "changed"}})
+        self.assertEqual(provider.revision, revision + 1)
+        provider.close()
+
+    def test_keep_alive(self):
+        provider = HttpProvider(self.url)
+        for _ in range(3):
+            self.assertTrue(provider.update())
+        self.assertEqual(len(self.server.requests), 3)
+        self.assertEqual(len(self.server.clients), 1)
+        provider.close()
+
+    def test_yaml(self):
+        self.server.content_type = "application/yaml"
+        self.server.body = "global:\n  name: cfityaml\n"
+        provider = HttpProvider(self.url)
+        self.assertTrue(provider.update())
+        self.assertEqual(provider.dict, {"global": {"name": "cfityaml"}})
+        provider.close()
+
+    def test_backoff(self):
+        provider = HttpProvider(self.url, backoff_base=60)
+        self.assertTrue(provider.update())
+        self.server.fail = True
+        with self.assertLogs(level="ERROR"):
+            self.assertFalse(provider.update())
+        self.assertEqual(provider.failures, 1)
+        self.assertEqual(provider.dict, {"global": {"name": "cfithttp"}})
+        requests = len(self.server.requests)
+        with mock.patch("time.monotonic", return_value=0):
+            provider._retry_at = 1
+            self.assertFalse(provider.update())
+        self.assertEqual(len(self.server.requests), requests)
+        self.server.fail = False
+        provider._retry_at = 0
+        self.assertTrue(provider.update())
+        self.assertEqual(provider.failures, 0)
+        provider.close()
+
+    def test_backoff_jitter(self):
+        provider = HttpProvider(self.url, backoff_base=2, backoff_max=5)
+        with mock.patch("random.uniform", return_value=0) as uniform:
+            for _ in range(4):
+                provider._backoff()
+        self.assertEqual(
+            [call.args for call in uniform.call_args_list],
+            [(0, 2), (0, 4), (0, 5), (0, 5)],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
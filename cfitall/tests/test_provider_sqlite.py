@@ -0,0 +1,85 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from cfitall.providers.sqlite import SQLiteProvider
+
+
+class SQLiteProviderTests(unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "config.db")
+        self.provider = SQLiteProvider(self.path)
+        self.assertTrue(self.provider.update())
+        self.writer = sqlite3.connect(self.path)
+
+    def tearDown(self):
+        self.writer.close()
+        self.provider.close()
+        self.tmpdir.cleanup()
+        super().tearDown()
+
+    def write(self, sql, *params):
+        with self.writer:
+            self.writer.execute(sql, params)
+
+    def test_empty(self):
+        self.assertEqual(self.provider.dict, {})
+        self.assertIsNone(self.provider.get("db.host"))
+
+    def test_update(self):
+        self.write("INSERT INTO cfitall (key, value) VALUES ('db.host', 'localhost')")
+        self.write("INSERT INTO cfitall (key, value) VALUES ('db.port', '5432')")
+        self.write("INSERT INTO cfitall (key, value) VALUES ('debug', 'true')")
+        self.assertTrue(self.provider.update())
+        self.assertEqual(
+            self.provider.dict,
+            {"db": {"host": "localhost", "port": 5432}, "debug": True},
+        )
+
+    def test_update_unchanged(self):
+        self.write("INSERT INTO cfitall (key, value) VALUES ('a', '1')")
+        self.provider.update()
+        data, revision = self.provider.dict, self.provider.revision
+        self.assertTrue(self.provider.update())
+        self.assertIs(self.provider.dict, data)
+        self.assertEqual(self.provider.revision, revision)
+
+    def test_update_changed_rows(self):
+        for key in ("a", "b", "c"):
+            self.write("INSERT INTO cfitall (key, value) VALUES (?, '1')", key)
+        self.provider.update()
+        version = self.provider._version
+        self.write("UPDATE cfitall SET value = '2' WHERE key = 'a'")
+        self.write("DELETE FROM cfitall WHERE key = 'b'")
+        self.write("UPDATE cfitall SET key = 'd' WHERE key = 'c'")
+        changed = self.writer.execute(
+            "SELECT key FROM cfitall WHERE version > ?", (version,)
+        ).fetchall()
+        self.assertEqual(sorted(changed), [("a",), ("d",)])
+        self.assertTrue(self.provider.update())
+        self.assertEqual(self.provider.dict, {"a": 2, "d": 1})
+
+    def test_delete_and_reinsert(self):
+        self.write("INSERT INTO cfitall (key, value) VALUES ('a', '1')")
+        self.provider.update()
+        self.write("DELETE FROM cfitall WHERE key = 'a'")
+        self.write("INSERT INTO cfitall (key, value) VALUES ('a', '3')")
+        self.provider.update()
+        self.assertEqual(self.provider.dict, {"a": 3})
+
+    def test_get_and_get_prefix(self):
+        for key, value in [("db.host", '"h"'), ("db.port", "1"), ("dbx", "2")]:
+            self.write("INSERT INTO cfitall (key, value) VALUES (?, ?)", key, value)
+        self.assertEqual(self.provider.get("db.host"), "h")
+        self.assertEqual(self.provider.get_prefix("db"), {"db.host": "h", "db.port": 1})
+
+    def test_invalid_table(self):
+        with self.assertRaises(ValueError):
+            SQLiteProvider(self.path, table="cfitall; DROP TABLE x")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,158 @@
+import threading
+import time
+import unittest
+from unittest import mock
+
+from cfitall.providers.base import ConfigProviderBase
+from cfitall.registry import ConfigurationRegistry
+from cfitall.scheduler import RefreshScheduler, ScheduledRefresh
+
+
+class CountingProvider(ConfigProviderBase):
+    def __init__(self, provider_name, succeed=True, block=None):
+        self.provider_name = provider_name
+        self.succeed = succeed
+        self.block = block
+        self.updates = 0
+        self.running = 0
+        self.max_running = 0
+
+    @property
+    def dict(self):
+        return {self.provider_name: {"updates": self.updates}}
+
+    @property
+    def revision(self):
+        return self.updates
+
+    def update(self):
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        if self.block is not None:
+            self.block.wait(5)
+        self.updates += 1
+        self.running -= 1
+        return self.succeed
+
+
+def wait_for(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("timed out")
+        time.sleep(0.005)
+
+
+class ScheduledRefreshTests(unittest.TestCase):
+    def test_delay_jitter(self):
+        job = ScheduledRefresh("p", 10, jitter=0.5)
+        for _ in range(100):
+            self.assertTrue(5 <= job.delay() <= 15)
+
+    def test_delay_backoff(self):
+        job = ScheduledRefresh("p", 10, jitter=0, backoff_max=50)
+        delays = []
+        for failures in range(5):
+            job.failures = failures
+            delays.append(job.delay())
+        self.assertEqual(delays, [10, 20, 40, 50, 50])
+
+    def test_invalid_interval(self):
+        with self.assertRaises(ValueError):
+            ScheduledRefresh("p", 0)
+
+
+class RefreshSchedulerTests(unittest.TestCase):
+    def test_intervals(self):
+        fast, slow = CountingProvider("fast"), CountingProvider("slow")
+        cf = ConfigurationRegistry("test", providers=[fast, slow])
+        with RefreshScheduler(cf) as scheduler:
+            scheduler.schedule("fast", 0.01, jitter=0)
+            scheduler.schedule("slow", 60)
+            wait_for(lambda: fast.updates >= 5)
+        self.assertEqual(slow.updates, 0)
+        self.assertGreaterEqual(cf.get("fast.updates"), 5)
+
+    def test_backoff_on_failure(self):
+        failing = CountingProvider("failing", succeed=False)
+        cf = ConfigurationRegistry("test", providers=[failing])
+        scheduler = RefreshScheduler(cf)
+        scheduler.schedule("failing", 0.01, jitter=0, backoff_max=60)
+        with self.assertLogs(level="ERROR"):
+            scheduler.start()
+            wait_for(lambda: scheduler.jobs["failing"].failures >= 3)
+        scheduler.stop()
+        job = scheduler.jobs["failing"]
+        self.assertGreater(job.next_run - time.monotonic(), 0.01)
+        self.assertEqual(failing.updates, job.failures)
+
+    def test_refresh_coalesced(self):
+        block = threading.Event()
+        slow = CountingProvider("slow", block=block)
+        cf = ConfigurationRegistry("test", providers=[slow])
+        with RefreshScheduler(cf) as scheduler:
+            scheduler.schedule("slow", 60)
+            scheduler.refresh("slow")
+            wait_for(lambda: slow.running)
+            for _ in range(10):
+                scheduler.refresh("slow")
+            block.set()
+            wait_for(lambda: slow.updates == 2)
+            time.sleep(0.05)
+        self.assertEqual(slow.updates, 2)
+        self.assertEqual(slow.max_running, 1)
+
+    def test_reschedule_while_running(self):
+        block = threading.Event()
+        slow = CountingProvider("slow", block=block)
+        cf = ConfigurationRegistry("test", providers=[slow])
+        with RefreshScheduler(cf) as scheduler:
+            scheduler.schedule("slow", 60)
+            scheduler.refresh("slow")
+            wait_for(lambda: slow.running)
+            scheduler.schedule("slow", 60)
+            scheduler.refresh("slow")
+            time.sleep(0.05)
+            self.assertEqual(slow.max_running, 1)
+            block.set()
+            wait_for(lambda: slow.updates == 2)
+        self.assertEqual(slow.max_running, 1)
+
+    def test_lazy_provider_skipped(self):
+        lazy = CountingProvider("lazy")
+        lazy.namespaces = frozenset(["lazy"])
+        cf = ConfigurationRegistry("test", providers=[lazy])
+        self.assertTrue(cf.update_provider("lazy"))
+        self.assertEqual(lazy.updates, 0)
+        cf.get("lazy.updates")
+        self.assertTrue(cf.update_provider("lazy"))
+        self.assertEqual(lazy.updates, 2)
+
+    def test_stop(self):
+        provider = CountingProvider("p")
+        cf = ConfigurationRegistry("test", providers=[provider])
+        scheduler = RefreshScheduler(cf)
+        scheduler.schedule("p", 0.01, jitter=0)
+        scheduler.start()
+        wait_for(lambda: provider.updates)
+        scheduler.stop(timeout=5)
+        updates = provider.updates
+        time.sleep(0.05)
+        self.assertEqual(provider.updates, updates)
+        self.assertFalse(
+            [t for t in threading.enumerate() if t.name.startswith("cfitall-")]
+        )
+
+    def test_update_exception(self):
+        provider = CountingProvider("p")
+        cf = ConfigurationRegistry("test", providers=[provider])
+        scheduler = RefreshScheduler(cf)
+        scheduler.schedule("p", 60)
+        with mock.patch.object(provider, "update", side_effect=RuntimeError("boom")):
+            with self.assertLogs(level="ERROR"), scheduler:
+                scheduler.refresh("p")
+                wait_for(lambda: scheduler.jobs["p"].failures)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,148 @@
+import decimal
+import os
+import unittest
+
+from cfitall.providers.environment import EnvironmentProvider
+from cfitall.registry import ConfigurationRegistry
+from cfitall.schema import Field, Schema, ValidationError
+from cfitall.tests.helpers import DictProvider
+
+SCHEMA = Schema(
+    {
+        "db.host": Field(str, required=True),
+        "db.port": Field(int, minimum=1, maximum=65535),
+        "db.tls": Field(bool),
+        "db.timeout": Field(float),
+        "db.ratio": Field(decimal.Decimal),
+        "log.level": Field(str, choices=["debug", "info", "error"]),
+        "log.handlers": Field(list, minimum=1),
+    }
+)
+
+
+class FieldTests(unittest.TestCase):
+    def test_coercion(self):
+        coerced = SCHEMA.validate(
+            {
+                "db.host": "localhost",
+                "db.port": "5432",
+                "db.tls": "Yes",
+                "db.timeout": "1.5",
+                "db.ratio": "0.1",
+                "log.handlers": "console, file",
+            }
+        )
+        self.assertEqual(
+            coerced,
+            {
+                "db.host": "localhost",
+                "db.port": 5432,
+                "db.tls": True,
+                "db.timeout": 1.5,
+                "db.ratio": decimal.Decimal("0.1"),
+                "log.handlers": ["console", "file"],
+            },
+        )
+
+    def test_errors(self):
+        with self.assertRaises(ValidationError) as context:
+            SCHEMA.validate(
+                {
+                    "db.port": 70000,
+                    "db.tls": "maybe",
+                    "db.timeout": [1],
+                    "log.level": "trace",
+                    "log.handlers": [],
+                }
+            )
+        self.assertEqual(
+            set(context.exception.errors),
+            {"db.host", "db.port", "db.tls", "db.timeout", "log.level", "log.handlers"},
+        )
+        self.assertEqual(context.exception.errors["db.host"], "is required")
+        self.assertIn("at most 65535", str(context.exception))
+
+    def test_partial(self):
+        self.assertEqual(SCHEMA.validate({"db.port": 1}, partial=True), {"db.port": 1})
+
+    def test_int_rejects_bool_and_fractions(self):
+        schema = Schema({"n": Field(int)})
+        for value in (True, 1.5, "1.5"):
+            with self.assertRaises(ValidationError):
+                schema.validate({"n": value})
+        self.assertEqual(schema.validate({"n": 2.0}), {"n": 2})
+
+    def test_unsupported_type(self):
+        with self.assertRaises(TypeError):
+            Field(dict)
+
+
+class RegistrySchemaTests(unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        os.environ["SCHEMATEST__DB__PORT"] = "5432"
+        self.addCleanup(os.environ.pop, "SCHEMATEST__DB__PORT", None)
+        self.cf = ConfigurationRegistry(
+            "schematest",
+            defaults={"db": {"host": "localhost", "tls": "false"}},
+            providers=[EnvironmentProvider("schematest")],
+            schema=SCHEMA,
+        )
+
+    def test_coerced_once(self):
+        self.assertEqual(self.cf.get("db.port"), 5432)
+        self.assertIs(self.cf.get("db.tls"), False)
+        self.assertEqual(
+            self.cf.dict["db"], {"host": "localhost", "tls": False, "port": 5432}
+        )
+        snapshot = self.cf.snapshot()
+        self.assertEqual(self.cf.get_int("db.port"), 5432)
+        self.assertIs(self.cf.snapshot(), snapshot)
+
+    def test_keep_last_good(self):
+        self.assertEqual(self.cf.get("db.port"), 5432)
+        os.environ["SCHEMATEST__DB__PORT"] = "none"
+        with self.assertLogs(level="ERROR"):
+            self.assertEqual(self.cf.get("db.port"), 5432)
+        self.assertIn("db.port", self.cf.validation_error.errors)
+        self.assertEqual(self.cf.get("db.host"), "localhost")
+        os.environ["SCHEMATEST__DB__PORT"] = "6543"
+        self.assertEqual(self.cf.get("db.port"), 6543)
+        self.assertIsNone(self.cf.validation_error)
+
+    def test_invalid_initial(self):
+        cf = ConfigurationRegistry("test", providers=[], schema=SCHEMA)
+        with self.assertRaises(ValidationError):
+            cf.get("db.port")
+
+    def test_lazy_required(self):
+        provider = DictProvider({"db": {"host": "h"}}, "lazy", namespaces=["db"])
+        cf = ConfigurationRegistry(
+            "test",
+            defaults={"app": {"name": "a"}},
+            providers=[provider],
+            schema=Schema({"db.host": Field(str, required=True)}),
+        )
+        self.assertEqual(cf.get("app.name"), "a")
+        self.assertEqual(provider.updates, 0)
+        self.assertEqual(cf.get("db.host"), "h")
+        self.assertEqual(provider.updates, 1)
+        provider.replace({"db": {}})
+        with self.assertLogs(level="ERROR"):
+            self.assertEqual(cf.get("db.host"), "h")
+        self.assertIn("db.host", cf.validation_error.errors)
+
+    def test_set_validated(self):
+        with self.assertRaises(ValidationError):
+            self.cf.set("db.port", 0)
+        self.cf.set_many({"db.port": "8080", "other": "x"})
+        self.assertEqual(self.cf.values["super"], {"db": {"port": 8080}, "other": "x"})
+        tenant = self.cf.overlay("tenant")
+        with self.assertRaises(ValidationError):
+            tenant.set("log.level", "trace")
+        tenant.set("db.tls", "on")
+        self.assertIs(tenant.get("db.tls"), True)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+import decimal
+import io
+import json
+import unittest
+from unittest import mock
+
+import yaml
+
+from cfitall import serialize
+from cfitall.registry import ConfigurationRegistry
+
+CONFIG = {"b": {"y": [1, 2], "x": "ä"}, "a": 1.5, "d": decimal.Decimal("0.1")}
+
+
+class SerializeTests(unittest.TestCase):
+    def test_dumps(self):
+        self.assertEqual(
+            serialize.dumps(CONFIG),
+            json.dumps(CONFIG, indent=4, sort_keys=True, default=str),
+        )
+        self.assertEqual(
+            yaml.safe_load(serialize.dumps({"a": [1]}, "yaml")), {"a": [1]}
+        )
+        with self.assertRaises(ValueError):
+            serialize.dumps(CONFIG, "toml")
+
+    def test_dump(self):
+        expected = serialize.dumps(CONFIG)
+        text = io.StringIO()
+        serialize.dump(CONFIG, text)
+        self.assertEqual(text.getvalue(), expected)
+        binary = io.BytesIO()
+        serialize.dump(CONFIG, binary)
+        self.assertEqual(binary.getvalue().decode("utf-8"), expected)
+        self.assertFalse(binary.closed)
+        binary = io.BytesIO()
+        serialize.dump({"a": [1]}, binary, "yaml")
+        self.assertEqual(
+            binary.getvalue().decode("utf-8"), serialize.dumps({"a": [1]}, "yaml")
+        )
+
+    def test_dump_compact(self):
+        for orjson in (serialize.orjson, None):
+            with mock.patch.object(serialize, "orjson", orjson):
+                for indent in (None, 2):
+                    for fp in (io.StringIO(), io.BytesIO()):
+                        serialize.dump(CONFIG, fp, indent=indent)
+                        value = fp.getvalue()
+                        if isinstance(value, bytes):
+                            value = value.decode("utf-8")
+                        self.assertEqual(
+                            json.loads(value),
+                            {"a": 1.5, "b": {"x": "ä", "y": [1, 2]}, "d": "0.1"},
+                        )
+
+
+class RegistrySerializeTests(unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.cf = ConfigurationRegistry("test", providers=[])
+        self.cf.set_defaults_many({"foo.bar": 1, "foo.baz": [1, 2]})
+
+    def test_cached(self):
+        for format in serialize.FORMATS:
+            output = getattr(self.cf, format)
+            self.assertIs(getattr(self.cf, format), output)
+            self.cf.set("foo.bar", 2)
+            self.assertIsNot(getattr(self.cf, format), output)
+        self.assertEqual(json.loads(self.cf.json), {"foo": {"bar": 2, "baz": [1, 2]}})
+        self.assertEqual(
+            yaml.safe_load(self.cf.yaml), {"foo": {"bar": 2, "baz": [1, 2]}}
+        )
+
+    def test_override(self):
+        before = self.cf.json
+        with self.cf.override({"foo.bar": 3}):
+            self.assertEqual(json.loads(self.cf.json)["foo"]["bar"], 3)
+            fp = io.StringIO()
+            self.cf.dump(fp)
+            self.assertEqual(json.loads(fp.getvalue())["foo"]["bar"], 3)
+        self.assertIs(self.cf.json, before)
+
+    def test_dump(self):
+        for format in serialize.FORMATS:
+            fp = io.StringIO()
+            self.cf.dump(fp, format)
+            self.assertEqual(fp.getvalue(), getattr(self.cf, format))
+            fp = io.BytesIO()
+            self.cf.dump(fp, format)
+            self.assertEqual(fp.getvalue().decode("utf-8"), getattr(self.cf, format))
+
+
+if __name__ == "__main__":
+    unittest.main()
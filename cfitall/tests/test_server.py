@@ -0,0 +1,157 @@
+import contextlib
+import io
+import os
+import shutil
+import socket
+import stat
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from cfitall import cli
+from cfitall.client import ConfigClient, ServerError, socket_path
+from cfitall.registry import ConfigurationRegistry
+from cfitall.server import ConfigServer
+
+
+class ConfigServerTests(unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, "cfitall.sock")
+        self.registry = ConfigurationRegistry("test", providers=[])
+        self.registry.set_defaults_many(
+            {"db.host": "localhost", "db.port": 5432, "debug": False}
+        )
+        self.server = ConfigServer(self.registry, self.path)
+        self.thread = threading.Thread(
+            target=self.server.serve_forever, args=(0.01,), daemon=True
+        )
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+        shutil.rmtree(self.tmpdir)
+        super().tearDown()
+
+    def test_client(self):
+        with ConfigClient(self.path) as client:
+            self.assertEqual(client.get("db.host"), "localhost")
+            self.assertEqual(client.get("db.port"), 5432)
+            self.assertIs(client.get("debug"), False)
+            self.assertIsNone(client.get("nope"))
+            self.assertEqual(
+                client.get_section("db"), {"host": "localhost", "port": 5432}
+            )
+            self.assertIsNone(client.get_section("db.host"))
+            self.registry.set("db.host", "db.example.com")
+            self.assertEqual(client.get("db.host"), "db.example.com")
+            self.assertEqual(client.dump(), self.registry.dict)
+
+    def test_frozen(self):
+        self.registry.set_defaults_many({"db.options.tls": True})
+        self.registry.freeze()
+        with ConfigClient(self.path) as client:
+            self.assertEqual(client.get("db.port"), 5432)
+            self.assertEqual(
+                client.get_section("db"),
+                {"host": "localhost", "port": 5432, "options": {"tls": True}},
+            )
+            self.assertEqual(client.dump(), self.registry.dict)
+
+    def test_errors(self):
+        with ConfigClient(self.path) as client:
+            with self.assertLogs(level="ERROR"):
+                with self.assertRaises(ServerError):
+                    client._request("get")
+            with self.assertRaises(ServerError):
+                client._request("set", key="db.host")
+            self.assertEqual(client.get("db.host"), "localhost")
+
+    def test_socket(self):
+        self.assertEqual(stat.S_IMODE(os.stat(self.path).st_mode), 0o600)
+        with self.assertRaises(OSError):
+            ConfigServer(self.registry, self.path)
+
+    def test_socket_directory(self):
+        path = os.path.join(self.tmpdir, "run", "cfitall.sock")
+        server = ConfigServer(self.registry, path)
+        server.server_close()
+        directory = os.path.dirname(path)
+        self.assertEqual(stat.S_IMODE(os.stat(directory).st_mode), 0o700)
+        os.chmod(directory, 0o777)
+        with self.assertRaises(PermissionError):
+            ConfigServer(self.registry, path)
+        os.chmod(directory, 0o1777)
+        ConfigServer(self.registry, path).server_close()
+
+    def test_socket_owner(self):
+        with mock.patch("os.getuid", return_value=os.getuid() + 1):
+            with self.assertRaises(PermissionError):
+                ConfigClient(self.path).get("db.host")
+
+    def test_stale_socket(self):
+        path = os.path.join(self.tmpdir, "stale.sock")
+        stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stale.bind(path)
+        stale.close()
+        server = ConfigServer(self.registry, path)
+        server.server_close()
+        self.assertFalse(os.path.exists(path))
+
+    def test_cli(self):
+        def run(command, *args):
+            stdout = io.StringIO()
+            with contextlib.redirect_stdout(stdout):
+                status = cli.main([command, "test", *args, "--socket", self.path])
+            return status, stdout.getvalue()
+
+        self.assertEqual(run("get", "db.host"), (0, "localhost\n"))
+        self.assertEqual(run("get", "db.port"), (0, "5432\n"))
+        status, output = run("get", "db")
+        self.assertEqual(status, 0)
+        self.assertIn('"host": "localhost"', output)
+        self.assertEqual(run("get", "nope"), (1, ""))
+        self.assertEqual(run("dump")[0], 0)
+        os.environ["XDG_RUNTIME_DIR"] = self.tmpdir
+        try:
+            self.assertEqual(
+                socket_path("test"),
+                os.path.join(self.tmpdir, f"cfitall-test-{os.getuid()}.sock"),
+            )
+        finally:
+            del os.environ["XDG_RUNTIME_DIR"]
+        self.assertEqual(
+            socket_path("test"),
+            os.path.join(
+                f"/tmp/cfitall-{os.getuid()}", f"cfitall-test-{os.getuid()}.sock"
+            ),
+        )
+
+    def test_cli_no_server(self):
+        stderr = io.StringIO()
+        with contextlib.redirect_stderr(stderr):
+            status = cli.main(
+                ["get", "test", "db.host", "--socket", f"{self.path}.missing"]
+            )
+        self.assertEqual(status, 2)
+        self.assertIn("cannot connect", stderr.getvalue())
+
+    def test_cli_errors(self):
+        stderr = io.StringIO()
+        with contextlib.redirect_stderr(stderr):
+            with mock.patch.object(ConfigClient, "dump", side_effect=ServerError("no")):
+                status = cli.main(["dump", "test", "--socket", self.path])
+            self.assertEqual(status, 2)
+            self.assertIn("answered with an error: no", stderr.getvalue())
+            # another server is already listening on the socket
+            status = cli.main(["serve", "test", "--socket", self.path])
+        self.assertEqual(status, 2)
+        self.assertIn("cannot serve", stderr.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,130 @@
+import sys
+import unittest
+
+from cfitall import utils
+from cfitall.snapshot import (
+    CompactIndex,
+    CompactSnapshot,
+    ConfigSnapshot,
+    OverlayIndex,
+    OverlaySnapshot,
+)
+from cfitall.trie import KeyTrie
+
+TREE = {
+    "services": {
+        "web": {"url": "http://web", "port": 80},
+        "api": {"url": "http://api", "tags": ["a", "b"]},
+        "empty": {},
+    },
+    "queues": {"timeout": 1, "email": {"timeout": 2, "retry": {"timeout": 3}}},
+    "hello": "world",
+}
+
+
+class CompactIndexTests(unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.index = CompactIndex(TREE)
+        self.flattened = utils.flatten_dict(TREE)
+
+    def test_mapping(self):
+        self.assertEqual(dict(self.index), self.flattened)
+        self.assertEqual(list(self.index), list(self.flattened))
+        self.assertEqual(len(self.index), len(self.flattened))
+        self.assertEqual(self.index["services.web.port"], 80)
+        self.assertEqual(self.index["hello"], "world")
+        self.assertIn("queues.email.retry.timeout", self.index)
+        for key in ("services", "services.web", "services.empty", "nope", "hello.x"):
+            self.assertNotIn(key, self.index)
+
+    def test_match(self):
+        trie = KeyTrie(self.flattened)
+        for pattern in (
+            "services.web.url",
+            "services.web",
+            "services.*.url",
+            "*",
+            "**",
+            "queues.**.timeout",
+            "**.timeout",
+            "**.**",
+            "*.*",
+            "services.**",
+            "nope.**",
+        ):
+            self.assertEqual(self.index.match(pattern), trie.match(pattern), pattern)
+
+
+class CompactSnapshotTests(unittest.TestCase):
+    def test_interned_keys(self):
+        config = {"a": {"host": 1}, "b": {"".join(["ho", "st"]): 2}}
+        snapshot = CompactSnapshot(1, config)
+        self.assertIs(list(snapshot.dict["b"])[0], sys.intern("host"))
+        self.assertEqual(snapshot.flattened["b.host"], 2)
+        self.assertEqual(snapshot.trie.match("*.host"), ["a.host", "b.host"])
+
+    def test_replace(self):
+        snapshot = CompactSnapshot(1, {"a": {"host": 1}, "b": {"port": 2}})
+        replaced = snapshot.replace({"a.host": 3, "".join(["d.ho", "st"]): 5})
+        self.assertIsInstance(replaced, CompactSnapshot)
+        self.assertIs(replaced.dict["b"], snapshot.dict["b"])
+        self.assertEqual(replaced.flattened["a.host"], 3)
+        self.assertIs(list(replaced.dict["d"])[0], sys.intern("host"))
+        self.assertEqual(snapshot.flattened["a.host"], 1)
+
+
+class OverlaySnapshotTests(unittest.TestCase):
+    def test_flattened(self):
+        base = ConfigSnapshot(1, TREE)
+        layer = {"services.web": "gone", "hello.x": 1, "queues.timeout": 5}
+        snapshot = OverlaySnapshot(2, base, layer)
+        self.assertIsInstance(snapshot.flattened, OverlayIndex)
+        self.assertIs(snapshot.flattened.base, base.flattened)
+        expected = utils.flatten_dict(snapshot.dict)
+        self.assertEqual(dict(snapshot.flattened), expected)
+        self.assertEqual(len(snapshot.flattened), len(expected))
+        self.assertNotIn("services.web.url", snapshot.flattened)
+        self.assertNotIn("hello", snapshot.flattened)
+        self.assertEqual(snapshot.flattened["queues.timeout"], 5)
+        self.assertEqual(snapshot.trie.match("services.*"), ["services.web"])
+
+
+class ConfigDiffTests(unittest.TestCase):
+    def test_diff(self):
+        old = ConfigSnapshot(1, TREE)
+        new = ConfigSnapshot(
+            2,
+            {
+                "services": {
+                    "web": {"url": "http://web", "port": 8080},
+                    "api": "gone",
+                    "db": {"url": "http://db"},
+                },
+                "queues": TREE["queues"],
+                "hello": ["world"],
+            },
+        )
+        diff = new.diff(old)
+        self.assertEqual(
+            diff.added, {"services.api": "gone", "services.db.url": "http://db"}
+        )
+        self.assertEqual(
+            diff.removed,
+            {"services.api.url": "http://api", "services.api.tags": ["a", "b"]},
+        )
+        self.assertEqual(
+            diff.changed,
+            {"services.web.port": (80, 8080), "hello": ("world", ["world"])},
+        )
+        self.assertTrue(diff)
+        self.assertFalse(old.diff(ConfigSnapshot(3, dict(TREE))))
+        self.assertFalse(old.diff(ConfigSnapshot(3, utils.merge_dicts(TREE, {}))))
+        self.assertEqual(
+            ConfigSnapshot(4, {"x": 1}).diff(ConfigSnapshot(5, {"x": True})).changed,
+            {"x": (True, 1)},
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
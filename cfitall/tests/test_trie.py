@@ -0,0 +1,47 @@
+import unittest
+
+from cfitall.trie import KeyTrie
+
+
+class KeyTrieTests(unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.trie = KeyTrie(
+            [
+                "services.web.url",
+                "services.web.port",
+                "services.api.url",
+                "queues.timeout",
+                "queues.email.timeout",
+                "queues.email.retry.timeout",
+                "hello",
+            ]
+        )
+
+    def test_match_literal(self):
+        self.assertEqual(self.trie.match("services.web.url"), ["services.web.url"])
+        self.assertEqual(self.trie.match("services.web"), [])
+        self.assertEqual(self.trie.match("nope"), [])
+
+    def test_match_single_wildcard(self):
+        self.assertEqual(
+            self.trie.match("services.*.url"), ["services.api.url", "services.web.url"]
+        )
+        self.assertEqual(self.trie.match("*"), ["hello"])
+
+    def test_match_double_wildcard(self):
+        self.assertEqual(
+            self.trie.match("queues.**.timeout"),
+            ["queues.email.retry.timeout", "queues.email.timeout", "queues.timeout"],
+        )
+        self.assertEqual(len(self.trie.match("**")), 7)
+
+    def test_match_repeated_double_wildcard(self):
+        self.assertEqual(
+            self.trie.match("**.**.timeout"),
+            ["queues.email.retry.timeout", "queues.email.timeout", "queues.timeout"],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
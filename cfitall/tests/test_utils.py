@@ -36,10 +36,27 @@ class TestExpandFlatten(unittest.TestCase):
         expanded = utils.expand_flattened_dict({"asdf.fdsa.qwer.rewq": "foo"})
         self.assertEqual(expanded, {"asdf": {"fdsa": {"qwer": {"rewq": "foo"}}}})
 
+    def test_expand_mixed_dict(self):
+        expanded = utils.expand_mixed_dict(
+            {"Foo.bar": 1, "foo": {"baz": 2}, "foo.bar": 3, "bat": [1]}
+        )
+        self.assertEqual(expanded, {"foo": {"bar": 3, "baz": 2}, "bat": [1]})
+
     def test_flatten_dict(self):
         flattened = utils.flatten_dict({"asdf": {"fdsa": {"qwer": {"rewq": "foo"}}}})
         self.assertEqual(flattened, {"asdf.fdsa.qwer.rewq": "foo"})
 
+    def test_flatten_dict_levels(self):
+        self.assertEqual(utils.flatten_dict({"a": {}, "b": {"c": {}}}), {})
+        self.assertEqual(
+            utils.flatten_dict({"a": {"b": {"c": 1}}, "a.b": 5}), {"a.b": 5}
+        )
+        self.assertEqual(
+            utils.flatten_dict({"a.b": 5, "a": {"b": {"c": 1}}}), {"a.b.c": 1}
+        )
+        flattened = utils.flatten_dict({"a": {"b": {"c": 1}, "d": 2}, "e": 3})
+        self.assertEqual(list(flattened), ["a.b.c", "a.d", "e"])
+
 
 class TestExtractFindMerge(unittest.TestCase):
     def test_merge_dicts(self):
@@ -51,5 +68,27 @@ class TestExtractFindMerge(unittest.TestCase):
         )
 
 
+class TestOverlay(unittest.TestCase):
+    def test_overlay_dict(self):
+        base = {"foo": {"bar": 1, "baz": {"x": 1}}, "bat": {"y": 2}, "z": 3}
+        overlaid = utils.overlay_dict({"FOO": {"bar": 2}, "z": {"a": 1}}, base)
+        self.assertEqual(
+            overlaid,
+            {"foo": {"bar": 2, "baz": {"x": 1}}, "bat": {"y": 2}, "z": {"a": 1}},
+        )
+        self.assertEqual(base["foo"]["bar"], 1)
+        self.assertIs(overlaid["bat"], base["bat"])
+        self.assertIs(overlaid["foo"]["baz"], base["foo"]["baz"])
+
+    def test_is_shadowed(self):
+        self.assertTrue(utils.is_shadowed("foo.bar.baz", {"foo.bar": 1}))
+        self.assertTrue(utils.is_shadowed("foo.bar.baz", {"foo": 1}))
+        self.assertFalse(utils.is_shadowed("foo.bar", {"foo.bar": 1}))
+        self.assertFalse(utils.is_shadowed("foo.barbaz", {"foo.bar": 1}))
+
+    def test_parent_paths(self):
+        self.assertEqual(utils.parent_paths(["foo.bar.baz", "bat"]), {"foo", "foo.bar"})
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,74 @@
+"""
+The trie module implements a KeyTrie, which indexes dotted configuration keys
+by their segments so that they can be queried with wildcard patterns.
+"""
+
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+
+class _Node:
+    __slots__ = ("children", "key")
+
+    def __init__(self) -> None:
+        self.children: Dict[str, "_Node"] = {}
+        self.key: Optional[str] = None
+
+
+class KeyTrie:
+    def __init__(self, keys: Iterable[str] = (), separator: str = ".") -> None:
+        """
+        A KeyTrie stores dotted configuration keys in a tree of their segments,
+        e.g. ``services.web.url`` is stored as ``services -> web -> url``.
+        Patterns passed to match() may use ``*`` to match exactly one segment
+        and ``**`` to match any number of segments (including none).
+
+        :param keys: dotted keys to add to the trie
+        :param separator: separator between segments in keys and patterns
+        """
+        self.separator = separator
+        self._root = _Node()
+        for key in keys:
+            self.add(key)
+
+    def add(self, key: str) -> None:
+        """
+        Adds a dotted key to the trie.
+
+        :param key: dotted key to add
+        """
+        node = self._root
+        for segment in key.split(self.separator):
+            child = node.children.get(segment)
+            if child is None:
+                child = node.children[segment] = _Node()
+            node = child
+        node.key = key
+
+    def match(self, pattern: str) -> List[str]:
+        """
+        Returns a sorted list of the keys in the trie matching pattern.
+
+        :param pattern: dotted key, optionally containing ``*`` or ``**`` segments
+        """
+        segments = pattern.split(self.separator)
+        matches: List[str] = []
+        seen: Set[Tuple[int, int]] = set()
+        stack: List[Tuple[_Node, int]] = [(self._root, 0)]
+        while stack:
+            node, index = stack.pop()
+            if (id(node), index) in seen:
+                continue
+            seen.add((id(node), index))
+            if index == len(segments):
+                if node.key is not None:
+                    matches.append(node.key)
+                continue
+            segment = segments[index]
+            if segment == "**":
+                stack.append((node, index + 1))
+                stack.extend((child, index) for child in node.children.values())
+            elif segment == "*":
+                stack.extend((child, index + 1) for child in node.children.values())
+            elif child := node.children.get(segment):
+                stack.append((child, index + 1))
+        return sorted(matches)
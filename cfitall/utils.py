@@ -11,7 +11,8 @@ As an "expanded" or "nested" dict, the same data would be:
 """
 
 from collections.abc import Mapping
-from typing import Dict, Optional
+import sys
+from typing import Dict, Iterable, Optional, Set
 
 from cfitall import ConfigValueType
 
@@ -58,21 +59,20 @@ def flatten_dict(nested: dict) -> dict:
 
     :param nested: dictionary to flatten
     """
-    flattened = {}
-    for key, value in nested.items():
-        if isinstance(value, Mapping):
-            for subkey, subval in value.items():
-                newkey = ".".join([key, subkey])
-                flattened[newkey] = subval
-            flatten_dict(flattened)
-        else:
-            flattened[key] = value
-    mappings = [isinstance(value, Mapping) for key, value in flattened.items()]
-    if len(set(mappings)) == 1 and set(mappings).pop() is False:
-        return flattened
-    elif len(set(mappings)) > 0:
-        return flatten_dict(flattened)
-    return {}
+    flattened = nested
+    while True:
+        # expand one level of nesting per pass, so that keys set at a shallower
+        # level are overwritten by (and in the position of) earlier ones
+        current, flattened, nesting = flattened, {}, False
+        for key, value in current.items():
+            if isinstance(value, Mapping):
+                for subkey, subval in value.items():
+                    flattened[".".join([key, subkey])] = subval
+                    nesting = nesting or isinstance(subval, Mapping)
+            else:
+                flattened[key] = value
+        if not nesting:
+            return flattened
 
 
 def merge_dicts(source: Mapping, destination: dict) -> dict:
@@ -94,6 +94,26 @@ def merge_dicts(source: Mapping, destination: dict) -> dict:
     return destination
 
 
+def overlay_dict(source: Mapping, destination: Mapping) -> dict:
+    """
+    Returns a copy of destination with source deep-merged on top of it, as
+    merge_dicts would, without modifying destination. Only the dicts along the
+    paths present in source are copied; all other values and sub-dicts are
+    shared with destination, so the result must be treated as read-only.
+
+    :param source: source dictionary to copy from
+    :param destination: destination dict to overlay source onto
+    """
+    overlaid = dict(destination)
+    for key, value in source.items():
+        key = key.lower() if isinstance(key, str) else key
+        if isinstance(value, Mapping):
+            current = overlaid.get(key)
+            value = overlay_dict(value, current if isinstance(current, Mapping) else {})
+        overlaid[key] = value
+    return overlaid
+
+
 def expand_flattened_dict(flattened: dict, separator: str = ".") -> dict:
     """
     Expands a flattened dict into a nested dict, e.g. {'foo.bar': 'baz'} to
@@ -107,3 +127,67 @@ def expand_flattened_dict(flattened: dict, separator: str = ".") -> dict:
         expanded = expand_flattened_path(key, value=value, separator=separator)
         merged = merge_dicts(merged, expanded)
     return merged
+
+
+def expand_mixed_dict(mixed: Mapping, separator: str = ".") -> dict:
+    """
+    Expands a dict that may mix flattened keys and nested dicts into a nested
+    dict, e.g. {'foo.bar': 'baz', 'foo': {'bat': 'bam'}} to
+    {'foo': {'bar': 'baz', 'bat': 'bam'}}. Items are merged in order, so later
+    keys take precedence over earlier ones, and keys are lowercased.
+
+    :param mixed: dictionary with flattened and/or nested keys to expand
+    :param separator: separator between dict keys in flattened keys
+    """
+    expanded: dict = {}
+    for key, value in mixed.items():
+        merge_dicts(expand_flattened_path(key, value, separator=separator), expanded)
+    return expanded
+
+
+def intern_keys(tree: Mapping) -> dict:
+    """
+    Returns a copy of a nested dict with all string keys interned, so that keys
+    repeated throughout the tree are stored once.
+
+    :param tree: nested dict to copy
+    """
+    return {
+        sys.intern(key) if isinstance(key, str) else key: (
+            intern_keys(value) if isinstance(value, Mapping) else value
+        )
+        for key, value in tree.items()
+    }
+
+
+def is_shadowed(flattened_path: str, flattened: Mapping, separator: str = ".") -> bool:
+    """
+    Returns True if any parent path of flattened_path is a key in flattened,
+    e.g. ``foo.bar.baz`` is shadowed by a value set for ``foo`` or ``foo.bar``.
+
+    :param flattened_path: the dotted path to check
+    :param flattened: dictionary with flattened keys
+    :param separator: separator between dict keys in flattened_path
+    """
+    index = flattened_path.rfind(separator)
+    while index > 0:
+        if flattened_path[:index] in flattened:
+            return True
+        index = flattened_path.rfind(separator, 0, index)
+    return False
+
+
+def parent_paths(flattened_paths: Iterable[str], separator: str = ".") -> Set[str]:
+    """
+    Returns the set of all parent paths of the given dotted paths, e.g.
+    ``{'foo', 'foo.bar'}`` for ``['foo.bar.baz']``.
+
+    :param flattened_paths: dotted paths to find the parents of
+    :param separator: separator between dict keys in flattened_paths
+    """
+    return {
+        path[:index]
+        for path in flattened_paths
+        for index, char in enumerate(path)
+        if char == separator
+    }